@@ -2,7 +2,6 @@ from typing import Any
 
 import os
 import bz2
-import cv2
 import datetime
 import pickle
 from pathlib import Path
@@ -11,6 +10,7 @@ def make_video_from_image_dir(vid_path, img_folder, video_name='trajectory', fps
     """
     Create a video from a directory of images
     """
+    import cv2
     images = [img for img in os.listdir(img_folder) if img.endswith(".png")]
     images.sort(key=lambda f: int(''.join(filter(str.isdigit, f))))
 
@@ -26,6 +26,7 @@ def make_video_from_rgb_imgs(rgb_arrs, vid_path, video_name='trajectory',
     """
     Create a video from a list of rgb arrays
     """
+    import cv2
     # print("Rendering video...")
     if vid_path[-1] != '/':
         vid_path += '/'
@@ -0,0 +1,186 @@
+"""
+Action Handlers
+---------------
+Plan steps as typed `Action` records, and tables of the task actions agents perform
+and of the goals they plan for, keyed by small ints, so that MapEnv.update_moves and
+Planner.find_best_goal dispatch with one lookup instead of walking if/elif chains.
+
+Every plan step is an `Action`: its opcode in agent_configs.ACTIONS (0-8: movements,
+9-14: task actions) and the arguments of the task action, if any. Movements are the
+shared `MOVES` records. Steps in the older format (an int movement, or a list such as
+['PICK', {...}, end_coord]) are converted with `as_action` where they enter the env.
+
+Task actions are keyed by their opcode in agent_configs.ACTIONS (9: PICK ... 14: DROP).
+A handler has
+- precondition(agent, action): whether the agent stands where the action is performed
+- execute(agent, task_id, action): applies it through the agent's AgentActions method
+- reward(action, rewards): what the action is worth when a plan is scored
+
+Goals are keyed by goal id. Every goal id the map lists under an action kind in
+FLATTENED_RECIPES_ACTION_MAPPING is planned by the handler registered for that kind
+(see the `goal_handler` decorators in planner.py), so the goals of a new recipe need
+no new dispatch code.
+"""
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from agent_configs import ACTIONS
+from settings import FLATTENED_RECIPES_ACTION_MAPPING
+
+# Opcode of every action name, eg. OPCODES['PICK'] == 9
+OPCODES = {name: opcode for opcode, name in ACTIONS.items()}
+
+# Picking up something for a later task is worth more than picking for its own sake
+# (less the PICK penalty), most of all picking a plate to serve with
+PICK_FOR_TASK_REWARDS = {
+    'COOK': 40 - 10,
+    'SCOOP': 50 - 10,
+    'SERVE': 100 - 10
+}
+
+NUM_MOVES = 9
+
+class Action(NamedTuple):
+    opcode: int
+    # Cell the task is performed on (eg. the pot cooked in) and the cell the agent does it from
+    task_coord: Optional[Tuple[int,int]] = None
+    end_coord: Optional[Tuple[int,int]] = None
+    # Whether the task completes its goal (PICK/CHOP/COOK/SCOOP/SERVE)
+    is_last: bool = False
+    # PICK: a new ingredient from its station, and 'ingredient' or 'plate'
+    is_new: bool = False
+    pick_type: Optional[str] = None
+    # PICK/DROP: the kind of task the item is picked up or put down for
+    for_task: Optional[str] = None
+    # DROP: the cell to put the item on (a random free table-top if None)
+    drop_coord: Optional[Tuple[int,int]] = None
+
+    @classmethod
+    def task(cls, name: str, **args) -> 'Action':
+        """Task action by name, eg. Action.task('CHOP', task_coord=..., end_coord=..., is_last=True)"""
+        return cls(OPCODES[name], **args)
+
+    @property
+    def name(self) -> str:
+        return ACTIONS[self.opcode]
+
+    @property
+    def is_move(self) -> bool:
+        return self.opcode < NUM_MOVES
+
+# One shared record per movement (and STAY), by opcode
+MOVES = tuple(Action(opcode) for opcode in range(NUM_MOVES))
+STAY = MOVES[OPCODES['STAY']]
+
+def as_action(step) -> Action:
+    """
+    Action record of a plan step, which may be in the older format: an int movement,
+    or [name, info, end_coord] (PICK/SCOOP/SERVE), [name, is_last, task_coord, end_coord]
+    (CHOP/COOK) or [name, info] (DROP)
+    """
+    if isinstance(step, Action):
+        return step
+    if not isinstance(step, (list, tuple)):
+        return MOVES[step]
+    name = step[0]
+    if name in ('CHOP', 'COOK'):
+        return Action.task(name, task_coord=step[2], end_coord=step[3], is_last=step[1])
+    info = step[1]
+    if name == 'DROP':
+        return Action.task(name, for_task=info.get('for_task'), drop_coord=info.get('drop_coord'))
+    return Action.task(
+        name,
+        task_coord=info['task_coord'],
+        end_coord=step[2],
+        is_last=info.get('is_last', False),
+        is_new=info.get('is_new', False),
+        pick_type=info.get('pick_type'),
+        for_task=info.get('for_task')
+    )
+
+class ActionHandler(NamedTuple):
+    opcode: int
+    name: str
+    precondition: Callable[[object, Action], bool]
+    execute: Callable[[object, int, Action], None]
+    reward: Callable[[Action, Dict[str, int]], int]
+
+class GoalHandler(NamedTuple):
+    kind: str
+    # plan(planner, goal, task_info) -> (goal, path_actions), or None if the goal cannot be pursued now
+    plan: Callable
+
+ACTION_HANDLERS: Dict[int, ActionHandler] = {}
+GOAL_HANDLERS: Dict[int, GoalHandler] = {}
+
+def register_action(
+    name: str,
+    precondition: Callable[[object, Action], bool],
+    execute: Callable[[object, int, Action], None],
+    reward: Callable[[Action, Dict[str, int]], int]=None
+) -> ActionHandler:
+    """
+    Parameters
+    ----------
+    name: str
+        Action name in agent_configs.ACTIONS and REWARDS, eg. 'PICK'
+    precondition, execute, reward
+        See the module docstring; reward defaults to REWARDS[name]
+    """
+    if reward is None:
+        reward = lambda action, rewards: rewards[name]
+    handler = ACTION_HANDLERS[OPCODES[name]] = ActionHandler(OPCODES[name], name, precondition, execute, reward)
+    return handler
+
+def goal_handler(kind: str) -> Callable:
+    """Register the decorated planner method for every goal id of an action kind, eg. 'PICK'"""
+    def register(plan: Callable) -> Callable:
+        for goal in FLATTENED_RECIPES_ACTION_MAPPING.get(kind, []):
+            GOAL_HANDLERS[goal] = GoalHandler(kind, plan)
+        return plan
+    return register
+
+def action_handler(action: Action) -> ActionHandler:
+    """Handler of a task action"""
+    return ACTION_HANDLERS[action.opcode]
+
+def _pick_reward(action: Action, rewards: Dict[str, int]) -> int:
+    return PICK_FOR_TASK_REWARDS.get(action.for_task, rewards['PICK'])
+
+def _at_end_coord(agent, action: Action) -> bool:
+    return action.end_coord == agent.location
+
+register_action(
+    'PICK',
+    _at_end_coord,
+    lambda agent, task_id, action: agent.pick(task_id, action.is_new, action.is_last, action.pick_type, action.task_coord),
+    _pick_reward
+)
+register_action(
+    'CHOP',
+    _at_end_coord,
+    lambda agent, task_id, action: agent.chop(task_id, action.is_last, action.task_coord)
+)
+register_action(
+    'COOK',
+    _at_end_coord,
+    lambda agent, task_id, action: agent.cook(task_id, action.is_last, action.task_coord)
+)
+register_action(
+    'SCOOP',
+    _at_end_coord,
+    lambda agent, task_id, action: agent.scoop(task_id, action.is_last, action.task_coord)
+)
+register_action(
+    'SERVE',
+    _at_end_coord,
+    lambda agent, task_id, action: agent.serve(task_id, action.is_last)
+)
+register_action(
+    'DROP',
+    lambda agent, action: True,
+    lambda agent, task_id, action: agent.drop(task_id, action.drop_coord)
+)
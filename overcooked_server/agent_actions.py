@@ -0,0 +1,260 @@
+"""
+Agent Actions
+-------------
+Task actions (pick, drop, chop, cook, scoop, serve) and movement updates shared by
+OvercookedAgent and HumanAgent; MapEnv.update_moves calls them on the acting agent.
+They use the recipe helpers of Planner, which is mixed in alongside.
+"""
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from collections import defaultdict
+
+from agent_configs import ACTIONS
+from overcooked_item_classes import Ingredient, Dish, ItemState, Plate
+import tracing
+
+log = tracing.get_logger('agent')
+
+class AgentActions:
+    __slots__ = ()
+
+    def return_valid_pos(self, new_pos):
+        """
+        Checks that the next pos is legal, if not return current pos
+        """
+        if new_pos in self.world_state['valid_cells']:
+            return new_pos
+
+        # you can't walk through walls nor another agent
+        
+        return self.location
+
+    def update_agent_pos(self, new_coords: List[int]) -> None:
+        self.location = tuple(new_coords)
+
+    def action_map(self, action_number: int) -> str:
+        return ACTIONS[action_number]
+
+    # ACTIONS
+    def pick(self, task_id: int, is_new: bool, is_last: bool, pick_type: str, task_coord: Tuple[int, int]) -> None:
+        log.debug('agent@pick')
+
+        if pick_type == 'ingredient':
+            ingredient_name = self.get_ingredient_name(task_id)
+            if is_new:
+                self.world_state['goal_space'].counts[task_id] -= 1
+                self.world_state['goal_space'].counts[task_id+1] += 1
+                state = ItemState.UNCHOPPED
+                new_ingredient = Ingredient(
+                    ingredient_name,
+                    state,
+                    'ingredient',
+                    task_coord
+                )
+                new_ingredient.location = tuple(self.location)
+                self.holding = new_ingredient
+            if is_last:
+                try:
+                    self.world_state['goal_space'].dequeue(task_id)
+                except IndexError:
+                    # Both Agents try to pick at the same time
+                    pass
+                self.world_state['goal_space'].enqueue(task_id+1, ItemState.UNCHOPPED, ingredient=ingredient_name)
+            else:
+                log.debug('IndexError when trying to pop goal_space - PICK')
+                registry = self.world_state['item_registry']
+                ingredients = registry.at(task_coord, 'ingredients')
+
+                if ingredients:
+                    # if another agent took it already and is now missing; do nothing
+                    old_ingredient = ingredients[0]
+
+                    # check if ingredient to be picked is on chopping_board
+                    cb = registry.at(task_coord, 'chopping_board')
+                    if len(cb) == 1:
+                        registry.set_state(cb[0], ItemState.EMPTY)
+
+                    # Need to remove from world state after agent has picked it
+                    registry.remove(old_ingredient)
+
+                    # update ingredient to be held by agent and in agent's current position
+                    old_ingredient.location = tuple(self.location)
+                    self.holding = old_ingredient
+        
+        elif pick_type == 'plate':
+            plates = self.world_state['item_registry'].at(task_coord, 'plate')
+            if plates:
+                # if another agent took it already and is now missing; do nothing
+                old_plate = plates[0]
+
+                # Need to remove from world state after agent has picked it
+                self.world_state['item_registry'].remove(old_plate)
+
+                # update plate to be held by agent and in agent's current position
+                old_plate.location = tuple(self.location)
+                self.holding = old_plate
+
+    def find_random_empty_cell(self) -> Tuple[int,int]:
+        all_valid_surrounding_cells = []
+        surrounding_cells_xy = [
+            [-1,0], [0,1], [1,0], [0,-1]
+            # [-1,-1], [-1,0], [-1,1], [0,1], [1,1], [1,0], [1,-1], [0,-1]
+        ]
+
+        temp_valid_cells = self.world_state['valid_item_cells'].copy()
+        for surrounding_cell_xy in surrounding_cells_xy:
+            surrounding_cell = [sum(x) for x in zip(self.location, surrounding_cell_xy)]
+            if tuple(surrounding_cell) in temp_valid_cells:
+                all_valid_surrounding_cells.append(tuple(surrounding_cell))
+
+        return all_valid_surrounding_cells[self.rng.integers(len(all_valid_surrounding_cells))]
+
+    def drop(self, task_id: int, drop_coord: Optional[Tuple[int,int]]=None) -> None:
+        """
+        This action assumes agent is currently holding an item.
+        Item goes to a random empty cell next to the agent, or to drop_coord
+        when given (replays pass the cell recorded in the trajectory).
+        Prerequisite
+        ------------
+        - Drop item at where agent is currently
+
+        TO IMPROVE:
+        - Prevent stacking of item
+        - Dropping item blocks grid cell
+        """
+        log.debug('base_agent@drop - Drop item in-hand')
+        random_empty_cell = drop_coord or self.find_random_empty_cell()
+
+        # For now, just ingredients and plates
+        if type(self.holding) in (Ingredient, Plate):
+            self.world_state['item_registry'].add(self.holding, random_empty_cell)
+        self.holding = None
+
+    def chop(self, task_id: int, is_last: bool, task_coord: Tuple[int, int]):
+        if tracing.enabled:
+            log.debug('agent@chop: %s', task_id)
+        ingredient_name = self.get_ingredient_name(task_id)
+        recipe_name = self.get_recipe_name(task_id)
+        self.world_state['explicit_rewards']['chop'] += 1
+        self.world_state['goal_space'].counts[task_id] -= 1
+        self.world_state['goal_space'].counts[task_id+1] += 1
+        if is_last:
+            log.debug('base_agent@chop - Remove chopping task')
+            self.world_state['goal_space'].dequeue(task_id)
+            self.world_state['goal_space'].enqueue(task_id+1, ItemState.CHOPPED, ingredient=ingredient_name, recipe=recipe_name)
+
+        registry = self.world_state['item_registry']
+        holding_ingredient = self.holding
+
+        # agent drops ingredient to chopping board; only update location after reaching, since ingredient is in hand
+        self.holding = None
+        holding_ingredient.state = ItemState.CHOPPED
+        registry.add(holding_ingredient, task_coord)
+        used_chopping_board = registry.at(task_coord, 'chopping_board')[0]
+
+        # update chopping board to be 'taken'
+        registry.set_state(used_chopping_board, ItemState.TAKEN)
+        
+    def cook(self, task_id: int, is_last: bool, task_coord: Tuple[int, int]):
+        log.debug('agent@cook')
+        ingredient_name = self.get_ingredient_name(task_id)
+        dish = self.get_recipe_name(task_id)
+        ingredient_count = self.get_recipe_ingredient_count(dish, ingredient_name)
+
+        # Find the chosen pot - useful in maps with more than 1 pot
+        pot = self.world_state['item_registry'].at(task_coord, 'pot')[0]
+
+        if pot.ingredient_count[ingredient_name] == ingredient_count:
+            # Maxed out already
+            pass
+        else:
+            self.world_state['explicit_rewards']['cook'] += 1
+            self.world_state['goal_space'].counts[task_id] -= 1
+            self.world_state['goal_space'].dequeue(task_id)
+
+            holding_ingredient = self.holding
+            # only update location after reaching, since ingredient is in hand
+            holding_ingredient.location = task_coord
+
+            # agent drops ingredient to pot
+            pot.ingredient_count[ingredient_name] += 1
+            pot.is_empty = False
+
+            # remove ingredient from world state since used for cooking
+            self.world_state['item_registry'].discard(holding_ingredient)
+            # remove ingredient from agent's hand since no longer holding
+            self.holding = None
+
+            # if pot.ingredient_count == ingredient_count:
+            if self.complete_cooking_check(dish, pot.ingredient_count):
+                if tracing.enabled:
+                    log.debug('agent@cook - Add completed dish to pot: %s', task_id)
+
+                # Create new Dish Class object
+                new_dish = Dish(dish, pot.location)
+                self.world_state['cooked_dish'].append(new_dish)
+                pot.dish = dish
+
+                # Add Scoop to Goal Space
+                new_task_id = self.get_general_goal_id(dish, 'SCOOP')
+                if tracing.enabled:
+                    log.debug('new_task_id: %s', new_task_id)
+                self.world_state['goal_space'].counts[new_task_id] += 1
+                self.world_state['goal_space'].enqueue(new_task_id, ItemState.EMPTY, ingredient=ingredient_name)
+
+    def scoop(self, task_id: int, is_last: bool, task_coord: Tuple[int, int]):
+        log.debug('agent@scoop')
+        dish = self.get_recipe_name(task_id)
+        pot = self.world_state['item_registry'].at(task_coord, 'pot')[0]
+
+         # Empty the pot as well
+        pot.ingredient_count = defaultdict(int)
+        pot.is_empty = True
+        pot.dish = None
+
+        try:
+            dish_to_plate = [dish for dish in self.world_state['cooked_dish'] if dish.location == task_coord][0]
+            # let the plate which agent is holding, hold the completed dish
+            self.world_state['cooked_dish_count'][dish_to_plate.name] -= 1
+            self.holding.dish = dish_to_plate
+            self.holding.state = ItemState.PLATED
+
+            # remove dish from world state since used for plating
+            for idx, cooked_dish in enumerate(self.world_state['cooked_dish']):
+                if id(cooked_dish) == id(dish_to_plate):
+                    del self.world_state['cooked_dish'][idx]
+                    break
+
+            self.world_state['goal_space'].counts[task_id] -= 1
+            if is_last:
+                log.debug('base_agent@scoop - Remove scooping task')
+                new_task_id = self.get_general_goal_id(dish, 'SERVE')
+                self.world_state['goal_space'].dequeue(task_id)
+                self.world_state['goal_space'].counts[new_task_id] += 1
+                self.world_state['goal_space'].enqueue(new_task_id, ItemState.PLATED, recipe=dish)
+        except IndexError:
+            # Both Agents try to scoop at the same time
+            pass
+        
+    def serve(self, task_id: int, is_last: bool):
+        log.debug('agent@serve')
+        self.world_state['explicit_rewards']['serve'] += 1
+        self.world_state['total_score'] += self.world_state['score'].pop(0)
+
+        # plate returns to return point (in clean form for now)
+        self.holding.dish = None
+        self.holding.state = ItemState.EMPTY
+        self.world_state['item_registry'].add(self.holding, self.world_state['return_counter'])
+
+        # remove dish from plate
+        self.holding = None
+
+        # remove order from TaskList
+        if is_last:
+            if tracing.enabled:
+                log.debug('base_agent@serve - Remove serve task: %s', task_id)
+            self.world_state['goal_space'].counts[task_id] -= 1
+            self.world_state['goal_space'].dequeue(task_id)
+            self.world_state['order_count'] -= 1
@@ -0,0 +1,71 @@
+from typing import Iterator
+from typing import List
+from typing import Set
+from typing import Tuple
+
+import numpy as np
+
+class AgentTable:
+    def __init__(self, agents: List) -> None:
+        """
+        Agents of a world_state by row, id and cell, with their cells in a NumPy array.
+
+        The table owns world_state['agents']: agents are added through it, and moved
+        with `move`, which keeps agent.location, the `locations` array and the cell
+        index in step, so "who is on this cell" is one lookup however many agents
+        there are. Move resolution never puts two agents on one cell. It is stored in
+        the world_state itself, so a deepcopy of the world_state copies a table of the
+        copied agents.
+
+        Parameters
+        ----------
+        agents: List
+            world_state['agents']; agents already in it are indexed
+        """
+        self.agents = agents
+        # Row of every agent, by agent and by id (rows follow world_state['agents'])
+        self._rows = {}
+        self._by_id = {}
+        self._by_cell = {}
+        self.locations = np.empty((0, 2), dtype=np.int64)
+        indexed = list(agents)
+        agents.clear()
+        for agent in indexed:
+            self.add(agent)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.agents)
+
+    def add(self, agent) -> None:
+        self._rows[agent] = len(self.agents)
+        self._by_id[agent.id] = agent
+        self._by_cell[tuple(agent.location)] = agent
+        self.agents.append(agent)
+        self.locations = np.vstack([self.locations, [agent.location]])
+
+    def move(self, agent, cell: Tuple[int,int]) -> None:
+        """Put an agent on a cell (agent.update_agent_pos); the agents of a step may move in any order"""
+        old_cell = tuple(agent.location)
+        # In a rotation the agent's old cell may already be taken by the agent moving onto it
+        if self._by_cell.get(old_cell) is agent:
+            del self._by_cell[old_cell]
+        agent.update_agent_pos(cell)
+        self._by_cell[agent.location] = agent
+        self.locations[self._rows[agent]] = agent.location
+
+    def row(self, agent) -> int:
+        return self._rows[agent]
+
+    def by_id(self, agent_id: str):
+        return self._by_id[agent_id]
+
+    def at(self, cell: Tuple[int,int]):
+        """Agent on a cell, or None"""
+        return self._by_cell.get(tuple(cell))
+
+    def cells(self) -> Set[Tuple[int,int]]:
+        """Cells agents stand on"""
+        return set(self._by_cell)
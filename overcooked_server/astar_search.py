@@ -1,6 +1,16 @@
+from typing import Dict
 from typing import List
+from typing import Set
 from typing import Tuple
 
+from settings import GRID_ROWS, GRID_COLS
+
+# Extremely high cost to enter barrier squares
+BARRIER_COST = 10000
+
+# Moves are like a chess king's; (x, y) -> cells around it, in the order they are explored
+_neighbours: Dict[Tuple[int,int], List[Tuple[int,int]]] = {}
+
 class AStarGraph():
 	# Define a class board like grid with two barriers
     def __init__(
@@ -19,20 +29,31 @@ class AStarGraph():
         return D * (dx + dy) + (D2 - 2 * D) * min(dx, dy)
  
     def get_vertex_neighbours(self, pos):
-        n = []
-		# Moves allow link a chess king
-        # prevent diagonals ,(1,1),(-1,1),(1,-1),(-1,-1)
-        # WHEN ONLY ADJACENT MOVEMENTS ALLOWED, AGENT WILL GET STUCK.
-        for dx, dy in [(1,0),(-1,0),(0,1),(0,-1),(1,1),(-1,1),(1,-1),(-1,-1)]:
-            x2 = pos[0] + dx
-            y2 = pos[1] + dy
-            if x2 < 0 or x2 > 8 or y2 < 0 or y2 > 12:
-                continue
-            n.append((x2, y2))
+        # Positions may come in as lists; the cache is keyed by tuple
+        pos = tuple(pos)
+        n = _neighbours.get(pos)
+        if n is None:
+            n = []
+            # prevent diagonals ,(1,1),(-1,1),(1,-1),(-1,-1)
+            # WHEN ONLY ADJACENT MOVEMENTS ALLOWED, AGENT WILL GET STUCK.
+            for dx, dy in [(1,0),(-1,0),(0,1),(0,-1),(1,1),(-1,1),(1,-1),(-1,-1)]:
+                x2 = pos[0] + dx
+                y2 = pos[1] + dy
+                if x2 < 0 or x2 >= GRID_ROWS or y2 < 0 or y2 >= GRID_COLS:
+                    continue
+                n.append((x2, y2))
+            _neighbours[pos] = n
         return n
+
+    def barrier_cells(self) -> Set[Tuple[int,int]]:
+        """
+        Snapshot of the cells move_cost charges BARRIER_COST for, so that a search can
+        look them up in O(1) (the barrier list is shared and mutated between searches)
+        """
+        return {tuple(cell) for cell in self.barriers[0]}
  
     def move_cost(self, a, b):
         for barrier in self.barriers:
             if b in barrier:
-                return 10000 # Extremely high cost to enter barrier squares
+                return BARRIER_COST
             return 1 # Normal movement cost
@@ -0,0 +1,82 @@
+"""
+Barriers
+--------
+The cells A* plans around: WALLS, plus the agents' cells, which the env moves as
+the agents move. It is one list shared by every AStarGraph (and the front-ends), so
+it is changed in place, with append and remove only.
+
+`Barriers` keeps a Zobrist key of the set of its cells up to date on every change:
+the XOR of a random 64-bit key per cell, so that equal sets of cells have equal
+keys. Planning caches (see zobrist.find_best_goal) key on it in O(1) instead of
+hashing every cell of the list on every lookup.
+"""
+from typing import Iterable
+from typing import Tuple
+
+import numpy as np
+
+KEY_SEED = 20200910
+
+_keys = {}
+_key_rng = np.random.default_rng(KEY_SEED)
+
+def cell_key(cell: Tuple[int,int]) -> int:
+    """Random 64-bit key of a cell, drawn the first time it is seen"""
+    key = _keys.get(cell)
+    if key is None:
+        key = _keys[cell] = int(_key_rng.integers(2**64, dtype=np.uint64))
+    return key
+
+class Barriers(list):
+    def __init__(self, cells: Iterable[Tuple[int,int]]=()) -> None:
+        """
+        Parameters
+        ----------
+        cells: Iterable[Tuple[int,int]]
+            Barrier cells, eg. a map's WALLS
+        """
+        super().__init__()
+        # Times every cell is in the list; a cell's key is in `key` while it is
+        self._counts = {}
+        self.key = 0
+        self.extend(cells)
+
+    def append(self, cell: Tuple[int,int]) -> None:
+        super().append(cell)
+        self._count(cell, 1)
+
+    def extend(self, cells: Iterable[Tuple[int,int]]) -> None:
+        for cell in cells:
+            self.append(cell)
+
+    def remove(self, cell: Tuple[int,int]) -> None:
+        super().remove(cell)
+        self._count(cell, -1)
+
+    def _unsupported(self, *args, **kwargs):
+        raise TypeError('Barriers are changed with append, extend and remove only')
+
+    insert = pop = clear = __setitem__ = __delitem__ = __iadd__ = __imul__ = _unsupported
+
+    def __deepcopy__(self, memo) -> 'Barriers':
+        # Cells are int tuples, so the copy shares them
+        barriers = Barriers.__new__(Barriers)
+        memo[id(self)] = barriers
+        list.extend(barriers, self)
+        barriers._counts = dict(self._counts)
+        barriers.key = self.key
+        return barriers
+
+    def __reduce__(self):
+        return Barriers, (list(self),)
+
+    def _count(self, cell: Tuple[int,int], change: int) -> None:
+        cell = tuple(cell)
+        count = self._counts.get(cell, 0) + change
+        if count:
+            self._counts[cell] = count
+        else:
+            del self._counts[cell]
+        # The cell entered or left the set
+        if count == (1 if change > 0 else 0):
+            self.key ^= cell_key(cell)
@@ -0,0 +1,7 @@
+"""
+Benchmarks
+----------
+Run from the overcooked_server folder, eg. `python -m benchmarks.startup` or
+`python -m benchmarks.simulation --output results.json`; `python -m benchmarks.scaling
+--plot scaling.png` plots the timestep latency against the number of agents.
+"""
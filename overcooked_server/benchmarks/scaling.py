@@ -0,0 +1,112 @@
+"""
+Timestep latency against the number of agents, on generated kitchens.
+
+Every (agents, kind) case runs `simulation.bench_episode` in a fresh interpreter
+on maps/generated.py, sized for its agents (see map_generator.kitchen_size), so
+the cases differ in team size and kitchen only. The JSON results hold the same
+per-phase latencies as benchmarks.simulation; `--plot` draws the mean ms per
+timestep, and per phase, against the number of agents (needs matplotlib).
+
+Usage: `python -m benchmarks.scaling --plot scaling.png --output scaling.json`
+"""
+from typing import Dict
+from typing import List
+
+import click
+import json
+import sys
+
+from benchmarks.simulation import AGENT_KINDS, _git_commit, spawn_case
+
+AGENT_COUNTS = [2, 4, 8, 16, 32]
+# Phases drawn next to the whole timestep
+PLOTTED_PHASES = ['find_best_goal', 'observer_inference', 'env_step']
+
+def build_cases(agent_counts: List[int], kinds: List[str], seed: int, steps: int) -> List[Dict]:
+    return [
+        {'map': 'generated', 'case': 'episode', 'agents': num_agents, 'kind': kind, 'seed': seed, 'steps': steps}
+        for kind in kinds for num_agents in agent_counts
+    ]
+
+def spawn_scaling_case(case: Dict, layout_seed: int) -> Dict:
+    result = spawn_case(case, {
+        'OVERCOOKED_GEN_AGENTS': str(case['agents']),
+        'OVERCOOKED_GEN_SEED': str(layout_seed)
+    })
+    if 'seconds' in result:
+        result['ms_per_step'] = 1000 * result['seconds'] / result['steps']
+    return result
+
+def plot(results: List[Dict], path: str) -> None:
+    try:
+        import matplotlib
+    except ImportError:
+        raise click.ClickException('--plot needs matplotlib (see requirements.txt)')
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for kind in sorted({result['kind'] for result in results}):
+        kind_results = sorted(
+            (result for result in results if result['kind'] == kind and 'ms_per_step' in result),
+            key=lambda result: result['agents']
+        )
+        if not kind_results:
+            continue
+        agents = [result['agents'] for result in kind_results]
+        line, = ax.plot(agents, [result['ms_per_step'] for result in kind_results], marker='o', label=f'{kind} timestep')
+        for phase, style in zip(PLOTTED_PHASES, ['--', ':', '-.']):
+            ax.plot(
+                agents, [result['phases'].get(phase, {}).get('mean_ms', 0.0) for result in kind_results],
+                linestyle=style, color=line.get_color(), alpha=0.6, label=f'{kind} {phase}'
+            )
+    ax.set_xticks(sorted({result['agents'] for result in results}))
+    ax.set_yscale('log')
+    ax.set_xlabel('agents')
+    ax.set_ylabel('mean ms (per timestep, or per phase call)')
+    ax.set_title('Timestep latency against team size (generated kitchens)')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def _format_result(result: Dict) -> str:
+    label = f"{result['kind']}x{result['agents']}"
+    if 'error' in result:
+        return f"{label:<9} ERROR {result['error']}"
+    phases = result['phases']
+    return (
+        f"{label:<9} {result['ms_per_step']:10.1f} ms/step"
+        + ''.join(f"  {phase} {phases.get(phase, {}).get('mean_ms', 0.0):8.2f} ms" for phase in PLOTTED_PHASES)
+    )
+
+@click.command()
+@click.option('--agents', default=','.join(map(str, AGENT_COUNTS)), help='Comma-separated agent counts')
+@click.option('--kinds', default=','.join(AGENT_KINDS), help='Comma-separated agent kinds (dummy, tom)')
+@click.option('--steps', default=30, help='Timesteps per case')
+@click.option('--seed', default=0, help='Seed for every episode')
+@click.option('--layout_seed', default=0, help='Seed of the generated kitchens')
+@click.option('--output', default=None, help='Path of the JSON results file')
+@click.option('--plot', 'plot_path', default=None, help='Path of the latency plot, eg. scaling.png')
+def main(agents, kinds, steps, seed, layout_seed, output, plot_path):
+    results = []
+    for case in build_cases([int(count) for count in agents.split(',')], kinds.split(','), seed, steps):
+        result = spawn_scaling_case(case, layout_seed)
+        print(_format_result(result))
+        results.append(result)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'benchmark': 'scaling',
+                'commit': _git_commit(),
+                'python': sys.version,
+                'seed': seed,
+                'layout_seed': layout_seed,
+                'results': results
+            }, f, indent=2)
+    if plot_path:
+        plot(results, plot_path)
+
+if __name__ == '__main__':
+    main()
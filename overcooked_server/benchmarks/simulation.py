@@ -0,0 +1,219 @@
+"""
+Planner, inference and full-episode throughput for every map.
+
+Every (map, case) runs in a fresh interpreter: the map is picked through
+OVERCOOKED_MAP, and the A* barriers (WALLS) are module state that an episode
+mutates, so cases must not share a process.
+
+Cases
+-----
+astar
+    Queries/sec over a fixed, seeded set of (start, destination) cell pairs
+episode (1-4 agents, dummy or ToM)
+    Headless timesteps/sec plus per-phase latencies (find_best_goal,
+    observer_inference, MapEnv.step, ...) from the profiling hooks, and the
+    goal cache hit rate when it is enabled (`--goal_cache`, see zobrist.py)
+
+Usage: `python -m benchmarks.simulation --output results.json`
+"""
+from typing import Dict
+from typing import List
+
+import click
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+
+SERVER_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAPS = [f'map_{idx}' for idx in range(1, 13)]
+AGENT_COUNTS = [1, 2, 3, 4]
+AGENT_KINDS = ['dummy', 'tom']
+# Phases reported per episode case (see profiling.py)
+PHASES = ['find_best_goal', 'observer_inference', 'find_agents_best_goal', 'astar', 'env_step', 'state_copy']
+
+CASE_SNIPPET = """
+import json
+from benchmarks import simulation
+print(json.dumps(simulation.run_case({case!r})))
+"""
+
+def make_env(num_agents: int, kind: str, seed: int):
+    from overcooked_env import OvercookedEnv
+    from settings import AI_AGENTS, QUEUE_EPISODES
+
+    ai_agents = {}
+    for idx in range(1, num_agents+1):
+        ai_agents[str(idx)] = dict(AI_AGENTS[str(idx)], ToM=(kind == 'tom'))
+    return OvercookedEnv(ai_agents=ai_agents, queue_episodes=QUEUE_EPISODES, seed=seed)
+
+def headless_step(env) -> None:
+    """One simulation timestep, as Game.run_simulation does it, minus rendering"""
+    best_goals = env.find_agents_best_goal()
+
+    temp_copy = copy.deepcopy(env.world_state)
+    temp_copy['historical_world_state'] = {}
+    env.world_state['historical_world_state'] = temp_copy
+
+    reward_mapping = {}
+    action_mapping = {}
+    for agent in best_goals:
+        reward_mapping[agent] = best_goals[agent][1]['rewards']
+        action_mapping[agent] = (best_goals[agent][0], best_goals[agent][1]['steps'][0])
+    for agent in action_mapping:
+        env.world_state['historical_actions'][agent.id] = [action_mapping[agent][1]]
+    env.step(action_mapping, reward_mapping)
+    env.update_episode()
+
+def bench_astar(seed: int, queries: int) -> Dict:
+    import numpy as np
+    env = make_env(1, 'dummy', seed)
+    agent = env.world_state['agents'][0]
+    cells = list(env.world_state['valid_cells'])
+    rng = np.random.RandomState(seed)
+    pairs = [(cells[rng.randint(len(cells))], cells[rng.randint(len(cells))]) for _ in range(queries)]
+
+    start = time.perf_counter()
+    for source, dest in pairs:
+        agent.location = source
+        agent.AStarSearch(dest)
+    elapsed = time.perf_counter() - start
+    return {'queries': queries, 'seconds': elapsed, 'queries_per_sec': queries / elapsed}
+
+def bench_episode(num_agents: int, kind: str, seed: int, steps: int, goal_cache: int=0) -> Dict:
+    import profiling
+    import zobrist
+    zobrist.enable_cache(goal_cache)
+    env = make_env(num_agents, kind, seed)
+    profiling.reset()
+    profiling.enable()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        headless_step(env)
+        profiling.end_step()
+    elapsed = time.perf_counter() - start
+
+    report = profiling.summary()
+    result = {
+        'agents': num_agents,
+        'kind': kind,
+        'steps': steps,
+        'seconds': elapsed,
+        'timesteps_per_sec': steps / elapsed,
+        'total_score': env.world_state['total_score'],
+        'phases': {name: report['phases'][name] for name in PHASES if name in report['phases']},
+    }
+    if 'astar_expansions' in report['counters']:
+        result['astar_expansions_per_step'] = report['counters']['astar_expansions']['mean_per_step']
+    if 'goal_cache' in report['caches']:
+        result['goal_cache'] = report['caches']['goal_cache']
+    return result
+
+def run_case(case: Dict) -> Dict:
+    from settings import AI_AGENTS
+    if case['case'] == 'episode' and case['agents'] > len(AI_AGENTS):
+        return dict(case, skipped=f'map only has {len(AI_AGENTS)} agent spawn points')
+    if case['case'] == 'astar':
+        result = bench_astar(case['seed'], case['queries'])
+    else:
+        result = bench_episode(case['agents'], case['kind'], case['seed'], case['steps'], case.get('goal_cache_size', 0))
+    return dict(case, **result)
+
+def spawn_case(case: Dict, environ: Dict[str, str]=None) -> Dict:
+    """Run a case in a fresh interpreter; `environ` adds variables, eg. those of maps/generated.py"""
+    env = dict(os.environ, OVERCOOKED_MAP=case['map'], OVERCOOKED_LOG_LEVEL='WARNING', **(environ or {}))
+    env.pop('OVERCOOKED_PROFILE', None)
+    env.pop('OVERCOOKED_GOAL_CACHE', None)
+    proc = subprocess.run(
+        [sys.executable, '-c', CASE_SNIPPET.format(case=case)],
+        cwd=SERVER_FOLDER, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+    )
+    if proc.returncode != 0:
+        return dict(case, error=proc.stderr.strip().splitlines()[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def build_cases(
+    maps: List[str],
+    agent_counts: List[int],
+    kinds: List[str],
+    seed: int,
+    steps: int,
+    queries: int,
+    goal_cache: int=0
+) -> List[Dict]:
+    cases = []
+    for map_name in maps:
+        cases.append({'map': map_name, 'case': 'astar', 'seed': seed, 'queries': queries})
+        for kind in kinds:
+            for num_agents in agent_counts:
+                cases.append({
+                    'map': map_name, 'case': 'episode', 'agents': num_agents, 'kind': kind,
+                    'seed': seed, 'steps': steps, 'goal_cache_size': goal_cache
+                })
+    return cases
+
+def _git_commit() -> str:
+    proc = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=SERVER_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True
+    )
+    return proc.stdout.strip()
+
+def _format_result(result: Dict) -> str:
+    if result['case'] == 'astar':
+        label = 'astar'
+    else:
+        label = f"{result['kind']}x{result['agents']}"
+    if 'error' in result:
+        return f"{result['map']:<8} {label:<8} ERROR {result['error']}"
+    if 'skipped' in result:
+        return f"{result['map']:<8} {label:<8} skipped: {result['skipped']}"
+    if result['case'] == 'astar':
+        return f"{result['map']:<8} {label:<8} {result['queries_per_sec']:10.1f} queries/s"
+    phases = result['phases']
+    fbg = phases.get('find_best_goal', {}).get('mean_ms', 0.0)
+    inference = phases.get('observer_inference', {}).get('mean_ms', 0.0)
+    env_step = phases.get('env_step', {}).get('mean_ms', 0.0)
+    line = (
+        f"{result['map']:<8} {label:<8} {result['timesteps_per_sec']:10.2f} steps/s"
+        f"  find_best_goal {fbg:8.2f} ms  inference {inference:8.2f} ms  step {env_step:6.2f} ms"
+    )
+    if 'goal_cache' in result:
+        line += f"  goal cache hits {result['goal_cache']['hit_rate']:6.1%}"
+    return line
+
+@click.command()
+@click.option('--maps', default=','.join(MAPS), help='Comma-separated maps, eg. map_1,map_2')
+@click.option('--agents', default=','.join(map(str, AGENT_COUNTS)), help='Comma-separated agent counts')
+@click.option('--kinds', default=','.join(AGENT_KINDS), help='Comma-separated agent kinds (dummy, tom)')
+@click.option('--steps', default=30, help='Timesteps per episode case')
+@click.option('--queries', default=500, help='A* queries per map')
+@click.option('--seed', default=0, help='Seed for every case')
+@click.option('--goal_cache', default=0, help='find_best_goal cache size per agent (0: off)')
+@click.option('--output', default=None, help='Path of the JSON results file')
+def main(maps, agents, kinds, steps, queries, seed, goal_cache, output):
+    cases = build_cases(
+        maps.split(','), [int(count) for count in agents.split(',')], kinds.split(','), seed, steps, queries,
+        goal_cache
+    )
+    results = []
+    for case in cases:
+        result = spawn_case(case)
+        print(_format_result(result))
+        results.append(result)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'benchmark': 'simulation',
+                'commit': _git_commit(),
+                'python': sys.version,
+                'seed': seed,
+                'results': results
+            }, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+from typing import Dict
+from typing import List
+
+import click
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import time we care about, from the core env up to the game front-end
+MODULES = ['settings', 'astar_search', 'overcooked_agent', 'map_env', 'overcooked_env', 'helpers', 'game']
+HEAVY_DEPENDENCIES = ['ray', 'pandas', 'pygame', 'cv2']
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [dep for dep in {heavy} if dep in sys.modules]}}))
+"""
+
+def time_import(module: str, repeats: int) -> Dict:
+    """Import module in fresh interpreters and report the median wall time"""
+    timings = []
+    loaded = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET.format(module=module, heavy=HEAVY_DEPENDENCIES)],
+            cwd=SERVER_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+        )
+        if proc.returncode != 0:
+            return {'module': module, 'error': proc.stderr.strip().splitlines()[-1]}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+    return {
+        'module': module,
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'heavy_dependencies_loaded': loaded
+    }
+
+def run(modules: List[str], repeats: int) -> List[Dict]:
+    return [time_import(module, repeats) for module in modules]
+
+@click.command()
+@click.option('--repeats', default=5, help='Fresh interpreters per module')
+@click.option('--output', default=None, help='Path of the JSON results file')
+def main(repeats, output):
+    results = run(MODULES, repeats)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['module']:<20} ERROR {result['error']}")
+        else:
+            print(f"{result['module']:<20} {result['median_s']*1000:8.1f} ms  heavy: {result['heavy_dependencies_loaded']}")
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'benchmark': 'startup', 'python': sys.version, 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import os
+
+class ExperimentLog:
+    def __init__(
+        self,
+        columns: List[str],
+        path: Optional[str]=None,
+        chunk_size: Optional[int]=None
+    ) -> None:
+        """
+        Append-only, column-oriented log of per-timestep experiment info.
+
+        Each row is appended to one list per column (amortised O(1)), instead of copying
+        a whole DataFrame per timestep like DataFrame.append. Rows are written out in one
+        go by `flush`, or every `chunk_size` rows when a chunk size is given.
+
+        Parameters
+        ----------
+        columns: List[str]
+            Column names, in output order
+        path: str
+            .csv or .parquet file the rows are written to (Parquet needs pyarrow)
+        chunk_size: int
+            Rows buffered before they are written out; None keeps every row until flush
+        """
+        self.columns = list(columns)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._buffer = {column: [] for column in self.columns}
+        self._parquet_writer = None
+
+    def __len__(self) -> int:
+        return self.rows_written + self.buffered_rows
+
+    @property
+    def buffered_rows(self) -> int:
+        return len(self._buffer[self.columns[0]]) if self.columns else 0
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """
+        Parameters
+        ----------
+        row: Dict[str, Any]
+            Value for every column
+        """
+        for column in self.columns:
+            self._buffer[column].append(row[column])
+        if self.chunk_size is not None and self.path is not None and self.buffered_rows >= self.chunk_size:
+            self.flush()
+
+    def to_dataframe(self):
+        """Buffered (not yet written) rows as a DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self._buffer, columns=self.columns)
+
+    def flush(self) -> None:
+        """Write the buffered rows to `path` and empty the buffer"""
+        if self.path is None:
+            raise ValueError('ExperimentLog has no path to flush to')
+        # The first flush creates (truncates) the file, later ones append to it
+        if self.buffered_rows == 0 and self.rows_written > 0:
+            return
+
+        chunk = self.to_dataframe()
+        if os.path.splitext(self.path)[1] == '.parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a', header=self.rows_written == 0, index=False)
+
+        self.rows_written += len(chunk)
+        for column in self.columns:
+            self._buffer[column] = []
+
+    def close(self) -> None:
+        """Flush what is left and finalise the file"""
+        if self.path is not None:
+            self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
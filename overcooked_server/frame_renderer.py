@@ -0,0 +1,224 @@
+"""
+Frame Renderer
+--------------
+Offscreen rasteriser that draws a world_state straight into a NumPy RGB array.
+
+Every asset is decoded once into a (TILESIZE, TILESIZE, 3) array, the static
+layer (grid, table tops, stations, scoreboard) is composed once, and each frame
+is the background plus the item/player tiles copied in by slicing. No window or
+display is needed: assets are decoded with OpenCV, and pygame is only used, if
+it is installed, to render the scoreboard counters with the same font as
+Game.draw. Frames are identical to what SpriteScene draws on the screen.
+
+Chefs 1-4 have sprites of their own. Larger teams reuse chef 1's sprites with the
+hat painted in a colour per chef (see `chef_sprite`), here and in sprites.Player.
+"""
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from collections import defaultdict
+import colorsys
+import os
+import numpy as np
+
+from settings import TABLE_TOPS, CHOPPING_BOARDS, INGREDIENTS_STATION, SERVING_STATION, SCOREBOARD_SCORE, \
+    SCOREBOARD_ORDERS, SCOREBOARD_TIMER, SCOREBOARD, WIDTH, HEIGHT, TILESIZE, BGCOLOR, LIGHTGREY, GREEN, \
+    SCOREBOARD_BG, BROWN, BACKGROUND_BLUE
+from overcooked_item_classes import Ingredient, ItemState, Plate
+
+ASSETS_FOLDER = os.path.join(os.path.dirname(__file__), 'assets')
+# Scoreboard tile each counter is drawn next to (same as scene.COUNTERS)
+COUNTERS = [SCOREBOARD_SCORE, SCOREBOARD_ORDERS, SCOREBOARD_TIMER]
+# Chefs with sprites of their own, and the colour of chef 1's hat that the others are painted in
+CHEF_SPRITES = 4
+CHEF_HAT = (0, 160, 207)
+
+class FrameRenderer:
+    def __init__(self, assets_folder: str=ASSETS_FOLDER) -> None:
+        """
+        Parameters
+        ----------
+        assets_folder: str
+            Folder with the 64x64 sprite PNGs
+        """
+        self.assets_folder = assets_folder
+        self._tiles = {}
+        self._player_masks = {}
+        self._text_cache = {}
+        self._font = None
+        self._chopping_board_cells = {tuple(CHOPPING_BOARDS[board]['coords']) for board in CHOPPING_BOARDS}
+        self.background = self._render_background()
+        # Reused for every frame; copy it if frames are kept
+        self.frame = np.empty_like(self.background)
+
+    def render(self, world_state: Dict, episodes_left: Optional[int]=None) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        world_state: Dict
+            OvercookedEnv.world_state to draw
+        episodes_left: int
+            Value of the timer counter; the counters are only drawn when this is given
+
+        Returns
+        -------
+        (HEIGHT, WIDTH, 3) uint8 RGB frame (the renderer's own buffer)
+        """
+        frame = self.frame
+        np.copyto(frame, self.background)
+
+        cell_items = defaultdict(lambda: defaultdict(list))
+        for category in ['ingredients', 'chopping_board', 'plate', 'pot']:
+            for item in world_state[category]:
+                cell_items[tuple(item.location)][category].append(item)
+        return_counter = tuple(world_state['return_counter'])
+        if return_counter not in cell_items:
+            cell_items[return_counter] = {}
+
+        # Items are opaque tiles, drawn in the same order as SpriteScene
+        for cell, items in cell_items.items():
+            for ingredient in items.get('ingredients', []):
+                if cell in self._chopping_board_cells:
+                    self._blit(f'chopping_board_{ingredient.name}_{ingredient.state}.png', cell)
+                else:
+                    self._blit(f'table_top_{ingredient.name}_{ingredient.state}.png', cell)
+            for chopping_board in items.get('chopping_board', []):
+                if chopping_board.state != ItemState.TAKEN:
+                    self._blit('chopping_board_empty.png', cell)
+            for plate in items.get('plate', []):
+                self._blit(f'plate_{plate.state}.png', cell)
+            for pot in items.get('pot', []):
+                self._blit(pot_image_file(pot.ingredient_count), cell)
+            if cell == return_counter:
+                self._blit('return_station_filled.png' if items.get('plate') else 'return_station_empty.png', cell)
+
+        for agent in world_state['agents']:
+            self._blit_player(*chef_sprite(agent.id, agent.holding), tuple(agent.location))
+
+        if episodes_left is not None:
+            counters = [world_state['total_score'], world_state['order_count'], episodes_left]
+            for tile, value in zip(COUNTERS, counters):
+                self._blit_text(value, tile)
+        return frame
+
+    def tile(self, file: str) -> np.ndarray:
+        """Decoded RGB array of an asset file"""
+        tile = self._tiles.get(file)
+        if tile is None:
+            import cv2
+            image = cv2.imread(os.path.join(self.assets_folder, file), cv2.IMREAD_COLOR)
+            if image is None:
+                raise FileNotFoundError(os.path.join(self.assets_folder, file))
+            tile = np.ascontiguousarray(image[:, :, ::-1])
+            self._tiles[file] = tile
+        return tile
+
+    def _blit(self, file: str, cell: Tuple[int,int]) -> None:
+        row, col = cell
+        self.frame[row*TILESIZE:(row+1)*TILESIZE, col*TILESIZE:(col+1)*TILESIZE] = self.tile(file)
+
+    def _blit_player(self, file: str, colour: Optional[Tuple[int,int,int]], cell: Tuple[int,int]) -> None:
+        # Chef sprites use BACKGROUND_BLUE as their colour key
+        mask = self._player_masks.get(file)
+        if mask is None:
+            mask = np.any(self.tile(file) != BACKGROUND_BLUE, axis=2)
+            self._player_masks[file] = mask
+        tile = self.tile(file)
+        if colour is not None:
+            tile = self._tiles.get((file, colour))
+            if tile is None:
+                tile = self._tiles[(file, colour)] = paint_hat(self.tile(file), colour)
+        row, col = cell
+        target = self.frame[row*TILESIZE:(row+1)*TILESIZE, col*TILESIZE:(col+1)*TILESIZE]
+        target[mask] = tile[mask]
+
+    def _blit_text(self, value: int, tile: Tuple[int,int]) -> None:
+        text = self._render_text(value)
+        if text is None:
+            return
+        height, width = text.shape[:2]
+        # Same placement as pg.Rect.center in SpriteScene.draw
+        left = (tile[1]+1)*TILESIZE + TILESIZE//2 - width//2
+        top = HEIGHT - TILESIZE//2 - height//2
+        self.frame[top:top+height, left:left+width] = text
+
+    def _render_text(self, value: int) -> Optional[np.ndarray]:
+        if value in self._text_cache:
+            return self._text_cache[value]
+        try:
+            import pygame as pg
+        except ImportError:
+            # Without pygame there is no font rasteriser: the counters are left out
+            self._text_cache[value] = None
+            return None
+        if self._font is None:
+            pg.font.init()
+            self._font = pg.font.Font('freesansbold.ttf', 20)
+        surface = self._font.render(str(value), True, GREEN, SCOREBOARD_BG)
+        text = np.ascontiguousarray(pg.surfarray.array3d(surface).transpose(1, 0, 2))
+        self._text_cache[value] = text
+        return text
+
+    def _render_background(self) -> np.ndarray:
+        background = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        background[:] = BGCOLOR
+        background[:, 0:WIDTH:TILESIZE] = LIGHTGREY
+        background[0:HEIGHT:TILESIZE, :] = LIGHTGREY
+
+        self.frame = background
+        brown = np.empty((TILESIZE, TILESIZE, 3), dtype=np.uint8)
+        brown[:] = BROWN
+        self._tiles['_brown'] = brown
+        scoreboard = np.empty((TILESIZE, TILESIZE, 3), dtype=np.uint8)
+        scoreboard[:] = SCOREBOARD_BG
+        self._tiles['_scoreboard'] = scoreboard
+
+        for coord in TABLE_TOPS:
+            self._blit('_brown', tuple(coord))
+        for ingredient, coords in INGREDIENTS_STATION.items():
+            for coord in coords:
+                self._blit(f'ingredient_station_{ingredient}.png', tuple(coord))
+        for coord in SERVING_STATION:
+            self._blit('serving_station.png', tuple(coord))
+        self._blit('scoreboard_score.png', SCOREBOARD_SCORE)
+        self._blit('scoreboard_orders.png', SCOREBOARD_ORDERS)
+        self._blit('scoreboard_timer.png', SCOREBOARD_TIMER)
+        for coord in SCOREBOARD:
+            self._blit('_scoreboard', tuple(coord))
+        return background
+
+def pot_image_file(ingredient_count: Optional[Dict[str, int]]) -> str:
+    """Asset of a pot holding `ingredient_count` (same naming as sprites.PotStation)"""
+    pot_ingredient_info = ''
+    for ingredient, count in sorted((ingredient_count or {}).items()):
+        if count > 0:
+            pot_ingredient_info += ingredient + str(count) + '_'
+    if pot_ingredient_info:
+        return f'pot_station_{pot_ingredient_info}.png'
+    return 'pot_station_empty.png'
+
+def player_image_file(player_id: str, holding=None) -> str:
+    """Asset of a chef and what it holds (same naming as sprites.Player)"""
+    if isinstance(holding, Ingredient):
+        return f'chef_{player_id}_holding_{holding.name}_{holding.state}.png'
+    if isinstance(holding, Plate):
+        return f'chef_{player_id}_holding_plate_{holding.state}.png'
+    return f'chef_{player_id}.png'
+
+def chef_colour(player_id: str) -> Tuple[int,int,int]:
+    """Hat colour of a chef without sprites of its own; hues step by the golden ratio, so consecutive ids differ"""
+    hue = (int(player_id) * 0.618033988749895) % 1
+    return tuple(int(round(255*channel)) for channel in colorsys.hsv_to_rgb(hue, 0.75, 0.85))
+
+def chef_sprite(player_id: str, holding=None) -> Tuple[str, Optional[Tuple[int,int,int]]]:
+    """Asset of a chef and what it holds, and the colour to paint its hat in (None: drawn as is)"""
+    if int(player_id) <= CHEF_SPRITES:
+        return player_image_file(player_id, holding), None
+    return player_image_file('1', holding), chef_colour(player_id)
+
+def paint_hat(image: np.ndarray, colour: Tuple[int,int,int]) -> np.ndarray:
+    """Copy of a chef 1 RGB image (channels last) with the hat painted in `colour`"""
+    painted = image.copy()
+    painted[np.all(image == CHEF_HAT, axis=2)] = colour
+    return painted
@@ -0,0 +1,156 @@
+"""
+Goal Table
+----------
+Integer-encoded goal space.
+
+Every goal id (see RECIPES_ACTION_MAPPING) has a count of outstanding tasks and a
+FIFO queue of task entries, eg. the ingredient and state a PICK/CHOP/COOK is for or
+the dish a SERVE is for. Both live in NumPy arrays: counts are one int per goal and
+each queue is a ring buffer of (ingredient_id, state_id, recipe_id) rows, so enqueue
+and dequeue are O(1), a deepcopy (eg. the historical world_state for inference) is a
+few array copies, and `key()` is a hashable snapshot for caching.
+"""
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from overcooked_item_classes import ItemState
+
+NO_ENTRY = -1
+
+class GoalEntry(NamedTuple):
+    """Task at the front of a goal's queue (what world_state['goal_space'][goal][0] used to hold)"""
+    state: ItemState
+    ingredient: Optional[str] = None
+    recipe: Optional[str] = None
+
+class GoalTable:
+    def __init__(
+        self,
+        goal_ids: Iterable[int],
+        ingredients: Iterable[str],
+        recipes: Iterable[str],
+        capacity: int=8
+    ) -> None:
+        """
+        Parameters
+        ----------
+        goal_ids: Iterable[int]
+            Goal ids in the order goals are iterated (and so tie-broken) by the planners
+        ingredients: Iterable[str]
+            Ingredient names entries can refer to
+        recipes: Iterable[str]
+            Recipe (dish) names entries can refer to
+        capacity: int
+            Initial queue length per goal; queues double when full
+        """
+        self.goal_ids = tuple(dict.fromkeys(goal_ids))
+        self.ingredients = tuple(ingredients)
+        self.recipes = tuple(recipes)
+        self._ingredient_ids = {name: idx for idx, name in enumerate(self.ingredients)}
+        self._recipe_ids = {name: idx for idx, name in enumerate(self.recipes)}
+
+        size = max(self.goal_ids) + 1 if self.goal_ids else 0
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.entries = np.full((size, capacity, 3), NO_ENTRY, dtype=np.int16)
+        self.heads = np.zeros(size, dtype=np.int64)
+        self.lengths = np.zeros(size, dtype=np.int64)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.goal_ids)
+
+    def __contains__(self, goal: int) -> bool:
+        return goal in self.goal_ids
+
+    def __repr__(self) -> str:
+        return repr({goal: [tuple(entry) for entry in self.queue(goal)] for goal in self.goal_ids})
+
+    def __deepcopy__(self, memo) -> 'GoalTable':
+        # Name tables are immutable and shared; only the arrays are copied
+        table = GoalTable.__new__(GoalTable)
+        memo[id(self)] = table
+        table.__dict__.update(self.__dict__)
+        table.counts = self.counts.copy()
+        table.entries = self.entries.copy()
+        table.heads = self.heads.copy()
+        table.lengths = self.lengths.copy()
+        return table
+
+    def count(self, goal: int) -> int:
+        return int(self.counts[goal])
+
+    def total_count(self) -> int:
+        return int(self.counts.sum())
+
+    def queue_length(self, goal: int) -> int:
+        return int(self.lengths[goal])
+
+    def enqueue(
+        self,
+        goal: int,
+        state: ItemState,
+        ingredient: Optional[str]=None,
+        recipe: Optional[str]=None
+    ) -> None:
+        """Add a task entry to the back of a goal's queue"""
+        length = self.lengths[goal]
+        capacity = self.entries.shape[1]
+        if length == capacity:
+            self._grow()
+            capacity = self.entries.shape[1]
+        slot = (self.heads[goal] + length) % capacity
+        self.entries[goal, slot] = (
+            NO_ENTRY if ingredient is None else self._ingredient_ids[ingredient],
+            state,
+            NO_ENTRY if recipe is None else self._recipe_ids[recipe]
+        )
+        self.lengths[goal] = length + 1
+
+    def dequeue(self, goal: int) -> GoalEntry:
+        """Remove and return the entry at the front of a goal's queue; IndexError if it is empty"""
+        entry = self.peek(goal)
+        self.heads[goal] = (self.heads[goal] + 1) % self.entries.shape[1]
+        self.lengths[goal] -= 1
+        return entry
+
+    def peek(self, goal: int) -> GoalEntry:
+        """Entry at the front of a goal's queue; IndexError if it is empty"""
+        if self.lengths[goal] == 0:
+            raise IndexError(f'goal {goal} has no queued tasks')
+        return self._decode(self.entries[goal, self.heads[goal]])
+
+    def queue(self, goal: int) -> Tuple[GoalEntry, ...]:
+        """All entries of a goal, front first"""
+        capacity = self.entries.shape[1]
+        slots = (self.heads[goal] + np.arange(self.lengths[goal])) % capacity
+        return tuple(self._decode(row) for row in self.entries[goal, slots])
+
+    def key(self) -> bytes:
+        """Hashable snapshot of the counts and queued entries (independent of ring-buffer layout)"""
+        capacity = self.entries.shape[1]
+        rows = []
+        for goal in self.goal_ids:
+            slots = (self.heads[goal] + np.arange(self.lengths[goal])) % capacity
+            rows.append(self.entries[goal, slots].tobytes())
+        return self.counts.tobytes() + self.lengths.tobytes() + b''.join(rows)
+
+    def _decode(self, row: np.ndarray) -> GoalEntry:
+        ingredient_id, state_id, recipe_id = (int(value) for value in row)
+        return GoalEntry(
+            ItemState(state_id),
+            None if ingredient_id == NO_ENTRY else self.ingredients[ingredient_id],
+            None if recipe_id == NO_ENTRY else self.recipes[recipe_id]
+        )
+
+    def _grow(self) -> None:
+        # Unroll every ring buffer to the front of a table twice the size
+        size, capacity, width = self.entries.shape
+        entries = np.full((size, 2*capacity, width), NO_ENTRY, dtype=self.entries.dtype)
+        slots = (self.heads[:, None] + np.arange(capacity)[None, :]) % capacity
+        entries[:, :capacity] = np.take_along_axis(self.entries, slots[:, :, None], axis=1)
+        self.entries = entries
+        self.heads[:] = 0
@@ -2,11 +2,23 @@ from typing import List
 from typing import Union
 
 import os
-import cv2
 import glob
+import itertools
 from human_agent import HumanAgent
 from overcooked_agent import OvercookedAgent
 
+# Teams up to this size are named agent by agent, larger ones by the number of agents of each kind
+NAMED_AGENTS = 4
+
+def agents_label(labels: List[str], separator: str='_') -> str:
+    """
+    Part of a file name that describes a team, from the label of every agent, eg.
+    ['ToM', 'Dummy'] -> 'ToM_Dummy', or 'ToMx8_Dummyx24' for 32 agents
+    """
+    if len(labels) > NAMED_AGENTS:
+        labels = [f'{label}x{len(list(run))}' for label, run in itertools.groupby(labels)]
+    return separator.join(labels)
+
 def check_dir_exist(dir_path: str) -> None:
     if not os.path.isdir(dir_path):
         os.mkdir(dir_path)
@@ -34,7 +46,7 @@ def get_video_name_ext(agents: Union[OvercookedAgent,HumanAgent], episodes: int,
                 video_name_ext.append('Dummy')
         elif isinstance(agent, HumanAgent):
             video_name_ext.append('Human')
-    video_name_ext = '_'.join(video_name_ext) + '_' + str(episodes) + 'ep'
+    video_name_ext = agents_label(video_name_ext) + '_' + str(episodes) + 'ep'
     video_type_count = get_video_count(video_name_ext, map_no)
     return video_name_ext + '_' + map_no + '_' + video_type_count
 
@@ -43,6 +55,7 @@ def make_video_from_rgb_imgs(rgb_arrs, vid_path, video_name='trajectory',
     """
     Create a video from a list of rgb arrays
     """
+    import cv2
     # print("Rendering video...")
     if vid_path[-1] != '/':
         vid_path += '/'
@@ -72,6 +85,7 @@ def make_video_from_image_dir(vid_path, img_folder, video_name='trajectory', fps
     """
     Create a video from a directory of images
     """
+    import cv2
     images = [img for img in os.listdir(img_folder) if img.endswith(".png")]
     images.sort(key=lambda f: int(''.join(filter(str.isdigit, f))))
 
@@ -1,22 +1,29 @@
-from typing import Any
-from typing import Dict
-from typing import List
-from typing import Tuple
+from typing import Optional
 
 import click
 import copy
+import os
 import sys
-import random
-import pandas as pd
 import pygame as pg
 from datetime import datetime
 
+from action_handlers import as_action
+from experiment_log import ExperimentLog
 from map_env import MapEnv
 from overcooked_env import OvercookedEnv
+from overcooked_item_classes import ItemState
+from results_store import ResultsStore
+from scene import SpriteScene
+from sprites import preload_assets
 from sprites import *
 from settings import *
 
 import helpers
+import tracing
+from video_recorder import AsyncVideoRecorder
+
+log = tracing.get_logger('game')
+trace_log = tracing.get_logger('trace')
 
 class Game:
     def __init__(
@@ -24,15 +31,18 @@ class Game:
         num_ai_agents: int=1,
         is_simulation: bool=False,
         simulation_episodes: int=500,
-        experiment_id: str='1'
+        experiment_id: str='1',
+        seed: Optional[int]=None
     ) -> None:
         pg.init()
         self.screen = pg.display.set_mode((WIDTH, HEIGHT))
+        preload_assets()
         pg.display.set_caption(TITLE)
         self.clock = pg.time.Clock()
         pg.key.set_repeat(500, 100)
         self.is_simulation = is_simulation
         self.experiment_id = experiment_id
+        self.recorder = None
 
         AI_AGENTS_TO_INITIALIZE = {}
         for idx in range(1, num_ai_agents+1):
@@ -43,31 +53,33 @@ class Game:
         game_folder = os.path.dirname(__file__)
         self.experiment_folder = os.path.join(game_folder, experiment_id)
         helpers.check_dir_exist(self.experiment_folder)
-        self.images_folder = os.path.join(self.experiment_folder, 'images')
-        helpers.check_dir_exist(self.images_folder)
 
         if is_simulation:
             self.env = OvercookedEnv(
                 ai_agents=AI_AGENTS_TO_INITIALIZE,
-                queue_episodes=QUEUE_EPISODES
+                queue_episodes=QUEUE_EPISODES,
+                seed=seed
             )
-            self.load_data()
 
             self.run_simulation(simulation_episodes)
         else:
             self.env = OvercookedEnv(
                 human_agents=HUMAN_AGENTS,
                 ai_agents=AI_AGENTS_TO_INITIALIZE,
-                queue_episodes=QUEUE_EPISODES
+                queue_episodes=QUEUE_EPISODES,
+                seed=seed
             )
+            video_name_ext = helpers.get_video_name_ext(self.env.world_state['agents'], TERMINATING_EPISODE, MAP)
+            self.recorder = AsyncVideoRecorder(self.experiment_folder, video_name_ext)
             self.player_1_input = None
             self.player_2_input = None
-            self.load_data()
 
-            self.info_df = pd.DataFrame(
+            self.experiment_log = ExperimentLog(
                 columns=[
-                    'episode', 'player1_coords', 'player2_coords', 'player1_action', 'player2_action', 'available_orders', 'score', 'total_score'
-                ]
+                    'episode', 'player1_coords', 'player2_coords', 'player1_action', 'player2_action', 'available_orders', 'score', 'total_score', 'timer'
+                ],
+                path=self.experiment_folder + '/experiments_' + self.env.results_filename + '.csv',
+                chunk_size=50
             )
         self.results_filename = self.experiment_folder + '/' + self.env.results_filename + '.csv'
         self.results = defaultdict(int)
@@ -77,159 +89,19 @@ class Game:
                 self.results[str(i)] = 0
                 self.results_col.append(str(i))
 
-    def _deep_copy(self, obj):
-        return copy.deepcopy(obj)
-
-    def load_data(self):
-        episode = self.env.world_state
-
-        self.PLAYERS, self.PLATES, self.POTS = {}, {}, {}
-        self.INGREDIENTS = []
-        self.TABLE_TOPS = self._deep_copy(TABLE_TOPS)
-        
-        RETURN_STATION_OCCUPIED = False
-        self.RETURN_STATION = {
-            'state': 'empty',
-            'coords': episode['return_counter']
-        }
-
-        for agent in episode['agents']:
-            self.PLAYERS[agent.id] = {
-                'holding': agent.holding,
-                'coords': agent.location
-            }
-        for plate in episode['plate']:
-            if plate.location in self.TABLE_TOPS:
-                self.TABLE_TOPS.remove(plate.location)
-            if plate.location == episode['return_counter']:
-                RETURN_STATION_OCCUPIED = True
-            self.PLATES[plate.plate_id] = {
-                'state': plate.state,
-                'coords': plate.location
-            }
-        for pot in episode['pot']:
-            if pot.ingredient_count:
-                pot_ingredient_count = pot.ingredient_count
-            else:
-                pot_ingredient_count = defaultdict(int)
-            self.POTS[pot.pot_id] = {
-                'ingredient_count': pot_ingredient_count,
-                'coords': pot.location
-            }
-
-        for ingredient in episode['ingredients']:
-            if ingredient.location in self.TABLE_TOPS:
-                self.TABLE_TOPS.remove(ingredient.location)
-            self.INGREDIENTS.append([
-                ingredient.name,
-                ingredient.state,
-                ingredient.location
-            ])
-        
-        if RETURN_STATION_OCCUPIED:
-            self.RETURN_STATION = {
-                'state': 'filled',
-                'coords': episode['return_counter']
-            }
-        self.CHOPPING_BOARDS = [chopping_board.location for chopping_board in episode['chopping_board'] if chopping_board.state != 'taken']
-        self.INGREDIENTS_STATION = INGREDIENTS_STATION
-        self.SERVING_STATION = SERVING_STATION
-        self.WALLS = WALLS
-
-    def new(
-        self,
-        players: Dict[int, Tuple[int,int]],
-        table_tops: List[Tuple[int,int]],
-        ingredients,
-        chopping_boards: List[Tuple[int,int]],
-        plates: Dict[int, List[Any]],
-        pots: Dict[int, List[Any]],
-        ingredient_stations: Dict[str, Tuple[int,int]],
-        serving_stations: List[Tuple[int,int]],
-        return_station: List[Tuple[int,int]],
-        walls: List[Tuple[int,int]]=WALLS,
-        score: Tuple[int,int]=SCOREBOARD_SCORE,
-        orders: Tuple[int,int]=SCOREBOARD_ORDERS,
-        timer: Tuple[int,int]=SCOREBOARD_TIMER,
-        scoreboard: List[Tuple[int,int]]=SCOREBOARD
-    ) -> None:
+    def new(self) -> None:
         # initialize all variables and do all the setup for a new game
-        self.all_sprites = pg.sprite.Group()
-        self.table_tops = pg.sprite.Group()
-        self.ingredients = pg.sprite.Group()
-        self.chopping_boards = pg.sprite.Group()
-        self.plates = pg.sprite.Group()
-        self.pot_stations = pg.sprite.Group()
-        self.ingredient_stations = pg.sprite.Group()
-        self.serving_stations = pg.sprite.Group()
-        self.return_station = pg.sprite.Group()
-        self.score = pg.sprite.Group()
-        self.orders = pg.sprite.Group()
-        self.timer = pg.sprite.Group()
-        self.scoreboard = pg.sprite.Group()
-        self.walls = walls
-        self.player_count = len(players)
-
-        for idx in range(1, self.player_count+1):
-            idx = str(idx)
-            if idx == '1':
-                self.player_1 = Player(self, idx, players[idx]['coords'][1], players[idx]['coords'][0], players[idx]['holding'])
-            elif idx == '2':
-                self.player_2 = Player(self, idx, players[idx]['coords'][1], players[idx]['coords'][0], players[idx]['holding'])
-            elif idx == '3':
-                self.player_3 = Player(self, idx, players[idx]['coords'][1], players[idx]['coords'][0], players[idx]['holding'])
-            elif idx == '4':
-                self.player_4 = Player(self, idx, players[idx]['coords'][1], players[idx]['coords'][0], players[idx]['holding'])
-        for table_top_coord in table_tops:
-            TableTop(self, table_top_coord[1], table_top_coord[0])
-        for ingredient in ingredients:
-            ingredient_name = ingredient[0]
-            ingredient_state = ingredient[1]
-            ingredient_coords = ingredient[2]
-            Ingredients(self, ingredient_name, ingredient_state, ingredient_coords[1], ingredient_coords[0])
-        for chopping_board_coord in chopping_boards:
-            ChoppingBoardStation(self, chopping_board_coord[1], chopping_board_coord[0])
-        for key, val in plates.items():
-            plate_state = val['state']
-            plate_coord = val['coords']
-            PlateStation(self, plate_state, plate_coord[1], plate_coord[0])
-        for key, val in pots.items():
-            pot_ingredient_count = val['ingredient_count']
-            pot_coord = val['coords']
-            PotStation(self, pot_ingredient_count, pot_coord[1], pot_coord[0])
-        for key, val in ingredient_stations.items():
-            ingredient = key
-            ingredient_station_coord = val
-            for coords in ingredient_station_coord:
-                IngredientStation(self, ingredient, coords[1], coords[0])
-        for serving_station_coord in serving_stations:
-            ServingStation(self, serving_station_coord[1], serving_station_coord[0])
-            
-        ReturnStation(self, return_station['state'], return_station['coords'][1], return_station['coords'][0])
-        Score(self, score[1], score[0])
-        Orders(self, orders[1], orders[0])
-        Timer(self, timer[1], timer[0])
-        for scoreboard_coord in scoreboard:
-            ScoreBoard(self, scoreboard_coord[1], scoreboard_coord[0])
+        self.WALLS = WALLS
+        self.walls = WALLS
+        self.scene = SpriteScene(self, self.env.world_state)
+        self.player_count = len(self.env.world_state['agents'])
 
     def save_results(self):
-        try:
-            results_df = pd.read_csv(self.results_filename)
-            new_row = pd.DataFrame([self.results], columns=self.results.keys())
-            results_df = pd.concat([results_df, new_row], axis=0).reset_index()
-        except FileNotFoundError:
-            results_df = pd.DataFrame([self.results], columns=self.results.keys())
-        results_df = results_df[self.results_col]
-        results_df.to_csv(self.results_filename, index=False)
+        ResultsStore(self.results_filename, self.results_col).append(self.results)
 
         if not self.is_simulation:
-            self.info_df.to_csv(self.experiment_folder + '/experiments_' + self.env.results_filename + '.csv', index=False)
-            video_name_ext = helpers.get_video_name_ext(self.env.world_state['agents'], TERMINATING_EPISODE, MAP)
-            helpers.make_video_from_image_dir(
-                self.experiment_folder,
-                self.images_folder,
-                video_name_ext
-            )
+            self.experiment_log.close()
+            self.recorder.close()
 
     def run(self):
         # game loop - set self.playing = False to end the game
@@ -248,6 +120,9 @@ class Game:
             self.draw()
 
     def quit(self):
+        # Flush frames still queued for the encoder
+        if self.recorder is not None:
+            self.recorder.close()
         pg.quit()
         sys.exit()
 
@@ -255,44 +130,15 @@ class Game:
         # update portion of the game loop
         self.all_sprites.update()
 
-    def draw_grid(self):
-        for x in range(0, WIDTH, TILESIZE):
-            pg.draw.line(self.screen, LIGHTGREY, (x, 0), (x, HEIGHT))
-        for y in range(0, HEIGHT, TILESIZE):
-            pg.draw.line(self.screen, LIGHTGREY, (0, y), (WIDTH, y))
-
     def draw(self):
-        self.screen.fill(BGCOLOR)
-        self.draw_grid()
-        self.all_sprites.draw(self.screen)
-
-        # Score Display (On top of sprites)
-        font = pg.font.Font('freesansbold.ttf', 20)
-        current_score = self.env.world_state['total_score']
-        current_order = self.env.world_state['order_count']
-        episodes_left = TERMINATING_EPISODE - self.env.episode
-        score = font.render(str(current_score), True, GREEN, SCOREBOARD_BG)
-        order = font.render(str(current_order), True, GREEN, SCOREBOARD_BG)
-        ep_countdown = font.render(str(episodes_left), True, GREEN, SCOREBOARD_BG)
-        scoreRect = score.get_rect()
-        orderRect = order.get_rect()
-        countdownRect = ep_countdown.get_rect()
-        scoreRect.center = (
-            (SCOREBOARD_SCORE[1]+1)*TILESIZE+TILESIZE//2,
-            HEIGHT-TILESIZE//2
-        )
-        orderRect.center = (
-            (SCOREBOARD_ORDERS[1]+1)*TILESIZE+TILESIZE//2,
-            HEIGHT-TILESIZE//2    
-        )
-        countdownRect.center = (
-            (SCOREBOARD_TIMER[1]+1)*TILESIZE+TILESIZE//2,
-            HEIGHT-TILESIZE//2    
+        dirty_rects = self.scene.draw(
+            self.screen,
+            self.env.world_state['total_score'],
+            self.env.world_state['order_count'],
+            TERMINATING_EPISODE - self.env.episode
         )
-        self.screen.blit(score, scoreRect)
-        self.screen.blit(order, orderRect)
-        self.screen.blit(ep_countdown, countdownRect)
-        pg.display.flip()
+        if dirty_rects:
+            pg.display.update(dirty_rects)
 
     def events(self):    
         # catch all events here
@@ -300,12 +146,14 @@ class Game:
             if event.type == pg.QUIT:
                 self.quit()
             if event.type == pg.KEYUP:
-                print(f'\nStart of episode {self.env.episode}')
+                if tracing.enabled:
+                    log.debug('Start of episode %s', self.env.episode)
                 goal_space = self.env.world_state['goal_space']
-                goal_info = self.env.world_state['goal_space_count']
-                print(f'Current goal space: \n{goal_space}\n')
-                print(f'Current goal info: \n{goal_info}\n')
-                print([agent.holding for agent in self.env.world_state['agents']])
+                goal_info = self.env.world_state['goal_space'].counts
+                if tracing.enabled:
+                    log.debug('Current goal space: %s', goal_space)
+                    log.debug('Current goal info: %s', goal_info)
+                    log.debug('Agent holdings: %s', [agent.holding for agent in self.env.world_state['agents']])
 
                 if event.key in [
                     pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN,
@@ -321,9 +169,8 @@ class Game:
                 ]:
                     self.player_1_input = event.key
                 
-                print('inputs...')
-                print(self.player_1_input)
-                print(self.player_2_input)
+                if tracing.enabled:
+                    log.debug('Player inputs: %s %s', self.player_1_input, self.player_2_input)
                 if self.player_1_input and self.player_2_input:
                     cur_player_1_input = self.player_1_input
                     cur_player_2_input = self.player_2_input
@@ -349,8 +196,8 @@ class Game:
                                 best_goals[player_object] = [goal_id, {'steps': action_task, 'rewards': reward_mapping}]
 
 
-                    print('best goals')
-                    print(best_goals)
+                    if tracing.enabled:
+                        log.debug('best goals: %s', best_goals)
                     # Only works for 2 agents
                     both_same = False
                     both_goals = [info[0] for agent, info in best_goals.items()]
@@ -358,25 +205,23 @@ class Game:
                         both_same = True
                     if both_same:
                         # chosen agent to not perform
-                        chosen_agent_id = random.randint(1,2)
+                        chosen_agent_id = self.env.rng.integers(1, 3)
                         chosen_agent = [agent for agent, info in best_goals.items() if int(agent.id) == chosen_agent_id][0]
                         best_goals[chosen_agent] = [-1, {'steps': [8], 'rewards': -2}]
 
                     self.rollout(best_goals, self.env.episode)
-                    self.load_data()
                     self.update()
                     self.draw()
 
-                    self.new(
-                        self.PLAYERS, self.TABLE_TOPS, self.INGREDIENTS, self.CHOPPING_BOARDS, self.PLATES, self.POTS,
-                        self.INGREDIENTS_STATION, self.SERVING_STATION, self.RETURN_STATION
-                    )
+                    self.scene.sync(self.env.touched_cells)
 
                     if event.key == pg.K_ESCAPE:
                         self.quit()
-                    print(f'Just completed episode {self.env.episode}')
-                    print([agent.location for agent in self.env.world_state['agents']])
-                    print([agent.holding for agent in self.env.world_state['agents']])
+                    if tracing.enabled:
+                        log.debug('Just completed episode %s', self.env.episode)
+                        log.debug('Agent locations: %s', [agent.location for agent in self.env.world_state['agents']])
+                        log.debug('Agent holdings: %s', [agent.holding for agent in self.env.world_state['agents']])
+                        trace_log.log(tracing.TRACE, 'World state after episode %s: %s', self.env.episode, dict(self.env.world_state))
                     self.env.update_episode()
                     # pg.image.save(self.screen, f'episodes/episode_{self.env.episode}.png')
 
@@ -419,7 +264,7 @@ class Game:
 
         player_pos = self._get_pos(player_id)
         if action in movement_keys:
-            print(f'Its a movement!')
+            log.debug('Its a movement!')
             action_type = 'movement'
             action_task = None
             temp_player_pos = [sum(x) for x in zip(list(player_pos), action_coords_mapping[action])]
@@ -517,66 +362,45 @@ class Game:
         return RECIPES_ACTION_MAPPING[recipe]['general'][action]
 
     def _check_pick_validity(self, player_id):
-        print('agent@_check_pick_validity')
+        log.debug('agent@_check_pick_validity')
         pick_validity = False
         player_pos = self._get_pos(player_id)
-        all_valid_pick_items = []
-        all_valid_pick_items_pos = []
+        registry = self.env.world_state['item_registry']
+        all_ingredient_station_pos = []
         action_task = []
         goal_id = None
 
-        # Plates, ingredients
-        for plate in self.env.world_state['plate']:
-            all_valid_pick_items.append(plate)
-            all_valid_pick_items_pos.append(plate.location)
-        for ingredient in self.env.world_state['ingredients']:
-            all_valid_pick_items.append(ingredient)
-            all_valid_pick_items_pos.append(ingredient.location)
         for ingredient in INGREDIENTS_STATION:
             for ingredient_coords in INGREDIENTS_STATION[ingredient]:
-                all_valid_pick_items_pos.append(ingredient_coords)
+                all_ingredient_station_pos.append(ingredient_coords)
 
         surrounding_cells_xy = [[-1,0], [0,1], [1,0], [0,-1]]
         for surrounding_cell_xy in surrounding_cells_xy:
             surrounding_cell = [sum(x) for x in zip(list(player_pos), surrounding_cell_xy)]
             surrounding_cell = tuple(surrounding_cell)
-            if surrounding_cell in all_valid_pick_items_pos:
-                item = [item for item in all_valid_pick_items if item.location == surrounding_cell]
-                if item:
-                    item = item[0]
-                    if isinstance(item, Plate):
-                        action_task.append([
-                            'PICK',
-                            {
-                               'is_new': False,
-                                'is_last': True,
-                                'pick_type': 'plate',
-                                'task_coord': surrounding_cell 
-                            },
-                            player_pos
-                        ])
-                        ingredient_name = self._get_ingredient(surrounding_cell)
-                        goal_id = self._get_goal_id(ingredient_name, 'PICK')
-                    else:
-                        action_task.append([
-                            'PICK',
-                            {
-                                'is_new': False,
-                                'is_last': False,
-                                'pick_type': 'ingredient',
-                                'task_coord': surrounding_cell
-                            },
-                            player_pos
-                        ])
-                        ingredient_name = self._get_ingredient(surrounding_cell)
-                        goal_id = self._get_goal_id(ingredient_name, 'PICK')
-                else:
-                    # new item from ingredient station
+            # Plates, ingredients
+            item = registry.at(surrounding_cell, 'plate') + registry.at(surrounding_cell, 'ingredients')
+            if item:
+                item = item[0]
+                if isinstance(item, Plate):
                     action_task.append([
                         'PICK',
                         {
-                            'is_new': True,
+                           'is_new': False,
                             'is_last': True,
+                            'pick_type': 'plate',
+                            'task_coord': surrounding_cell 
+                        },
+                        player_pos
+                    ])
+                    ingredient_name = self._get_ingredient(surrounding_cell)
+                    goal_id = self._get_goal_id(ingredient_name, 'PICK')
+                else:
+                    action_task.append([
+                        'PICK',
+                        {
+                            'is_new': False,
+                            'is_last': False,
                             'pick_type': 'ingredient',
                             'task_coord': surrounding_cell
                         },
@@ -584,6 +408,20 @@ class Game:
                     ])
                     ingredient_name = self._get_ingredient(surrounding_cell)
                     goal_id = self._get_goal_id(ingredient_name, 'PICK')
+            elif surrounding_cell in all_ingredient_station_pos:
+                # new item from ingredient station
+                action_task.append([
+                    'PICK',
+                    {
+                        'is_new': True,
+                        'is_last': True,
+                        'pick_type': 'ingredient',
+                        'task_coord': surrounding_cell
+                    },
+                    player_pos
+                ])
+                ingredient_name = self._get_ingredient(surrounding_cell)
+                goal_id = self._get_goal_id(ingredient_name, 'PICK')
         # Have to drop before picking again
         player_object = [agent for agent in self.env.world_state['agents'] if agent.id == str(player_id)][0]
         if player_object.holding:
@@ -595,7 +433,7 @@ class Game:
         return pick_validity, action_task, goal_id
 
     def _check_chop_validity(self, player_id):
-        print('agent@_check_chop_validity')
+        log.debug('agent@_check_chop_validity')
         chop_validity = False
         player_pos = self._get_pos(player_id)
         action_task = []
@@ -607,17 +445,17 @@ class Game:
             chop_validity = False
         elif not isinstance(player_object.holding, Ingredient):
             chop_validity = False
-        elif player_object.holding.state != 'unchopped':
+        elif player_object.holding.state != ItemState.UNCHOPPED:
             chop_validity = False
         else:
             # Ensure chopping board is not occupied
-            all_valid_chopping_boards_pos = [cb.location for cb in self.env.world_state['chopping_board'] if cb.state != 'taken']
+            registry = self.env.world_state['item_registry']
 
             surrounding_cells_xy = [[-1,0], [0,1], [1,0], [0,-1]]
             for surrounding_cell_xy in surrounding_cells_xy:
                 surrounding_cell = [sum(x) for x in zip(list(player_pos), surrounding_cell_xy)]
                 surrounding_cell = tuple(surrounding_cell)
-                if surrounding_cell in all_valid_chopping_boards_pos:
+                if any(cb.state != ItemState.TAKEN for cb in registry.at(surrounding_cell, 'chopping_board')):
                     action_task.append(
                         ['CHOP', True, surrounding_cell, player_pos]
                     )
@@ -629,7 +467,7 @@ class Game:
         return chop_validity, action_task, goal_id
 
     def _check_cook_validity(self, player_id):
-        print(f'human@_check_cook_validity')
+        log.debug('human@_check_cook_validity')
         cook_validity = False
         player_pos = self._get_pos(player_id)
         action_task = []
@@ -641,19 +479,19 @@ class Game:
             cook_validity = False
         elif not isinstance(player_object.holding, Ingredient):
             cook_validity = False
-        elif player_object.holding.state != 'chopped':
+        elif player_object.holding.state != ItemState.CHOPPED:
             cook_validity = False
         else:
             # Ensure pot is not full / pot ingredient is same as ingredient in hand
-            all_valid_pots = [pot for pot in self.env.world_state['pot']]
-            all_valid_pots_pos = [pot.location for pot in self.env.world_state['pot']]
+            registry = self.env.world_state['item_registry']
 
             surrounding_cells_xy = [[-1,0], [0,1], [1,0], [0,-1]]
             for surrounding_cell_xy in surrounding_cells_xy:
                 surrounding_cell = [sum(x) for x in zip(list(player_pos), surrounding_cell_xy)]
                 surrounding_cell = tuple(surrounding_cell)
-                if surrounding_cell in all_valid_pots_pos:
-                    pot = [pot for pot in all_valid_pots if pot.location == surrounding_cell][0]
+                pots = registry.at(surrounding_cell, 'pot')
+                if pots:
+                    pot = pots[0]
                     ingredient_name = player_object.holding.name
                     recipe_ingredient_count = self._get_recipe_ingredient_count(ingredient_name) #assumes no recipe with same ingredient in map
                     # CASE: No ingredient pot yet
@@ -674,7 +512,7 @@ class Game:
         return cook_validity, action_task, goal_id
     
     def _check_scoop_validity(self, player_id):
-        print('human@_check_scoop_validity')
+        log.debug('human@_check_scoop_validity')
         scoop_validity = False
         player_pos = self._get_pos(player_id)
         action_task = []
@@ -686,18 +524,18 @@ class Game:
             scoop_validity = False
         elif not isinstance(player_object.holding, Plate):
             scoop_validity = False
-        elif player_object.holding.state != 'empty':
+        elif player_object.holding.state != ItemState.EMPTY:
             scoop_validity = False
         else:
-            all_valid_pots = [pot for pot in self.env.world_state['pot']]
-            all_valid_pots_pos = [pot.location for pot in self.env.world_state['pot']]
+            registry = self.env.world_state['item_registry']
 
             surrounding_cells_xy = [[-1,0], [0,1], [1,0], [0,-1]]
             for surrounding_cell_xy in surrounding_cells_xy:
                 surrounding_cell = [sum(x) for x in zip(list(player_pos), surrounding_cell_xy)]
                 surrounding_cell = tuple(surrounding_cell)
-                if surrounding_cell in all_valid_pots_pos:
-                    pot = [pot for pot in all_valid_pots if pot.location == surrounding_cell][0]
+                pots = registry.at(surrounding_cell, 'pot')
+                if pots:
+                    pot = pots[0]
                     # Ensure pot is full
                     if pot.dish:
                         action_task.append([
@@ -725,7 +563,7 @@ class Game:
             serve_validity = False
         elif not isinstance(player_object.holding, Plate):
             serve_validity = False
-        elif player_object.holding.state != 'plated':
+        elif player_object.holding.state != ItemState.PLATED:
             serve_validity = False
         else:
             valid_serving_cells = SERVING_STATION
@@ -787,10 +625,10 @@ class Game:
         
         return drop_validity, action_task, goal_id
     
-    def update_experiment_results(self, info_df):
+    def update_experiment_results(self):
         agent_1_info = [(agent.location, agent.last_action) for agent in self.env.world_state['agents'] if agent.id == '1'][0]
         agent_2_info = [(agent.location, agent.last_action) for agent in self.env.world_state['agents'] if agent.id == '2'][0]
-        temp_info_df = info_df.append({
+        self.experiment_log.append({
             'episode': self.env.episode,
             'player1_coords': agent_1_info[0],
             'player2_coords': agent_2_info[0],
@@ -800,8 +638,7 @@ class Game:
             'score': self.env.world_state['score'],
             'timer': TERMINATING_EPISODE - self.env.episode,
             'total_score': self.env.world_state['total_score']
-        }, ignore_index=True)
-        return temp_info_df
+        })
 
     def rollout(self, best_goals, horizon=50, save_path=None):
         """
@@ -819,103 +656,91 @@ class Game:
         
         action_mapping = {}
         for agent in best_goals:
-            action_mapping[agent] = (
-                best_goals[agent][0],
-                best_goals[agent][1]['steps'][0]
-            )
-            if type(best_goals[agent][1]['steps'][0]) == int:
-                agent.last_action = str(best_goals[agent][1]['steps'][0])
-            else:
-                agent.last_action = best_goals[agent][1]['steps'][0][0]
+            # Keyboard input is built in the older list format
+            action = as_action(best_goals[agent][1]['steps'][0])
+            action_mapping[agent] = (best_goals[agent][0], action)
+            agent.last_action = str(action.opcode) if action.is_move else action.name
         for agent in action_mapping:
             self.env.world_state['historical_actions'][agent.id] = [action_mapping[agent][1]]
 
-        print(action_mapping)
-        print('@rollout - Starting step function')
+        if tracing.enabled:
+            log.debug('action_mapping: %s', action_mapping)
+            log.debug('@rollout - Starting step function')
         self.env.step(action_mapping)
 
         explicit_chop_rewards = self.env.world_state['explicit_rewards']['chop']
         explicit_cook_rewards = self.env.world_state['explicit_rewards']['cook']
         explicit_serve_rewards = self.env.world_state['explicit_rewards']['serve']
-        print(f'Current EXPLICIT chop rewards: {explicit_chop_rewards}')
-        print(f'Current EXPLICIT cook rewards: {explicit_cook_rewards}')
-        print(f'Current EXPLICIT serve rewards: {explicit_serve_rewards}')
+        if tracing.enabled:
+            log.debug('Current EXPLICIT chop rewards: %s', explicit_chop_rewards)
+            log.debug('Current EXPLICIT cook rewards: %s', explicit_cook_rewards)
+            log.debug('Current EXPLICIT serve rewards: %s', explicit_serve_rewards)
 
         if not self.is_simulation:
-            self.info_df = self.update_experiment_results(self.info_df)
-            pg.image.save(self.screen, self.images_folder+f'/episode_{self.env.episode}.png')
+            self.update_experiment_results()
+            self.recorder.capture(self.screen)
 
     def run_simulation(self, episodes:int=500):
         game_folder = os.path.dirname(__file__)
-        simulations_folder = os.path.join(game_folder, 'simulations')
         video_folder = os.path.join(game_folder, 'videos')
 
-        helpers.check_dir_exist(simulations_folder)
         helpers.check_dir_exist(video_folder)
 
-        helpers.clean_dir(simulations_folder)
-        
+        video_name_ext = helpers.get_video_name_ext(self.env.world_state['agents'], TERMINATING_EPISODE, MAP)
+        self.recorder = AsyncVideoRecorder(video_folder, video_name_ext)
+
         start_time = datetime.now()
         for episode in range(episodes):
             if episode == 0:
-                self.new(
-                    self.PLAYERS, self.TABLE_TOPS, self.INGREDIENTS, self.CHOPPING_BOARDS, self.PLATES, self.POTS,
-                    self.INGREDIENTS_STATION, self.SERVING_STATION, self.RETURN_STATION
-                )
+                self.new()
 
-            print(f'================ Episode {episode} best goals ================')
-            print(f'\nStart of episode {self.env.episode}')
+            if tracing.enabled:
+                log.debug('================ Episode %s best goals ================', episode)
+                log.debug('Start of episode %s', self.env.episode)
             best_goals = self.env.find_agents_best_goal()
             goal_space = self.env.world_state['goal_space']
-            goal_info = self.env.world_state['goal_space_count']
-            print(f'Current goal space: \n{goal_space}\n')
-            print(f'Current goal info: \n{goal_info}\n')
-            print(f'Best goals')
-            print(best_goals)
-            print(f'Agent locations')
-            print([agent.location for agent in self.env.world_state['agents']])
+            goal_info = self.env.world_state['goal_space'].counts
+            if tracing.enabled:
+                log.debug('Current goal space: %s', goal_space)
+                log.debug('Current goal info: %s', goal_info)
+                log.debug('Best goals: %s', best_goals)
+                log.debug('Agent locations: %s', [agent.location for agent in self.env.world_state['agents']])
 
             self.rollout(best_goals, self.env.episode)
-            self.load_data()
             self.update()
             self.draw()
 
-            self.new(
-                self.PLAYERS, self.TABLE_TOPS, self.INGREDIENTS, self.CHOPPING_BOARDS, self.PLATES, self.POTS,
-                self.INGREDIENTS_STATION, self.SERVING_STATION, self.RETURN_STATION
-            )
+            self.scene.sync(self.env.touched_cells)
 
-            print(f'Just completed episode {self.env.episode}')
+            if tracing.enabled:
+                log.debug('Just completed episode %s', self.env.episode)
             goal_space = self.env.world_state['goal_space']
-            goal_info = self.env.world_state['goal_space_count']
-            print(f'Current goal space: \n{goal_space}\n')
-            print(f'Current goal info: \n{goal_info}\n')
-            print([agent.location for agent in self.env.world_state['agents']])
-            print([agent.holding for agent in self.env.world_state['agents']])
+            goal_info = self.env.world_state['goal_space'].counts
+            if tracing.enabled:
+                log.debug('Current goal space: %s', goal_space)
+                log.debug('Current goal info: %s', goal_info)
+                log.debug('Agent locations: %s', [agent.location for agent in self.env.world_state['agents']])
+                log.debug('Agent holdings: %s', [agent.holding for agent in self.env.world_state['agents']])
+                trace_log.log(tracing.TRACE, 'World state after episode %s: %s', self.env.episode, dict(self.env.world_state))
             self.env.update_episode()
-            pg.image.save(self.screen, simulations_folder+f'/episode_{self.env.episode}.png')
+            self.recorder.capture(self.screen)
         
-        print(f'======================= Done with simulation =======================')
+        log.info('======================= Done with simulation =======================')
         explicit_chop_rewards = self.env.world_state['explicit_rewards']['chop']
         explicit_cook_rewards = self.env.world_state['explicit_rewards']['cook']
         explicit_serve_rewards = self.env.world_state['explicit_rewards']['serve']
-        print(f'Current EXPLICIT chop rewards: {explicit_chop_rewards}')
-        print(f'Current EXPLICIT cook rewards: {explicit_cook_rewards}')
-        print(f'Current EXPLICIT serve rewards: {explicit_serve_rewards}')
+        if tracing.enabled:
+            log.debug('Current EXPLICIT chop rewards: %s', explicit_chop_rewards)
+            log.debug('Current EXPLICIT cook rewards: %s', explicit_cook_rewards)
+            log.debug('Current EXPLICIT serve rewards: %s', explicit_serve_rewards)
 
         end_time = datetime.now()
         experiment_runtime = (end_time - start_time).seconds
         experiment_runtime_min = experiment_runtime//60
         experiment_runtime_sec = experiment_runtime%60
-        print(f'Simulation Experiment took {experiment_runtime_min} mins, {experiment_runtime_sec} secs to run.')
-
-        agent_types = [agent.is_inference_agent for agent in self.env.world_state['agents']]
-        video_name_ext = helpers.get_video_name_ext(agent_types, episodes)
-        helpers.make_video_from_image_dir(
-            video_folder,
-            simulations_folder,
-            video_name_ext
-        )
+        log.info('Simulation Experiment took %s mins, %s secs to run.', experiment_runtime_min, experiment_runtime_sec)
+
+        self.recorder.close()
         sys.exit()
 
     def show_start_screen(self):
@@ -929,15 +754,16 @@ class Game:
 @click.option('--is_simulation', default=False, help='Run Simulation or Human Experiment?')
 @click.option('--simulation_episodes', default=500, help='Number of simulations to run')
 @click.option('--experiment_id', default='1', help='ID of the experiment')
-def main(num_ai_agents, is_simulation, simulation_episodes, experiment_id):
+@click.option('--log_level', default='INFO', help='Console log level (TRACE, DEBUG, INFO, WARNING)')
+@click.option('--trace_file', default=None, help='Write every log record, incl. per-step world state, to this file')
+@click.option('--seed', default=None, type=int, help='Seed for the env and agents (same seed, same trajectory)')
+def main(num_ai_agents, is_simulation, simulation_episodes, experiment_id, log_level, trace_file, seed):
+    tracing.configure(log_level.upper(), trace_file)
     # create the game object
-    g = Game(num_ai_agents, is_simulation, simulation_episodes, experiment_id)
+    g = Game(num_ai_agents, is_simulation, simulation_episodes, experiment_id, seed)
     g.show_start_screen()
     while True:
-        g.new(
-            g.PLAYERS, g.TABLE_TOPS, g.INGREDIENTS, g.CHOPPING_BOARDS, g.PLATES, g.POTS,
-            g.INGREDIENTS_STATION, g.SERVING_STATION, g.RETURN_STATION
-        )
+        g.new()
         g.run()
         g.show_go_screen()
 
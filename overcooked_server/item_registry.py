@@ -0,0 +1,115 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from collections import defaultdict
+
+from overcooked_item_classes import ChoppingBoard, Ingredient, ItemState, Plate, Pot
+
+# world_state list each item type lives in
+CATEGORIES = {
+    Ingredient: 'ingredients',
+    ChoppingBoard: 'chopping_board',
+    Plate: 'plate',
+    Pot: 'pot'
+}
+
+class ItemRegistry:
+    def __init__(self, world_state: Dict) -> None:
+        """
+        Indexes of the items lying in the map (not held by an agent), by cell,
+        by (category, state) and by identity.
+
+        The registry owns world_state['ingredients'|'chopping_board'|'plate'|'pot']:
+        items are added and removed through it, and it keeps those lists (in the
+        order items were put down, which the planners rely on) in step with the
+        indexes. It is stored in the world_state itself, so a deepcopy of the
+        world_state copies a registry that indexes the copied items.
+
+        Items are keyed by identity, so only the state of a registered item may
+        change in place, and only through `set_state`; an item's location is
+        changed by removing it, or when it is added.
+
+        Parameters
+        ----------
+        world_state: Dict
+            OvercookedEnv.world_state; items already in its lists are indexed
+        """
+        self.items = {category: world_state[category] for category in CATEGORIES.values()}
+        self._locations = {}
+        self._by_location = defaultdict(dict)
+        self._by_state = defaultdict(dict)
+        # When every item was put down, so by-state lookups keep the order of the lists
+        self._put_down = {}
+        self._put_down_count = 0
+        for items in self.items.values():
+            for item in items:
+                self._index(item)
+
+    def __contains__(self, item) -> bool:
+        return item in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def add(self, item, location: Optional[Tuple[int,int]]=None) -> None:
+        """
+        Put an item down
+
+        Parameters
+        ----------
+        item: Ingredient, ChoppingBoard, Plate or Pot
+        location: Tuple[int,int]
+            Cell the item is put on; defaults to item.location
+        """
+        if location is not None:
+            item.location = location
+        self.items[CATEGORIES[type(item)]].append(item)
+        self._index(item)
+
+    def remove(self, item) -> None:
+        """Take an item out of the map (eg. when it is picked); raises KeyError if it is not in it"""
+        location = self._locations.pop(item)
+        del self._put_down[item]
+        category = CATEGORIES[type(item)]
+        del self._by_location[location][item]
+        if not self._by_location[location]:
+            del self._by_location[location]
+        del self._by_state[(category, getattr(item, 'state', None))][item]
+        self.items[category].remove(item)
+
+    def discard(self, item) -> None:
+        """Remove an item if it is in the map"""
+        if item in self._locations:
+            self.remove(item)
+
+    def set_state(self, item, state: ItemState) -> None:
+        category = CATEGORIES[type(item)]
+        del self._by_state[(category, item.state)][item]
+        item.state = state
+        self._by_state[(category, state)][item] = None
+
+    def at(self, location: Tuple[int,int], category: Optional[str]=None) -> List:
+        """Items on a cell, of one category if given, in the order they were put down"""
+        items = self._by_location.get(tuple(location))
+        if not items:
+            return []
+        if category is None:
+            return list(items)
+        return [item for item in items if CATEGORIES[type(item)] == category]
+
+    def in_state(self, category: str, state: ItemState) -> List:
+        """Items of a category in a given state, eg. ('chopping_board', ItemState.EMPTY), in the order they were put down"""
+        items = self._by_state.get((category, state))
+        if not items:
+            return []
+        return sorted(items, key=self._put_down.__getitem__)
+
+    def _index(self, item) -> None:
+        location = tuple(item.location)
+        self._locations[item] = location
+        self._put_down[item] = self._put_down_count
+        self._put_down_count += 1
+        self._by_location[location][item] = None
+        self._by_state[(CATEGORIES[type(item)], getattr(item, 'state', None))][item] = None
@@ -1,25 +1,43 @@
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 from collections import defaultdict
 import numpy as np
-from ray.rllib.env import MultiAgentEnv
 
+from action_handlers import action_handler, as_action
 from astar_search import AStarGraph
 from settings import MAP_ACTIONS, WALLS
 from overcooked_agent import OvercookedAgent
 from human_agent import HumanAgent
 from overcooked_item_classes import Plate, Ingredient
 from agent_configs import REWARDS
+import profiling
+import tracing
 
-class MapEnv(MultiAgentEnv):
+log = tracing.get_logger('env')
+
+def rllib_env_class(env_cls):
+    """
+    Returns env_cls mixed with RLlib's MultiAgentEnv.
+
+    Ray is only imported here, so that the core env and planner start up with NumPy only.
+    """
+    from ray.rllib.env import MultiAgentEnv
+    return type(env_cls.__name__, (env_cls, MultiAgentEnv), {})
+
+class MapEnv:
     def __init__(
         self,
+        seed: Optional[int]=None,
     ) -> None:
         """
         Parameters
             ----------
+            seed: int
+                Seeds every random stream of the env and its agents (None: fresh OS entropy).
+                Identical seeds give identical trajectories.
             ascii_map: list of strings
                 Specify what the map should look like. Look at constant.py for
                 further explanation
@@ -30,11 +48,19 @@ class MapEnv(MultiAgentEnv):
             color_map: dict
                 Specifies how to convert between ascii chars and colors
         """
+        # Independent streams, so eg. move resolution draws don't shift the planner's choices
+        self.seed_sequence = np.random.SeedSequence(seed)
+        rng_seed, move_seed = self.seed_sequence.spawn(2)
+        self.rng = np.random.default_rng(rng_seed)
+        self.move_rng = np.random.default_rng(move_seed)
         self.agents = {}
         self.task_id_count = 0
         self.world_state = defaultdict(list)
         self.world_state['task_id_count'] = 0
         self.world_state['historical_actions'] = defaultdict(list)
+        # Cells mutated by the last step (agent moves, holdings, item/station states)
+        self.touched_cells = set()
+        self.drop_cells = {}
 
     def custom_reset(self):
         """Reset custom elements of the map. For example, spawn table tops and items"""
@@ -82,13 +108,14 @@ class MapEnv(MultiAgentEnv):
         return arr
 
     # Undone
+    @profiling.profiled('env_step')
     def step(self, agent_actions, reward_mapping):
         """Takes in a dict of actions and converts them to a map update
         Parameters
         ----------
-        actions: dict {agent: action}
-            The agent interprets the action ([int - move action]/[list - explains task action])
-            and converts it to a command.
+        actions: dict {agent: (goal id, action)}
+            The agent interprets the action (an action_handlers.Action, or a plan step in
+            the older int/list format, which is converted here) and converts it to a command.
         Returns
         -------
         observations: dict of arrays representing agent observations
@@ -99,14 +126,21 @@ class MapEnv(MultiAgentEnv):
         QUESTIONS TO CONSIDER:
         1. What to return for observations? since we already have world_state
         """
-        print('@map_env - step()')
-        print(agent_actions)
-        
+        if tracing.enabled:
+            log.debug('@map_env - step(): %s', agent_actions)
+        agent_actions = {agent: (action[0], as_action(action[1])) for agent, action in agent_actions.items()}
+
         orig_pos = {agent: tuple(agent.location) for agent in self.world_state['agents']}
         orig_holding = {agent:agent.holding for agent in self.world_state['agents']}
 
         agent_executed = self.update_moves(agent_actions)
         curr_pos = {agent: tuple(agent.location) for agent in self.world_state['agents']}
+        self.touched_cells = self._find_touched_cells(agent_actions, agent_executed, orig_pos, curr_pos, orig_holding)
+        # Where dropped items landed (a random cell), so that trajectories can replay the drop
+        self.drop_cells = {
+            agent.id: tuple(orig_holding[agent].location)
+            for agent in agent_executed if agent_actions[agent][1].name == 'DROP' and orig_holding[agent]
+        }
 
         final_rewards = {}
         # Calculate task rewards
@@ -147,28 +181,27 @@ class MapEnv(MultiAgentEnv):
         for agent in agent_actions:
             action = agent_actions[agent][1]
 
-            if isinstance(action, list):
-                # Index 0: action_type; Index 1: action_info
-                if action[0] == 'PICK':
-                    if action[1]['pick_type'] == 'plate':
+            if not action.is_move:
+                if action.name == 'PICK':
+                    if action.pick_type == 'plate':
                         if agent.holding:
                             # Edge-Case: AgentL about to serve, AgentR trying to pick plate for the same goal that is going to be removed
                             # Continue and not pick instead
-                            cur_plate_pos = action[1]['task_coord']
+                            cur_plate_pos = action.task_coord
 
                             if cur_plate_pos not in self.world_state['return_counter']:
                                 self.world_state['valid_item_cells'].append(cur_plate_pos)
 
-                    elif action[1]['pick_type'] == 'ingredient':
+                    elif action.pick_type == 'ingredient':
                         if agent.holding:
-                            all_raw_chop_locations = [cb.location for cb in self.world_state['chopping_board']]
                             all_raw_ingredients_locations = [self.world_state['ingredient_'+agent.holding.name][0]]
                             
-                            cur_ingredient_pos = action[1]['task_coord']
-                            if cur_ingredient_pos not in all_raw_chop_locations and cur_ingredient_pos not in all_raw_ingredients_locations: 
+                            cur_ingredient_pos = action.task_coord
+                            on_chopping_board = self.world_state['item_registry'].at(cur_ingredient_pos, 'chopping_board')
+                            if not on_chopping_board and cur_ingredient_pos not in all_raw_ingredients_locations: 
                                 self.world_state['valid_item_cells'].append(cur_ingredient_pos)
 
-                if action[0] == 'DROP':
+                if action.name == 'DROP':
                     if type(orig_holding[agent]) == Plate:
                         cur_plate_pos = orig_holding[agent].location
 
@@ -186,247 +219,156 @@ class MapEnv(MultiAgentEnv):
         for agent in self.world_state['agents']:
             if isinstance(agent, OvercookedAgent):
                 agent.astar_map = temp_astar_map
+
+        # Re-hash the changed cells if the planning cache keeps a Zobrist hash of this state
+        state_hash = self.world_state.get('zobrist')
+        if state_hash is not None:
+            state_hash.update(self.world_state, self.touched_cells)
         
         # TO-DO: Add mechanism to store past observations, rewards
         return final_rewards
 
+    def _find_touched_cells(self, agent_actions, agent_executed, orig_pos, curr_pos, orig_holding):
+        """
+        Collect the grid cells whose contents may have changed during the step, so that
+        consumers (eg. observation encoders) can update incrementally.
+        """
+        touched_cells = set()
+        for agent in curr_pos:
+            if curr_pos[agent] != orig_pos[agent]:
+                touched_cells.add(orig_pos[agent])
+                touched_cells.add(curr_pos[agent])
+
+        for agent in agent_executed:
+            touched_cells.add(curr_pos[agent])
+            action = agent_actions[agent][1]
+            if action.task_coord is not None:
+                touched_cells.add(tuple(action.task_coord))
+            elif action.name == 'DROP' and orig_holding[agent]:
+                touched_cells.add(tuple(orig_holding[agent].location))
+            if action.name == 'SERVE':
+                touched_cells.add(tuple(self.world_state['return_counter']))
+        return touched_cells
+
     # Taking only 1 grid cell movement now (correct?)
+    @profiling.profiled('update_moves')
     def update_moves(self, actions):
         """
-        #Converts agent action tuples into a new map and new agent positions.
-        #Also resolves conflicts over multiple agents wanting a cell.
+        Converts agent actions into new agent positions, then performs the task actions.
+        Conflicts over cells are resolved by `_resolve_moves`.
         """
-        print('@map_env - update_moves()')
-        # fix for np.array weird bug
-        print(actions)
-        for agent in actions:
-            agent.location = tuple(agent.location)
+        log.debug('@map_env - update_moves()')
+        if tracing.enabled:
+            log.debug('actions: %s', actions)
 
         # Stores non-grid cells movement (if any)
         agent_tasks = {}
-        agent_actions = {}
+        # Cell every agent wants to be on next (its own to stay)
+        agent_targets = {}
 
         for agent, task_action in actions.items():
-            print(task_action)
+            # fix for np.array weird bug
+            agent.location = tuple(agent.location)
+            if tracing.enabled:
+                log.debug('task_action: %s', task_action)
             task = task_action[0]
             action = task_action[1]
-            if type(action) == int:
+            if action.is_move:
                 # Case: Just movements
-                print('map_env@update_moves - Movement found')
-                agent_action = agent.action_map(action)
-                agent_actions[agent] = agent_action
+                log.debug('map_env@update_moves - Movement found')
+                agent_action = agent.action_map(action.opcode)
             else:
                 # Case: Pick/Chop/Cook/Plate/Scoop/Serve actions
-                print('map_env@update_moves - Action found')
+                log.debug('map_env@update_moves - Action found')
                 agent_tasks[agent] = [task, action]
                 agent_action = agent.action_map(8)
-                agent_actions[agent] = agent_action
-
-        reserved_slots = []
-        agent_moves = {}
-        for agent, action in agent_actions.items():
-            selected_action = MAP_ACTIONS[action]
-            
-            new_pos = tuple([x + y for x, y in zip(list(agent.location), selected_action)])
-            new_pos = agent.return_valid_pos(new_pos)
-            agent_moves[agent] = new_pos
-            reserved_slots.append((new_pos, agent))
-
-        agent_by_pos = {tuple(agent.location): agent for agent in self.world_state['agents']}
-
-        # list of moves and their corresponding agents
-        move_slots = [slot[0] for slot in reserved_slots]
-        agent_to_slot = [slot[1] for slot in reserved_slots]
-
-        print('@map_env - Starting moves (if any)')
-        print(move_slots)
-        print(agent_to_slot)
-        print(agent_by_pos)
-        print(agent_moves)
-
-        # cut short computation if there are no moves (to be used if we consider rotation)
-        if len(agent_to_slot) > 0:
-            # shuffle so that a random agent has slot priority
-            shuffle_list = list(zip(agent_to_slot, move_slots))
-            np.random.shuffle(shuffle_list)
-            agent_to_slot, move_slots = zip(*shuffle_list)
-            # unique_move is the position the agents want to move to
-            # return_count is the number of times the unique_move is wanted
-            unique_move, indices, return_count = np.unique(move_slots, return_index=True,
-                                                           return_counts=True, axis=0)
-            search_list = np.array(move_slots)
-            print('@map_env - Starting fix (if any)')
-            print(unique_move)
-            print(indices)
-            print(return_count)
-            print(search_list)
-
-            # first go through and remove moves that can't possible happen. Three types
-            # 1. Trying to move into an agent that has been issued a stay command
-            # 2. Trying to move into the spot of an agent that doesn't have a move
-            # 3. Two agents trying to walk through one another
-
-            # Resolve all conflicts over a space
-            if np.any(return_count > 1):
-                for move, index, count in zip(unique_move, indices, return_count):
-                    if count > 1:
-                        # check that the cell you are fighting over doesn't currently
-                        # contain an agent that isn't going to move for one of the agents
-                        # If it does, all the agents commands should become STAY
-                        # since no moving will be possible
-                        conflict_indices = np.where((search_list == move).all(axis=1))[0]
-                        all_agents = [agent_to_slot[i] for i in conflict_indices]
-                        # all other agents now stay in place so update their moves
-                        # to reflect this
-                        conflict_cell_free = True
-                        for agent in all_agents:
-                            moves_copy = agent_moves.copy()
-                            # TODO(ev) code duplication, simplify
-                            locs = [list(agent.location) for agent in self.world_state['agents']]
-                            if move.tolist() in locs: #self.agent_pos
-                                # find the agent that is currently at that spot and make sure
-                                # that the move is possible. If it won't be, remove it.
-                                conflicting_agent = agent_by_pos[tuple(move)]
-                                curr_pos = list(agent.location)
-                                curr_conflict_pos = list(conflicting_agent.location)
-                                conflict_move = agent_moves.get(
-                                    conflicting_agent,
-                                    curr_conflict_pos)
-
-                                # Condition (1):
-                                # a STAY command has been issued
-                                if agent == conflicting_agent:
-                                    conflict_cell_free = False
-                                # Condition (2)
-                                # its command is to stay
-                                # or you are trying to move into an agent that hasn't
-                                # received a command
-                                elif conflicting_agent not in moves_copy.keys() or \
-                                        curr_conflict_pos == conflict_move:
-                                    conflict_cell_free = False
-
-                                # Condition (3)
-                                # It is trying to move into you and you are moving into it
-                                elif conflicting_agent in moves_copy.keys():
-                                    if conflicting_agent.location == curr_pos and \
-                                            move.tolist() == conflicting_agent.location.tolist():
-                                        print('keep trying to move into each other')
-                                        conflict_cell_free = False
-
-                        # if the conflict cell is open, let one of the conflicting agents
-                        # move into it
-                        if conflict_cell_free:
-                            agent_idx = [idx for idx, agent_obj in enumerate(self.world_state['agents']) if id(agent_obj) == id(agent_to_slot[index])][0]
-                            self.world_state['agents'][agent_idx].update_agent_pos(move)
-                            agent_by_pos = {tuple(agent.location):
-                                            agent for agent in self.world_state['agents']}
-                        # ------------------------------------
-                        # remove all the other moves that would have conflicted
-                        remove_indices = np.where((search_list == move).all(axis=1))[0]
-                        all_agents = [agent_to_slot[i] for i in remove_indices]
-                        # all other agents now stay in place so update their moves
-                        # to stay in place
-                        for agent in all_agents:
-                            agent_moves[agent] = agent.location
-            
-            print('@map_env - Ended fix (if any)')
-            print(move_slots)
-            print(agent_to_slot)
-            print(agent_by_pos)
-            print(agent_moves)
-
-            print('@map_env - Starting un-conflicted moves (if any)')
-            # make the remaining un-conflicted moves
-            while len(agent_moves.items()) > 0:
-                agent_by_pos = {tuple(agent.location): agent for agent in self.world_state['agents']}
-                num_moves = len(agent_moves.items())
-                moves_copy = agent_moves.copy()
-                del_keys = []
-                for agent, move in moves_copy.items():
-                    print('inside agent move')
-                    print(agent)
-                    print(move)
-                    print([agent.location for agent in self.world_state['agents']])
-                    if agent in del_keys:
-                        continue
-                    if list(move) in [list(agent.location) for agent in self.world_state['agents']]:
-                        # find the agent that is currently at that spot and make sure
-                        # that the move is possible. If it won't be, remove it.
-                        conflicting_agent = agent_by_pos[tuple(move)]
-                        curr_pos = list(agent.location)
-                        curr_conflict_pos = list(conflicting_agent.location)
-                        conflict_move = agent_moves.get(conflicting_agent, curr_conflict_pos)
-                        # Condition (1):
-                        # a STAY command has been issued
-                        if agent == conflicting_agent:
-                            del agent_moves[agent]
-                            del_keys.append(agent)
-                        # Condition (2)
-                        # its command is to stay
-                        # or you are trying to move into an agent that hasn't received a command
-                        elif conflicting_agent not in moves_copy.keys() or \
-                                curr_conflict_pos == conflict_move:
-                            del agent_moves[agent]
-                            del_keys.append(agent)
-                        # Condition (3)
-                        # It is trying to move into you and you are moving into it
-                        elif conflicting_agent in moves_copy.keys():
-                            if agent_moves[conflicting_agent] == curr_pos and \
-                                    move == conflicting_agent.location.tolist():
-                                print('keep trying to move into each other 2')
-                                del agent_moves[conflicting_agent]
-                                del agent_moves[agent]
-                                del_keys.append(agent)
-                                del_keys.append(conflicting_agent)
-                    # this move is unconflicted so go ahead and move
-                    else:
-                        agent_idx = [idx for idx, agent_obj in enumerate(self.world_state['agents']) if id(agent_obj) == id(agent)][0]
-                        self.world_state['agents'][agent_idx].update_agent_pos(move)
-                        del agent_moves[agent]
-                        del_keys.append(agent)
-
-                # no agent is able to move freely, so just move them all
-                # no updates to hidden cells are needed since all the
-                # same cells will be covered
-                if len(agent_moves) == num_moves:
-                    for agent, move in agent_moves.items():
-                        self.world_state['agents'][agent].update_agent_pos(move)
-                    break
+
+            selected_action = MAP_ACTIONS[agent_action]
+            new_pos = tuple([x + y for x, y in zip(agent.location, selected_action)])
+            agent_targets[agent] = tuple(agent.return_valid_pos(new_pos))
+
+        agent_moves = self._resolve_moves(agent_targets)
+        if tracing.enabled:
+            log.debug('@map_env - Resolved moves: %s %s', agent_targets, agent_moves)
+        agent_table = self.world_state['agent_table']
+        for agent, new_pos in agent_moves.items():
+            agent_table.move(agent, new_pos)
 
         # All possible action handlers
-        print('@map_env - Executing Task Handlers')
+        log.debug('@map_env - Executing Task Handlers')
         agent_executed = {}
         for agent in agent_tasks:
-            print('conducting tasks now')
+            log.debug('conducting tasks now')
             task_id = agent_tasks[agent][0]
             task_action = agent_tasks[agent][1]
-            print(task_action)
-            agent_rewards = REWARDS[task_action[0]]
-            # do we still need the second check?
-            if task_action[0] == 'PICK' and task_action[2] == agent.location:
-                print('@map_env - Executing Pick Action')
-                # agent.pick(task_id, task_action[1], task_action[2], task_action[3])
-                agent.pick(task_id, task_action[1])
-                agent_executed[agent] = agent_rewards
-            elif task_action[0] == 'CHOP' and task_action[3] == agent.location:
-                print('@map_env - Executing Chop Action')
-                agent.chop(task_id, task_action[1], task_action[2])
-                agent_executed[agent] = agent_rewards
-            elif task_action[0] == 'COOK' and task_action[3] == agent.location:
-                print('@map_env - Executing Cook Action')
-                agent.cook(task_id, task_action[1], task_action[2])
-                agent_executed[agent] = agent_rewards
-            elif task_action[0] == 'SCOOP' and task_action[2] == agent.location:
-                print('@map_env - Executing Scoop Action')
-                agent.scoop(task_id, task_action[1])
-                agent_executed[agent] = agent_rewards
-            elif task_action[0] == 'SERVE' and task_action[2] == agent.location:
-                print('@map_env - Executing Serve Action')
-                agent.serve(task_id, task_action[1])
-                agent_executed[agent] = agent_rewards
-            elif task_action[0] == 'DROP':
-                print('@map_env - Executing Drop Action')
-                agent.drop(task_id)
-                agent_executed[agent] = agent_rewards
+            if tracing.enabled:
+                log.debug('task_action: %s', task_action)
+            handler = action_handler(task_action)
+            # do we still need the location check?
+            if handler.precondition(agent, task_action):
+                if tracing.enabled:
+                    log.debug('@map_env - Executing %s Action', handler.name)
+                handler.execute(agent, task_id, task_action)
+                agent_executed[agent] = REWARDS[handler.name]
         
         return agent_executed
+
+    def _resolve_moves(self, agent_targets):
+        """
+        Resolves conflicts over cells with claims: every cell is claimed by at most one
+        agent, and a claim succeeds if the cell is free once the other moves are made.
+
+        1. Cells wanted by several agents go to the first of them in a random order (drawn
+           from move_rng), so that no agent has slot priority; the others stay.
+        2. Each successful claimant depends on the agent on its cell (if any) leaving:
+           - claiming the cell of an agent that stays (or does a task) fails
+           - a chain of agents following one another moves if its head moves
+           - two agents trying to walk through one another both stay
+           - a longer cycle of agents all move (they rotate)
+        Every agent is visited once per pass over the claims, so this is linear in the
+        number of agents.
+
+        Parameters
+        ----------
+        agent_targets: Dict[agent, Tuple[int,int]]
+            Cell every acting agent wants to be on next (its own cell to stay)
+
+        Returns
+        -------
+        agent_moves: Dict[agent, Tuple[int,int]]
+            Agents that move, and the cell each moves to
+        """
+        claim_order = list(agent_targets)
+        self.move_rng.shuffle(claim_order)
+        claims = {}
+        for agent in claim_order:
+            target = agent_targets[agent]
+            if target != agent.location:
+                claims.setdefault(target, agent)
+        claimed = {agent: target for target, agent in claims.items()}
+
+        agent_table = self.world_state['agent_table']
+        can_move = {}
+        for agent in claimed:
+            # Follow the claims from this agent until they reach a free cell,
+            # an agent already resolved or an agent that stays, or loop back
+            chain = []
+            chain_idx = {}
+            next_agent = agent
+            while next_agent in claimed and next_agent not in can_move and next_agent not in chain_idx:
+                chain_idx[next_agent] = len(chain)
+                chain.append(next_agent)
+                next_agent = agent_table.at(claimed[next_agent])
+
+            if next_agent is None:
+                chain_moves = True
+            elif next_agent in can_move:
+                chain_moves = can_move[next_agent]
+            elif next_agent in chain_idx:
+                chain_moves = len(chain) - chain_idx[next_agent] > 2
+            else:
+                chain_moves = False
+            for chain_agent in chain:
+                can_move[chain_agent] = chain_moves
+
+        return {agent: target for agent, target in claimed.items() if can_move[agent]}
@@ -0,0 +1,167 @@
+"""
+Map Generator
+-------------
+Procedurally generated onion-soup kitchens of any size, for runs with many agents.
+
+A kitchen is a ring of counters around the floor, with counter islands (vertical
+strips, each with a random gap) every few columns, so that there are corridors
+along the top and bottom rows and between the islands. The stations sit on the
+outer counters, at random cells; pots, chopping boards, plates, ingredient and
+serving stations are scaled with the number of agents so that they do not all
+queue for the same pot. Agents are spawned on distinct random floor cells.
+
+`generate_map` returns the same globals a hand-written map module (eg. maps/map_10.py)
+defines, so maps/generated.py just publishes them; see that module for the
+environment variables that size the kitchen.
+"""
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+# The scoreboard row needs the columns of the hand-written maps
+MIN_ROWS = 7
+MIN_COLS = 13
+# Columns between counter islands
+ISLAND_SPACING = 4
+
+def kitchen_size(agents: int) -> Tuple[int,int]:
+    """Smallest (rows, cols) with room for `agents` agents to move around (about 5 floor cells each)"""
+    rows, cols = 9, MIN_COLS
+    while _floor_cells(rows, cols) < 5*agents:
+        if cols < 2*rows:
+            cols += ISLAND_SPACING
+        else:
+            rows += 2
+    return rows, cols
+
+def _floor_cells(rows: int, cols: int) -> int:
+    islands = len(range(ISLAND_SPACING, cols-3, ISLAND_SPACING))
+    return (rows-2)*(cols-2) - islands*(rows-4)
+
+def generate_map(rows: int, cols: int, agents: int=2, seed: int=0, tom: bool=True) -> Dict:
+    """
+    Parameters
+    ----------
+    rows, cols: int
+        Kitchen grid size (the scoreboard row is added below it)
+    agents: int
+        Number of AI agents to spawn (AI_AGENTS '1'..str(agents)); the first two
+        spawn cells are also used for HUMAN_AGENTS
+    seed: int
+        Seed of the layout; the same arguments give the same map
+    tom: bool
+        Whether the spawned AI agents are ToM agents
+
+    Returns
+    -------
+    Map module globals, eg. MAP, WORLD_STATE, WALLS, AI_AGENTS
+    """
+    if rows < MIN_ROWS or cols < MIN_COLS:
+        raise ValueError(f'Kitchens must be at least {MIN_ROWS}x{MIN_COLS}, got {rows}x{cols}')
+    rng = np.random.default_rng(seed)
+
+    counters = set()
+    for row in range(rows):
+        counters.update({(row, 0), (row, cols-1)})
+    for col in range(cols):
+        counters.update({(0, col), (rows-1, col)})
+    for col in range(ISLAND_SPACING, cols-3, ISLAND_SPACING):
+        island = [(row, col) for row in range(2, rows-2)]
+        if len(island) > 3:
+            del island[rng.integers(1, len(island)-1)]
+        counters.update(island)
+    floor = sorted({(row, col) for row in range(rows) for col in range(cols)} - counters)
+    if len(floor) < agents:
+        raise ValueError(f'A {rows}x{cols} kitchen has room for {len(floor)} agents, not {agents}')
+
+    # Only counters next to the floor can be worked from
+    def reachable(cell: Tuple[int,int]) -> bool:
+        row, col = cell
+        return any(
+            (row+d_row, col+d_col) not in counters and 0 <= row+d_row < rows and 0 <= col+d_col < cols
+            for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1))
+        )
+    outer = [cell for cell in sorted(counters) if cell[0] in (0, rows-1) or cell[1] in (0, cols-1)]
+    outer = [cell for cell in outer if reachable(cell)]
+    inner = [cell for cell in sorted(counters - set(outer)) if reachable(cell)]
+
+    station_counts = {
+        'pot': max(2, agents // 3),
+        'chopping_board': max(2, agents // 3),
+        'ingredient_onion': max(1, agents // 8),
+        'service_counter': max(1, agents // 8),
+        'return_counter': 1
+    }
+    if sum(station_counts.values()) > len(outer):
+        raise ValueError(f'A {rows}x{cols} kitchen is too small for the stations of {agents} agents')
+    free_outer = _shuffled(outer, rng)
+    stations = {}
+    for station, count in station_counts.items():
+        stations[station], free_outer = free_outer[:count], free_outer[count:]
+    # Plates start on any free counter
+    free_counters = _shuffled(free_outer + inner, rng)
+    plates = free_counters[:max(2, agents // 3)]
+
+    task_cells = set(stations['pot'] + stations['chopping_board'] + stations['ingredient_onion'] + stations['service_counter'])
+    table_tops = sorted(counters - task_cells)
+    valid_item_cells = [
+        cell for cell in table_tops
+        if cell not in plates and cell not in stations['return_counter'] and reachable(cell)
+    ]
+
+    spawns = _shuffled(floor, rng)[:agents]
+    ai_agents = {str(idx+1): {'coords': cell, 'ToM': tom} for idx, cell in enumerate(spawns)}
+    human_agents = {str(idx+1): {'coords': cell} for idx, cell in enumerate(spawns[:2])}
+
+    return {
+        'MAP': f'generated_{rows}x{cols}_{agents}_{seed}',
+        'COMPLEX_RECIPE': False,
+        'GRID_ROWS': rows,
+        'GRID_COLS': cols,
+        'WORLD_STATE': {
+            'valid_optimal_table_tops': [],
+            'invalid_movement_cells': [],
+            'valid_item_cells': valid_item_cells,
+            'valid_movement_cells': floor,
+            'ingredient_onion': stations['ingredient_onion'],
+            'service_counter': stations['service_counter'],
+            'return_counter': stations['return_counter'],
+        },
+        'RECIPES': ['onion_soup'],
+        'RECIPES_INFO': {'onion_soup': {'onion': 3}},
+        'RECIPES_ACTION_MAPPING': {
+            'onion_soup': {
+                'onion': {'PICK': 0, 'CHOP': 1, 'COOK': 2},
+                'general': {'SCOOP': 3, 'SERVE': 4}
+            }
+        },
+        'RECIPE_ACTION_NAME': {'onion_soup': [0, 1, 2, 3, 4]},
+        'INGREDIENT_ACTION_NAME': {'onion': [0, 1, 2, 3, 4]},
+        'FLATTENED_RECIPES_ACTION_MAPPING': {'PICK': [0], 'CHOP': [1], 'COOK': [2], 'SCOOP': [3], 'SERVE': [4]},
+        'ITEMS_INITIALIZATION': {
+            'chopping_board': stations['chopping_board'],
+            'plate': plates,
+            'pot': stations['pot']
+        },
+        'INGREDIENTS_INITIALIZATION': {'onion': {'location': stations['ingredient_onion']}},
+        'WALLS': sorted(counters),
+        'TABLE_TOPS': table_tops,
+        'CHOPPING_BOARDS': {
+            idx+1: {'state': 'empty', 'coords': cell} for idx, cell in enumerate(stations['chopping_board'])
+        },
+        'PLATES': {idx+1: {'state': 'empty', 'coords': cell} for idx, cell in enumerate(plates)},
+        'INGREDIENTS_STATION': {'onion': stations['ingredient_onion']},
+        'SERVING_STATION': stations['service_counter'],
+        'RETURN_STATION': {'state': 'empty', 'coords': stations['return_counter'][0]},
+        'HUMAN_AGENTS': human_agents,
+        'AI_AGENTS': ai_agents,
+        'SCOREBOARD_SCORE': (rows, 0),
+        'SCOREBOARD_ORDERS': (rows, 4),
+        'SCOREBOARD': [(rows, col) for col in range(1, cols) if col != 4],
+        'QUEUE_EPISODES': 30
+    }
+
+def _shuffled(cells: List[Tuple[int,int]], rng: np.random.Generator) -> List[Tuple[int,int]]:
+    return [cells[idx] for idx in rng.permutation(len(cells))]
@@ -0,0 +1,21 @@
+# ======================= Generated Map =======================
+# Procedurally generated kitchen (see map_generator.py), selected with OVERCOOKED_MAP=generated:
+#   OVERCOOKED_GEN_AGENTS  number of AI agents to spawn (default 8)
+#   OVERCOOKED_GEN_SIZE    kitchen size as <rows>x<cols> (default: sized for the agents)
+#   OVERCOOKED_GEN_SEED    layout seed (default 0)
+#   OVERCOOKED_GEN_TOM     1 to spawn ToM agents (default 0)
+import os
+
+from map_generator import generate_map, kitchen_size
+
+_agents = int(os.environ.get('OVERCOOKED_GEN_AGENTS', 8))
+if os.environ.get('OVERCOOKED_GEN_SIZE'):
+    _rows, _cols = (int(size) for size in os.environ['OVERCOOKED_GEN_SIZE'].split('x'))
+else:
+    _rows, _cols = kitchen_size(_agents)
+
+globals().update(generate_map(
+    _rows, _cols, _agents,
+    seed=int(os.environ.get('OVERCOOKED_GEN_SEED', 0)),
+    tom=os.environ.get('OVERCOOKED_GEN_TOM', '0') == '1'
+))
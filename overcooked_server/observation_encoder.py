@@ -0,0 +1,144 @@
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from overcooked_item_classes import Ingredient, ItemState, Plate
+from settings import GRID_ROWS, GRID_COLS, WALLS, INGREDIENTS_INITIALIZATION, \
+    INGREDIENTS_STATION, SERVING_STATION
+
+INGREDIENT_NAMES = list(INGREDIENTS_INITIALIZATION)
+
+STATIC_CHANNELS = [
+    'wall',
+    'ingredient_station',
+    'serving_station',
+    'return_station',
+]
+DYNAMIC_CHANNELS = [
+    'agent',
+    'agent_holding',
+    'plate',
+    'pot',
+    'pot_ready',
+    'chopping_board',
+] + ['ingredient_'+name for name in INGREDIENT_NAMES]
+CHANNELS = STATIC_CHANNELS + DYNAMIC_CHANNELS
+CHANNEL_IDX = {channel: idx for idx, channel in enumerate(CHANNELS)}
+
+# Per-channel cell values
+STATE_CODES = {
+    ItemState.EMPTY: 1,
+    ItemState.TAKEN: 2,
+    ItemState.UNCHOPPED: 1,
+    ItemState.CHOPPED: 2,
+    ItemState.PLATED: 2,
+}
+
+def holding_code(holding) -> int:
+    """
+    0: empty-handed
+    1/2: empty/plated plate
+    3+: ingredient, two codes (unchopped/chopped) per ingredient name
+    """
+    if holding is None:
+        return 0
+    if isinstance(holding, Plate):
+        return STATE_CODES[holding.state]
+    if isinstance(holding, Ingredient):
+        return 2 + 2*INGREDIENT_NAMES.index(holding.name) + STATE_CODES[holding.state]
+    return 0
+
+class ObservationEncoder:
+    def __init__(
+        self,
+        world_state: Dict,
+    ) -> None:
+        """
+        Keeps a persistent (channels x GRID_ROWS x GRID_COLS) uint8 tensor of the world_state.
+
+        The full rasterisation is only done on construction (or reset); afterwards
+        `update` re-encodes just the cells touched by the last env step, so the
+        per-step cost follows the number of changes rather than the number of items.
+        """
+        self.obs = np.zeros((len(CHANNELS), GRID_ROWS, GRID_COLS), dtype=np.uint8)
+        self._dynamic = slice(len(STATIC_CHANNELS), len(CHANNELS))
+        self.reset(world_state)
+
+    @property
+    def observation(self) -> np.ndarray:
+        """Zero-copy, read-only view of the encoded observation"""
+        view = self.obs.view()
+        view.flags.writeable = False
+        return view
+
+    def reset(self, world_state: Dict) -> np.ndarray:
+        self.obs.fill(0)
+        # WALLS is shared with the A* barriers, which also track agent positions
+        agent_cells = {tuple(agent.location) for agent in world_state['agents']}
+        for cell in WALLS:
+            if tuple(cell) not in agent_cells:
+                self.obs[CHANNEL_IDX['wall'], cell[0], cell[1]] = 1
+        for ingredient in INGREDIENTS_STATION:
+            for cell in INGREDIENTS_STATION[ingredient]:
+                self.obs[CHANNEL_IDX['ingredient_station'], cell[0], cell[1]] = INGREDIENT_NAMES.index(ingredient) + 1
+        for cell in SERVING_STATION:
+            self.obs[CHANNEL_IDX['serving_station'], cell[0], cell[1]] = 1
+        return_counter = world_state['return_counter']
+        self.obs[CHANNEL_IDX['return_station'], return_counter[0], return_counter[1]] = 1
+
+        all_cells = {(row, col) for row in range(GRID_ROWS) for col in range(GRID_COLS)}
+        return self.update(world_state, all_cells)
+
+    def update(self, world_state: Dict, touched_cells: Iterable[Tuple[int,int]]) -> np.ndarray:
+        """
+        Re-encode the dynamic channels of touched_cells only.
+
+        Parameters
+        ----------
+        world_state: Dict
+            World state after the step
+        touched_cells: Iterable[Tuple[int,int]]
+            Cells mutated by the step (see MapEnv.touched_cells)
+        """
+        touched_cells = {tuple(cell) for cell in touched_cells}
+        if not touched_cells:
+            return self.observation
+
+        rows, cols = zip(*touched_cells)
+        self.obs[self._dynamic, rows, cols] = 0
+
+        for cell, values in self._encode_cells(world_state, touched_cells):
+            for channel, value in values:
+                self.obs[channel, cell[0], cell[1]] = value
+        return self.observation
+
+    def _encode_cells(self, world_state: Dict, cells) -> List[Tuple[Tuple[int,int], List[Tuple[int,int]]]]:
+        encoded = []
+        for agent_idx, agent in enumerate(world_state['agents']):
+            cell = tuple(agent.location)
+            if cell in cells:
+                encoded.append((cell, [
+                    (CHANNEL_IDX['agent'], agent_idx + 1),
+                    (CHANNEL_IDX['agent_holding'], holding_code(agent.holding))
+                ]))
+        for plate in self._items_at(world_state, 'plate', cells):
+            encoded.append((plate.location, [(CHANNEL_IDX['plate'], STATE_CODES[plate.state])]))
+        for pot in self._items_at(world_state, 'pot', cells):
+            encoded.append((pot.location, [
+                (CHANNEL_IDX['pot'], min(sum(pot.ingredient_count.values()), 255)),
+                (CHANNEL_IDX['pot_ready'], int(bool(pot.dish)))
+            ]))
+        for board in self._items_at(world_state, 'chopping_board', cells):
+            encoded.append((board.location, [(CHANNEL_IDX['chopping_board'], STATE_CODES[board.state])]))
+        for ingredient in self._items_at(world_state, 'ingredients', cells):
+            encoded.append((ingredient.location, [
+                (CHANNEL_IDX['ingredient_'+ingredient.name], STATE_CODES[ingredient.state])
+            ]))
+        return encoded
+
+    def _items_at(self, world_state, category, cells):
+        registry = world_state['item_registry']
+        return [item for cell in cells for item in registry.at(cell, category)]
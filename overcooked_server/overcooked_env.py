@@ -7,16 +7,26 @@ import math
 import itertools
 import logging
 import numpy as np
-import random
 
+from action_handlers import MOVES, STAY
+from agent_table import AgentTable
 from map_env import MapEnv
 from astar_search import AStarGraph
+from goal_table import GoalTable
+from item_registry import ItemRegistry
 from human_agent import HumanAgent
 from overcooked_agent import OvercookedAgent
-from overcooked_item_classes import ChoppingBoard, Extinguisher, Plate, Pot
+from overcooked_item_classes import ChoppingBoard, Extinguisher, ItemState, Plate, Pot
+from path_permutations import PathPermutations
 from settings import MAP_ACTIONS, RECIPES, RECIPES_INFO, RECIPES_ACTION_MAPPING, \
     ITEMS_INITIALIZATION, INGREDIENTS_INITIALIZATION, WORLD_STATE, WALLS, \
         FLATTENED_RECIPES_ACTION_MAPPING, MAP, COMPLEX_RECIPE
+import helpers
+import profiling
+import tracing
+import zobrist
+
+log = tracing.get_logger('env')
 
 
 class OvercookedEnv(MapEnv):
@@ -24,9 +34,12 @@ class OvercookedEnv(MapEnv):
         self,
         human_agents=None,
         ai_agents=None,
-        queue_episodes=None
+        queue_episodes=None,
+        seed=None
     ) -> None:
-        super().__init__()
+        super().__init__(seed)
+        order_seed, self.agents_seed_sequence = self.seed_sequence.spawn(2)
+        self.order_rng = np.random.default_rng(order_seed)
         self.initialize_world_state(ITEMS_INITIALIZATION, INGREDIENTS_INITIALIZATION)
         self.recipes = RECIPES
         self.order_queue = []
@@ -40,13 +53,13 @@ class OvercookedEnv(MapEnv):
         self.random_queue_order()
 
         # Initialization: Update agent's current cell to be not available
-        print(f'Removing agent current location from valid_cells, valid_item_cells list')
+        log.debug('Removing agent current location from valid_cells, valid_item_cells list')
         try:
             for agent in self.agents:
                 self.world_state['valid_cells'].remove(self.agents[agent].location)
                 self.world_state['valid_item_cells'].remove(self.agents[agent].location)
         except ValueError:
-            print('Valid cell is already updated')
+            log.debug('Valid cell is already updated')
 
     def update_episode(self):
         self.episode += 1
@@ -54,7 +67,7 @@ class OvercookedEnv(MapEnv):
 
         # pick_idx = FLATTENED_RECIPES_ACTION_MAPPING['PICK']
         queue_flag = True
-        total_count = sum([v for k,v in self.world_state['goal_space_count'].items()])
+        total_count = self.world_state['goal_space'].total_count()
 
         if COMPLEX_RECIPE:
             if total_count > 1:
@@ -66,22 +79,19 @@ class OvercookedEnv(MapEnv):
             self.random_queue_order()
 
     def random_queue_order(self):
-        new_order = random.choice(self.recipes)
+        new_order = self.recipes[self.order_rng.integers(len(self.recipes))]
         self.initialize_new_order(new_order)
 
     def initialize_new_order(self, dish):
         recipe = RECIPES_INFO[dish]
         for ingredient in recipe:
             pick_mapping = RECIPES_ACTION_MAPPING[dish][ingredient]['PICK']
-            self.world_state['goal_space_count'][pick_mapping] += recipe[ingredient]
+            self.world_state['goal_space'].counts[pick_mapping] += recipe[ingredient]
 
-            enqueue_count = self.world_state['goal_space_count'][pick_mapping] - 0
+            enqueue_count = self.world_state['goal_space'].counts[pick_mapping] - 0
             if enqueue_count > 0:
                 for _ in range(enqueue_count):
-                    self.world_state['goal_space'][pick_mapping].append({
-                        'state': 'unchopped',
-                        'ingredient': ingredient
-                    })
+                    self.world_state['goal_space'].enqueue(pick_mapping, ItemState.UNCHOPPED, ingredient=ingredient)
         self.world_state['order_count'] += 1
         self.world_state['score'].append(150)
 
@@ -90,7 +100,8 @@ class OvercookedEnv(MapEnv):
         world_state:
             a dictionary indicating world state (coordinates of items in map)
         """
-        self.world_state['invalid_stay_cells'] = WORLD_STATE['invalid_stay_cells']
+        # Not every map defines stay-restricted cells
+        self.world_state['invalid_stay_cells'] = WORLD_STATE.get('invalid_stay_cells', [])
         self.world_state['invalid_movement_cells'] = WORLD_STATE['invalid_movement_cells']
         self.world_state['valid_cells'] = WORLD_STATE['valid_movement_cells']
         self.world_state['valid_item_cells'] = WORLD_STATE['valid_item_cells']
@@ -99,26 +110,27 @@ class OvercookedEnv(MapEnv):
         self.world_state['explicit_rewards'] = {'chop': 0, 'cook': 0, 'serve': 0}
         self.world_state['cooked_dish_count'] = {}
         self.world_state['order_count'] = 0
-        self.world_state['goal_space_count'] = defaultdict(int)
-        self.world_state['goal_space'] = defaultdict(list)
         self.world_state['score'] = []
         self.world_state['total_score'] = 0
 
+        goal_ids = []
         for dish in RECIPES_ACTION_MAPPING:
             for action_header in RECIPES_ACTION_MAPPING[dish]:
                 action_info = RECIPES_ACTION_MAPPING[dish][action_header]
                 for k,v in action_info.items():
-                    self.world_state['goal_space_count'][v] = 0
-                    self.world_state['goal_space'][v] = []
+                    goal_ids.append(v)
+        self.world_state['goal_space'] = GoalTable(goal_ids, ingredients, RECIPES)
 
         for recipe in RECIPES:
             self.world_state['cooked_dish_count'][recipe] = 0
 
+        self.world_state['agent_table'] = AgentTable(self.world_state['agents'])
+        registry = self.world_state['item_registry'] = ItemRegistry(self.world_state)
         for item in items:
             if item == 'chopping_board':
                 for i_state in items[item]:
-                    new_item = ChoppingBoard('utensils', i_state, 'empty')
-                    self.world_state[item].append(new_item)
+                    new_item = ChoppingBoard('utensils', i_state, ItemState.EMPTY)
+                    registry.add(new_item)
             # elif item == 'extinguisher':
             #     for i_state in items[item]:
             #         new_item = Extinguisher('safety', i_state)
@@ -126,14 +138,14 @@ class OvercookedEnv(MapEnv):
             elif item == 'plate':
                 plate_idx = 1
                 for i_state in items[item]:
-                    new_item = Plate(plate_idx, 'utensils', i_state, 'empty')
-                    self.world_state[item].append(new_item)
+                    new_item = Plate(plate_idx, 'utensils', i_state, ItemState.EMPTY)
+                    registry.add(new_item)
                     plate_idx += 1
             elif item == 'pot':
                 pot_idx = 1
                 for i_state in items[item]:
                     new_item = Pot(pot_id=pot_idx, category='utensils', location=i_state, ingredient='', ingredient_count=defaultdict(int))
-                    self.world_state[item].append(new_item)
+                    registry.add(new_item)
                     pot_idx += 1
         
         for ingredient in ingredients:
@@ -157,16 +169,19 @@ class OvercookedEnv(MapEnv):
                 agent.astar_map = temp_astar_map
 
     def setup_agents(self):
+        agent_table = self.world_state['agent_table']
+        agent_labels = []
         if self.human_agents:
             for human_agent in self.human_agents:
                 agent_id = human_agent
                 coords = self.human_agents[agent_id]['coords']
                 self.agents[agent_id] = HumanAgent(
                     agent_id,
-                    coords
+                    coords,
+                    rng=self._spawn_agent_rng()
                 )
-                self.world_state['agents'].append(self.agents[agent_id])
-                self.results_filename += '_human'
+                agent_table.add(self.agents[agent_id])
+                agent_labels.append('_human')
         human_agent_count = len(self.human_agents) if self.human_agents else 0
         ai_agent_count = human_agent_count
         if self.ai_agents:
@@ -179,69 +194,58 @@ class OvercookedEnv(MapEnv):
                                         agent_id,
                                         coords,
                                         WALLS,
-                                        is_inference_agent=is_ToM
+                                        is_inference_agent=is_ToM,
+                                        rng=self._spawn_agent_rng()
                                     )
-                self.world_state['agents'].append(self.agents[agent_id])
-                self.results_filename += '_ai'
+                agent_table.add(self.agents[agent_id])
                 if is_ToM:
-                    self.results_filename += '_ToM'
+                    agent_labels.append('_ai_ToM')
                 else:
-                    self.results_filename += '_dummy'
+                    agent_labels.append('_ai_dummy')
+        self.results_filename += helpers.agents_label(agent_labels, '')
         self.custom_map_update()
 
+    def _spawn_agent_rng(self):
+        return np.random.default_rng(self.agents_seed_sequence.spawn(1)[0])
+
+    @profiling.profiled('find_agents_possible_goals')
     def find_agents_possible_goals(self, observers_task_to_not_do=[]):
         agent_goals = {}
         for agent in self.world_state['agents']:
             observer_task_to_not_do = []
-            if isinstance(agent, OvercookedAgent):
-                if observers_task_to_not_do:
-                    print(f'Observer to not do tasks')
-                    print(agent.id)
-                    print(agent.location)
-                    print(observers_task_to_not_do)
-                    observer_task_to_not_do = observers_task_to_not_do[agent]
-                agent_goals[agent] = agent.find_best_goal(observer_task_to_not_do)
-            else:
-                if isinstance(agent, HumanAgent):
-                    print(f'Dummy Agent goals')
-                    temp_OvercookedAgent = OvercookedAgent(
-                        agent.id,
-                        agent.location,
-                        agent.barriers,
-                        holding=agent.holding
-                    )
-                    temp_OvercookedAgent.world_state = self.world_state
-                    agent_goals[agent] = temp_OvercookedAgent.find_best_goal([])
-                    del temp_OvercookedAgent
+            # Only AI agents are steered by the observers; human agents are planned for as they are
+            if observers_task_to_not_do and isinstance(agent, OvercookedAgent):
+                if tracing.enabled:
+                    log.debug('Observer to not do tasks: %s %s %s', agent.id, agent.location, observers_task_to_not_do)
+                observer_task_to_not_do = observers_task_to_not_do[agent]
+            agent_goals[agent] = zobrist.find_best_goal(agent, observer_task_to_not_do)
         return agent_goals
 
+    @profiling.profiled('find_agents_best_goal')
     def find_agents_best_goal(self):
-        print('@overcooked_map_env - find_agents_best_goal()')
+        log.debug('@overcooked_map_env - find_agents_best_goal()')
         # Do inference here; skips inference for first timestep
         observers_task_to_not_do = {}
         for agent in self.world_state['agents']:
             if isinstance(agent, OvercookedAgent):
                 if agent.is_inference_agent and 'historical_world_state' in self.world_state:
-                    print(f'Do inference for ToM agent')
+                    log.debug('Do inference for ToM agent')
                     observers_inference_tasks = agent.observer_inference()
                     observers_task_to_not_do[agent] = observers_inference_tasks
                 else:
                     observers_task_to_not_do[agent] = []
 
         agents_possible_goals = self.find_agents_possible_goals(observers_task_to_not_do)
-        print(f'Agents possible goals')
-        for agent in agents_possible_goals:
-            print(agent)
-            print(agent.id)
-            print(agent.location)
-            print(agents_possible_goals[agent])
-        print(agents_possible_goals)
+        if tracing.enabled:
+            log.debug('Agents possible goals')
+            for agent in agents_possible_goals:
+                log.debug('Agent %s at %s: %s', agent.id, agent.location, agents_possible_goals[agent])
 
         assigned_best_goal = {}
         for agent in agents_possible_goals:
             tasks_rewards = [agents_possible_goals[agent][task]['rewards'] for task in agents_possible_goals[agent]]
-            print(f'Agent {agent.id} Task Rewards')
-            print(tasks_rewards)
+            if tracing.enabled:
+                log.debug('Agent %s Task Rewards %s', agent.id, tasks_rewards)
 
             if tasks_rewards:
                 softmax_best_goal = self._softmax(agents_possible_goals[agent], beta=0.5)
@@ -259,29 +263,29 @@ class OvercookedEnv(MapEnv):
                 # assigned_task = list(agents_possible_goals[agent])[assigned_task_idx]
                 # assigned_best_goal[agent] = [assigned_task, agents_possible_goals[agent][assigned_task]]
 
-                print(f'Softmax Best Goal:')
-                print(softmax_best_goal)
+                if tracing.enabled:
+                    log.debug('Softmax Best Goal: %s', softmax_best_goal)
                 all_best_paths = self.generate_possible_paths(agent, agents_possible_goals[agent][softmax_best_goal])
 
                 # best_path == -1; means there's no valid permutations, use the original path
                 if all_best_paths != -1:
-                    best_path = random.choice(all_best_paths)
+                    best_path = all_best_paths[self.rng.integers(len(all_best_paths))]
                     best_path.append(agents_possible_goals[agent][softmax_best_goal]['steps'][-1])
                     agents_possible_goals[agent][softmax_best_goal]['steps'] = best_path
                 else:
                     # Eg. Edge Case [1, {'steps': [], 'rewards': 0}]
                     if not agents_possible_goals[agent][softmax_best_goal]['steps']:
-                        agents_possible_goals[agent][softmax_best_goal]['steps'] = [8] # STAY
+                        agents_possible_goals[agent][softmax_best_goal]['steps'] = [STAY]
 
                 assigned_best_goal[agent] = [softmax_best_goal, agents_possible_goals[agent][softmax_best_goal]]
             else:
                 # If no task at hand, but blocking stations, move to valid cell randomly
                 if tuple(agent.location) in self.world_state['invalid_stay_cells']:
-                    print(f'Entered find random valid action')
+                    log.debug('Entered find random valid action')
                     random_valid_cell_move = self._find_random_valid_action(agent)
                     assigned_best_goal[agent] = [-1, {'steps': [random_valid_cell_move], 'rewards': -1}]
                 else:
-                    assigned_best_goal[agent] = [-1, {'steps': [8], 'rewards': -2}]
+                    assigned_best_goal[agent] = [-1, {'steps': [STAY], 'rewards': -2}]
         return assigned_best_goal
 
     def _softmax(self, rewards_dict, beta:int=1):
@@ -299,53 +303,40 @@ class OvercookedEnv(MapEnv):
         for key, value in softmax_dict.items():
             if value == max_softmax_val:
                 max_softmax_val_arr.append(key)
-        print('After softmax calculation')
-        print(softmax_dict)
+        if tracing.enabled:
+            log.debug('After softmax calculation: %s', softmax_dict)
         
-        # Okay to do random.choice even for 1 best task
-        return random.choice(max_softmax_val_arr)
+        # Okay to do a random choice even for 1 best task
+        return max_softmax_val_arr[self.rng.integers(len(max_softmax_val_arr))]
 
+    @profiling.profiled('generate_possible_paths')
     def generate_possible_paths(self, agent, best_goal):
-        print(f'Generating best possible path with softmax')
-        movement_count = 0
+        """
+        Equally rewarded variations of a goal's path (see path_permutations.py), whose first
+        movement steps on a free cell, or -1 if there are none
+        """
+        log.debug('Generating best possible path with softmax')
         cur_best_movements = []
         agent_end_idx = None
 
         for step in best_goal['steps']:
-            if isinstance(step, int):
-                movement_count += 1
-                cur_best_movements.append(step)
+            if step.is_move:
+                cur_best_movements.append(step.name)
             else:
-                agent_end_idx = step[-1]
+                # None for a DROP (its plan has no end cell), so no permutation of its path is kept
+                agent_end_idx = step.end_coord
         
         # Currently all movements give reward of -1 (so don't need to check)
-        print(f'Agent location:')
-        print(agent.location)
-
-        all_permutations = self._generate_permutations(cur_best_movements, agent, agent_end_idx)
-
-        all_valid_paths = []
-        for permutation in all_permutations:
-            hit_obstacle = False
-
-            temp_agent_location = list(agent.location).copy()
-            for movement in range(len(permutation)):
-                temp_agent_location = [sum(x) for x in zip(temp_agent_location, MAP_ACTIONS[permutation[movement]])]
-
-                # Check for obstacle in path; and movement == 0
-                if tuple(temp_agent_location) not in self.world_state['valid_cells'] and movement == 0:
-                    hit_obstacle = True
-                    continue
-            
-            # Append obstacle-free path
-            if not hit_obstacle:
-                all_valid_paths.append(
-                    list(map(
-                        lambda x: list(agent.actions.keys())[list(agent.actions.values()).index(x)],
-                        permutation)
-                    ))
-        
-        print(f'Done with all permutation mappings')
+        if tracing.enabled:
+            log.debug('Agent location: %s', agent.location)
+
+        # Permutations may pass through cells agents stand on, but not start with one
+        valid_cells = {tuple(cell) for cell in self.world_state['valid_cells']}
+        cells = valid_cells | self.world_state['agent_table'].cells()
+        all_valid_paths = PathPermutations(
+            agent.location, cur_best_movements, agent_end_idx, cells, valid_cells, agent.rewards
+        )
+        log.debug('Done with all permutation mappings')
         if all_valid_paths:
             return all_valid_paths
 
@@ -367,170 +358,9 @@ class OvercookedEnv(MapEnv):
 
             if tuple(temp_agent_location) in self.world_state['valid_cells']:
                 valid_random_cell_move.append(
-                    list(agent.actions.keys())[list(agent.actions.values()).index(movement)],
+                    MOVES[list(agent.actions.keys())[list(agent.actions.values()).index(movement)]],
                 )
-        print(f'Found all possible random movements')
-        print(valid_random_cell_move)
-
-        return random.choice(valid_random_cell_move)
-
-    def _generate_permutations(self, path, agent, agent_end_idx):
-        """
-        Permutations based on the heuristics that a diagonal movement can be split into 2 separate movements
-        Eg. MOVE_DIAGONAL_LEFT_UP -> MOVE_LEFT, MOVE_UP / MOVE_UP, MOVE_LEFT
-
-        First step determines action space
-        ----------------------------------
-        MOVE_LEFT -> MOVE_DIAGONAL_LEFT_UP, MOVE_DIAGONAL_LEFT_DOWN, MOVE_LEFT
-        MOVE_RIGHT -> MOVE_DIAGONAL_RIGHT_UP, MOVE_DIAGONAL_RIGHT_DOWN, MOVE_RIGHT
-        MOVE_UP -> MOVE_DIAGONAL_LEFT_UP, MOVE_DIAGONAL_RIGHT_UP, MOVE_UP
-        MOVE_DOWN -> MOVE_DIAGONAL_LEFT_DOWN, MOVE_DIAGONAL_RIGHT_DOWN, MOVE_DOWN
-        MOVE_DIAGONAL_LEFT_UP -> MOVE_LEFT, MOVE_UP, MOVE_DIAGONAL_LEFT_UP
-        MOVE_DIAGONAL_RIGHT_UP -> MOVE_RIGHT, MOVE_UP, MOVE_DIAGONAL_RIGHT_UP
-        MOVE_DIAGONAL_LEFT_DOWN -> MOVE_LEFT, MOVE_DOWN, MOVE_DIAGONAL_LEFT_DOWN
-        MOVE_DIAGONAL_RIGHT_DOWN -> MOVE_RIGHT, MOVE_DOWN, MOVE_DIAGONAL_RIGHT_DOWN
-        """
-        heuristic_mapping = {
-            'MOVE_LEFT': ['MOVE_DIAGONAL_LEFT_UP', 'MOVE_DIAGONAL_LEFT_DOWN', 'MOVE_LEFT'],
-            'MOVE_RIGHT': ['MOVE_DIAGONAL_RIGHT_UP', 'MOVE_DIAGONAL_RIGHT_DOWN', 'MOVE_RIGHT'],
-            'MOVE_UP': ['MOVE_DIAGONAL_LEFT_UP', 'MOVE_DIAGONAL_RIGHT_UP', 'MOVE_UP'],
-            'MOVE_DOWN': ['MOVE_DIAGONAL_LEFT_DOWN', 'MOVE_DIAGONAL_RIGHT_DOWN', 'MOVE_DOWN'],
-            'MOVE_DIAGONAL_LEFT_UP': ['MOVE_LEFT', 'MOVE_UP', 'MOVE_DIAGONAL_LEFT_UP'],
-            'MOVE_DIAGONAL_RIGHT_UP': ['MOVE_RIGHT', 'MOVE_UP', 'MOVE_DIAGONAL_RIGHT_UP'],
-            'MOVE_DIAGONAL_LEFT_DOWN': ['MOVE_LEFT', 'MOVE_DOWN', 'MOVE_DIAGONAL_LEFT_DOWN'],
-            'MOVE_DIAGONAL_RIGHT_DOWN': ['MOVE_RIGHT', 'MOVE_DOWN', 'MOVE_DIAGONAL_RIGHT_DOWN']
-        }
-        path = list(map(
-            lambda x: agent.actions[x],
-            path)
-        )
+        if tracing.enabled:
+            log.debug('Found all possible random movements: %s', valid_random_cell_move)
 
-        # Determine best reward from path
-        best_reward = sum([agent.rewards[action] for action in path])
-        print(f'Best reward: {best_reward}')
-        valid_permutations = []
-
-        def permutations_dp(
-            agent,
-            best_reward:int,
-            end_location,
-            cur_action_chain,
-            orig_action_chain,
-            heuristic_mapping,
-            dp_table,
-            valid_cells
-        ):
-            # weird np.array error
-            valid_cells = [tuple(cell) for cell in valid_cells]
-            # still have actions left to take
-            cur_step = len(orig_action_chain) - len(cur_action_chain)
-
-            if not cur_action_chain:
-                return
-            
-            # Next action to take
-            action = cur_action_chain[0]
-            # print(f'Current action is: {action}')
-            # Returns list of next possible actions to take
-            heuristic_map = heuristic_mapping[action]
-
-            # TO-DO: Add in checks if end_location for current iteration is a valid cell
-            if cur_step == 0:
-                cur_reward = 0
-                # print(f'Entered cur_step == 0')
-
-                for heuristic_action in heuristic_map:
-                    heuristic_reward = agent.rewards[heuristic_action]
-                    new_reward = cur_reward + heuristic_reward
-                    new_location = [sum(x) for x in zip(list(agent.location), MAP_ACTIONS[heuristic_action])]
-                    new_path = [heuristic_action]
-
-                    # If its a DIAGONAL movement
-                    if 'DIAGONAL' in action and 'DIAGONAL' not in heuristic_action:
-                        second_action = heuristic_second_action(action, heuristic_action)
-                        second_reward = agent.rewards[second_action]
-                        new_reward += second_reward
-                        new_location = [sum(x) for x in zip(new_location, MAP_ACTIONS[second_action])]
-                        new_path.append(second_action)
-
-                    # If still possible to find best reward and not ending in invalid cell
-                    if (new_reward > best_reward) and (tuple(new_location) in valid_cells):
-                        dp_table[cur_step].append(
-                            {
-                                'cur_reward': new_reward,
-                                'cur_path': new_path,
-                                'cur_location': new_location
-                            }
-                        )
-                    
-                    if (new_reward == best_reward) and (new_location == list(end_location)):
-                        valid_permutations.append(new_path)
-            else:
-                # print(f'Entered cur_step != 0')
-                # Returns valid existing path by far; List of Tuple (cost:int, steps:List[int])
-                cur_valid_paths = dp_table[cur_step-1]
-
-                for path_info in cur_valid_paths:
-                    cur_reward = path_info['cur_reward']
-                    cur_location = path_info['cur_location']
-                    cur_path = path_info['cur_path']
-
-                    for heuristic_action in heuristic_map:
-                        heuristic_reward = agent.rewards[heuristic_action]
-                        new_reward = cur_reward + heuristic_reward
-                        new_location = [sum(x) for x in zip(cur_location, MAP_ACTIONS[heuristic_action])]
-                        new_path = cur_path.copy()
-                        new_path.append(heuristic_action)
-
-                        if (new_reward > best_reward) and (tuple(new_location) in valid_cells):
-                            dp_table[cur_step].append(
-                                {
-                                    'cur_reward': new_reward,
-                                    'cur_path': new_path,
-                                    'cur_location': new_location
-                                }
-                            )
-                        
-                        if (new_reward == best_reward) and (new_location == list(end_location)):
-                            valid_permutations.append(new_path)
-            
-            # Remove completed action
-            cur_action_chain.pop(0)
-            permutations_dp(
-                agent, best_reward, end_location, cur_action_chain,
-                orig_action_chain, heuristic_mapping, dp_table, valid_cells
-            )
-
-        # Use heuristics to reduce action space
-        valid_cells = self.world_state['valid_cells'].copy()
-        locs = [agent.location for agent in self.world_state['agents']]
-        for loc in locs:
-            valid_cells.append(loc)
-        permutations_dp(
-            agent, best_reward, agent_end_idx, path.copy(), path.copy(),
-            heuristic_mapping, defaultdict(list), valid_cells
-        )
-        print(f'Done with generating valid permutations')
-
-        return valid_permutations
-    
-def heuristic_second_action(diagonal_action, taken_adj_action):
-    heuristic_action_mapping_alt = {
-        'MOVE_DIAGONAL_LEFT_UP': {
-            'MOVE_LEFT': 'MOVE_UP',
-            'MOVE_UP': 'MOVE_LEFT'
-        },
-        'MOVE_DIAGONAL_RIGHT_UP': {
-            'MOVE_RIGHT': 'MOVE_UP',
-            'MOVE_UP': 'MOVE_RIGHT'
-        },
-        'MOVE_DIAGONAL_LEFT_DOWN': {
-            'MOVE_LEFT': 'MOVE_DOWN',
-            'MOVE_DOWN': 'MOVE_LEFT'
-        },
-        'MOVE_DIAGONAL_RIGHT_DOWN': {
-            'MOVE_RIGHT': 'MOVE_DOWN',
-            'MOVE_DOWN': 'MOVE_RIGHT'
-        }
-    }
-    return heuristic_action_mapping_alt[diagonal_action][taken_adj_action]
\ No newline at end of file
+        return valid_random_cell_move[self.rng.integers(len(valid_random_cell_move))]
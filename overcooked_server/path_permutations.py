@@ -0,0 +1,191 @@
+"""
+Path Permutations
+-----------------
+The equally rewarded variations of a planned path, counted instead of enumerated.
+
+A path is varied step by step (see STEP_ALTERNATIVES): a straight movement may be
+taken diagonally and a diagonal one straight, and the first diagonal may be split
+into its two straight movements. Every variation that stays on free cells and
+reaches the path's end with the same reward is a permutation. Their number grows
+exponentially with the path length, so on large maps listing them (to draw one at
+random) took most of a timestep.
+
+`PathPermutations` is a read-only sequence of them in the order they used to be
+listed (by the step of the path they end on, then by the alternatives taken at each
+step), so `paths[rng.integers(len(paths))]` draws the same path as before. Only the
+number of permutations reachable from each (step, cell, reward) is stored; the i-th
+permutation is built by walking down those counts.
+"""
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from action_handlers import Action, MOVES, OPCODES
+from settings import MAP_ACTIONS
+
+# Movements a path step may be replaced by, in the order they are tried
+STEP_ALTERNATIVES = {
+    'MOVE_LEFT': ['MOVE_DIAGONAL_LEFT_UP', 'MOVE_DIAGONAL_LEFT_DOWN', 'MOVE_LEFT'],
+    'MOVE_RIGHT': ['MOVE_DIAGONAL_RIGHT_UP', 'MOVE_DIAGONAL_RIGHT_DOWN', 'MOVE_RIGHT'],
+    'MOVE_UP': ['MOVE_DIAGONAL_LEFT_UP', 'MOVE_DIAGONAL_RIGHT_UP', 'MOVE_UP'],
+    'MOVE_DOWN': ['MOVE_DIAGONAL_LEFT_DOWN', 'MOVE_DIAGONAL_RIGHT_DOWN', 'MOVE_DOWN'],
+    'MOVE_DIAGONAL_LEFT_UP': ['MOVE_LEFT', 'MOVE_UP', 'MOVE_DIAGONAL_LEFT_UP'],
+    'MOVE_DIAGONAL_RIGHT_UP': ['MOVE_RIGHT', 'MOVE_UP', 'MOVE_DIAGONAL_RIGHT_UP'],
+    'MOVE_DIAGONAL_LEFT_DOWN': ['MOVE_LEFT', 'MOVE_DOWN', 'MOVE_DIAGONAL_LEFT_DOWN'],
+    'MOVE_DIAGONAL_RIGHT_DOWN': ['MOVE_RIGHT', 'MOVE_DOWN', 'MOVE_DIAGONAL_RIGHT_DOWN']
+}
+# Second half of a diagonal taken as two straight movements, by the first one
+DIAGONAL_SPLITS = {
+    'MOVE_DIAGONAL_LEFT_UP': {'MOVE_LEFT': 'MOVE_UP', 'MOVE_UP': 'MOVE_LEFT'},
+    'MOVE_DIAGONAL_RIGHT_UP': {'MOVE_RIGHT': 'MOVE_UP', 'MOVE_UP': 'MOVE_RIGHT'},
+    'MOVE_DIAGONAL_LEFT_DOWN': {'MOVE_LEFT': 'MOVE_DOWN', 'MOVE_DOWN': 'MOVE_LEFT'},
+    'MOVE_DIAGONAL_RIGHT_DOWN': {'MOVE_RIGHT': 'MOVE_DOWN', 'MOVE_DOWN': 'MOVE_RIGHT'}
+}
+
+class PathPermutations:
+    def __init__(
+        self,
+        start: Tuple[int,int],
+        moves: List[str],
+        end: Optional[Tuple[int,int]],
+        cells: Set[Tuple[int,int]],
+        first_cells: Set[Tuple[int,int]],
+        rewards: Dict[str, int]
+    ) -> None:
+        """
+        Parameters
+        ----------
+        start: Tuple[int,int]
+            Cell the path starts from
+        moves: List[str]
+            Movements of the planned path, eg. ['MOVE_LEFT', 'MOVE_DIAGONAL_LEFT_UP']
+        end: Tuple[int,int]
+            Cell the path must end on; None (eg. a DROP plan) has no permutations
+        cells: Set[Tuple[int,int]]
+            Cells a permutation may step on
+        first_cells: Set[Tuple[int,int]]
+            Cells the first movement of a permutation may step on
+        rewards: Dict[str, int]
+            Reward of every movement (agent_configs.REWARDS)
+        """
+        self.start = tuple(start)
+        self.moves = moves
+        self.end = None if end is None else tuple(end)
+        self.cells = cells
+        self.first_cells = first_cells
+        self.rewards = rewards
+        self.best_reward = sum(rewards[move] for move in moves)
+        # Least reward a movement costs per cell (in Manhattan distance) it moves
+        self._cell_cost = min(-rewards[move] / (abs(MAP_ACTIONS[move][0]) + abs(MAP_ACTIONS[move][1])) for move in STEP_ALTERNATIVES)
+        # (step, cell, reward) -> permutations from there, by the step they end on
+        self._counts = {}
+        self._steps = {}
+        # Built permutations by index (inference draws the same ones many times)
+        self._paths = {}
+        self.counts_by_end_step = [0] * len(moves)
+        for fragment, cell, reward, ends in self._first_steps():
+            self._add_counts(self.counts_by_end_step, 0, cell, reward, ends)
+        self._length = sum(self.counts_by_end_step)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, idx: int) -> List[Action]:
+        if not 0 <= idx < self._length:
+            raise IndexError('path permutation index out of range')
+        path = self._paths.get(idx)
+        if path is None:
+            path = self._paths[idx] = self._build(idx)
+        # Callers extend the path they are given
+        return list(path)
+
+    def _build(self, idx: int) -> List[Action]:
+        end_step = 0
+        while idx >= self.counts_by_end_step[end_step]:
+            idx -= self.counts_by_end_step[end_step]
+            end_step += 1
+
+        path = []
+        steps = self._first_steps()
+        for step in range(end_step+1):
+            for fragment, cell, reward, ends in steps:
+                if step == end_step:
+                    count = int(ends)
+                elif self._continues(step, cell, reward):
+                    count = self._count(step+1, cell, reward)[end_step]
+                else:
+                    count = 0
+                if idx < count:
+                    break
+                idx -= count
+            path += fragment
+            if step < end_step:
+                steps = self._next_steps(step+1, cell, reward)
+        return [MOVES[OPCODES[move]] for move in path]
+
+    def _first_steps(self) -> List[Tuple[List[str], Tuple[int,int], int, bool]]:
+        # As _next_steps, incl. a diagonal split in two; only steps onto first_cells are kept
+        if not self.moves:
+            return []
+        steps = []
+        move = self.moves[0]
+        for alternative in STEP_ALTERNATIVES[move]:
+            first_cell = _moved(self.start, alternative)
+            fragment = [alternative]
+            cell = first_cell
+            reward = self.rewards[alternative]
+            if 'DIAGONAL' in move and 'DIAGONAL' not in alternative:
+                second = DIAGONAL_SPLITS[move][alternative]
+                fragment.append(second)
+                cell = _moved(cell, second)
+                reward += self.rewards[second]
+            if first_cell in self.first_cells:
+                steps.append((fragment, cell, reward, self._ends(cell, reward)))
+        return steps
+
+    def _next_steps(self, step: int, cell: Tuple[int,int], reward: int) -> List[Tuple[List[str], Tuple[int,int], int, bool]]:
+        """(movements, cell, reward, whether the permutation ends there) of every alternative for a step"""
+        key = (step, cell, reward)
+        steps = self._steps.get(key)
+        if steps is None:
+            steps = self._steps[key] = []
+            for alternative in STEP_ALTERNATIVES[self.moves[step]]:
+                next_cell = _moved(cell, alternative)
+                next_reward = reward + self.rewards[alternative]
+                steps.append(([alternative], next_cell, next_reward, self._ends(next_cell, next_reward)))
+        return steps
+
+    def _ends(self, cell: Tuple[int,int], reward: int) -> bool:
+        return reward == self.best_reward and self.end is not None and cell == self.end
+
+    def _continues(self, step: int, cell: Tuple[int,int], reward: int) -> bool:
+        # Alternatives that already cost as much as the whole path are not followed,
+        # nor those left with less reward than it takes to get to the end
+        return (
+            reward > self.best_reward and cell in self.cells and step+1 < len(self.moves)
+            and self.end is not None
+            and reward - self.best_reward >= self._cell_cost * (abs(cell[0]-self.end[0]) + abs(cell[1]-self.end[1]))
+        )
+
+    def _add_counts(self, counts: List[int], step: int, cell: Tuple[int,int], reward: int, ends: bool) -> None:
+        if ends:
+            counts[step] += 1
+        elif self._continues(step, cell, reward):
+            for end_step, count in enumerate(self._count(step+1, cell, reward)):
+                counts[end_step] += count
+
+    def _count(self, step: int, cell: Tuple[int,int], reward: int) -> List[int]:
+        key = (step, cell, reward)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = [0] * len(self.moves)
+            for fragment, next_cell, next_reward, ends in self._next_steps(step, cell, reward):
+                self._add_counts(counts, step, next_cell, next_reward, ends)
+            self._counts[key] = counts
+        return counts
+
+def _moved(cell: Tuple[int,int], move: str) -> Tuple[int,int]:
+    d_row, d_col = MAP_ACTIONS[move]
+    return (cell[0]+d_row, cell[1]+d_col)
@@ -0,0 +1,512 @@
+"""
+Planner
+-------
+Goal planning shared by every kind of agent.
+
+`Planner` is mixed into OvercookedAgent and HumanAgent, and plans from the agent's
+own location, holding, world_state view, A* map and rng, so human-controlled
+agents are planned for (eg. by the ToM observers) without building a temporary
+OvercookedAgent and A* graph for them every step.
+
+Classes mixing it in provide `world_state`, `location`, `holding`, `astar_map`,
+`rng`, `actions` and `rewards`.
+"""
+from typing import List
+from typing import Tuple
+
+from collections import defaultdict
+import numpy as np
+
+from action_handlers import GOAL_HANDLERS, MOVES, Action, action_handler, goal_handler
+from astar_search import BARRIER_COST
+from goal_table import GoalEntry
+from overcooked_item_classes import Ingredient, ItemState, Plate
+from settings import RECIPES_INFO, RECIPE_ACTION_NAME, INGREDIENT_ACTION_NAME, \
+    MAP_ACTIONS, RECIPES_ACTION_MAPPING
+import profiling
+import tracing
+
+log = tracing.get_logger('agent')
+
+class Planner:
+    __slots__ = ()
+
+    @profiling.profiled('calc_travel_cost')
+    def calc_travel_cost(self, items: List[str], items_coords: List[List[Tuple[int,int]]]):
+        # get valid cells for each goal
+        item_valid_cell_states = defaultdict(list)
+        for item_idx in range(len(items)):
+            item_valid_cell_states[items[item_idx]] = self.find_valid_cell(items_coords[item_idx])
+
+        travel_costs = defaultdict(tuple)
+        for item_idx in range(len(items)):
+            cur_item_instances = items_coords[item_idx]
+            for cur_item_instance in cur_item_instances:
+                try:
+                    valid_cells = item_valid_cell_states[items[item_idx]][cur_item_instance]
+                    # Edge case: Multiple plates/pots and already at an empty one
+                    # if len(valid_cells) == 0:
+                    #     # No need to move
+                    #     travel_costs[items[item_idx]] = ([], 0, cur_item_instance)
+                    for valid_cell in valid_cells:
+                        # No path is shorter than the heuristic (the Chebyshev distance), so cells
+                        # farther away than the cheapest path found can neither beat nor tie it, and
+                        # are not searched
+                        if travel_costs[items[item_idx]] and \
+                            self.astar_map.heuristic(tuple(self.location), valid_cell) > travel_costs[items[item_idx]][1]:
+                            continue
+                        temp_item_instance = self.AStarSearch(valid_cell)
+                        if not travel_costs[items[item_idx]]:
+                            travel_costs[items[item_idx]] = (temp_item_instance[0], temp_item_instance[1], cur_item_instance)
+                        else:
+                            if travel_costs[items[item_idx]][1] == temp_item_instance[1]:
+                                # Randomizing item instance to go towards should prevents being stuck
+                                random_int = self.rng.integers(2)
+                                temp_item_instance = list(temp_item_instance)
+                                temp_item_instance.append(cur_item_instance)
+                                temp_item_instance = tuple(temp_item_instance)
+
+                                random_selection = [travel_costs[items[item_idx]], temp_item_instance][random_int]
+                                travel_costs[items[item_idx]] = random_selection
+                            # Only replace if existing travel cost is greater (ensure only 1 path is returned given same cost)
+                            elif travel_costs[items[item_idx]][1] > temp_item_instance[1]:
+                                travel_costs[items[item_idx]] = (temp_item_instance[0], temp_item_instance[1], cur_item_instance)
+                            continue
+                except KeyError:
+                    raise KeyError('No valid path to get to item!')
+        return travel_costs
+
+    @profiling.profiled('astar')
+    def AStarSearch(self, dest_coords: Tuple[int,int]):
+        """
+        A* Path-finding algorithm
+        Type: Heuristic-Search - Informed Search Algorithm
+
+        F: Estimated movement cost of start to end going via this position
+        G: Actual movement cost to each position from the start position
+        H: heuristic - estimated distance from the current node to the end node
+
+        It is important for heuristic to always be an underestimation of the total path, as an overestimation
+        will lead to A* searching through nodes that may not be the 'best' in terms of f value.
+
+        TO-DO: Invert calculations
+        """
+        start = tuple(self.location)
+        end = dest_coords
+        G = {}
+        F = {}
+    
+        # Initialize starting values
+        G[start] = 0 
+        F[start] = self.astar_map.heuristic(start, end)
+    
+        closedVertices = set()
+        openVertices = set([start])
+        cameFrom = {}
+        barriers = self.astar_map.barrier_cells()
+    
+        while len(openVertices) > 0:
+            # Get the vertex in the open list with the lowest F score
+            current = None
+            currentFscore = None
+            for pos in openVertices:
+                if current is None or F[pos] < currentFscore:
+                    currentFscore = F[pos]
+                    current = pos
+    
+            # Check if we have reached the goal
+            if current == end:
+                # Retrace our route backward
+                path = [current]
+                while current in cameFrom:
+                    current = cameFrom[current]
+                    path.append(current)
+                path.reverse()
+                if profiling.enabled:
+                    profiling.count('astar_expansions', len(closedVertices))
+                return path, F[end] # Done!
+    
+            # Mark the current vertex as closed
+            openVertices.remove(current)
+            closedVertices.add(current)
+    
+            # Update scores for vertices near the current position
+            for neighbour in self.astar_map.get_vertex_neighbours(current):
+                if neighbour in closedVertices: 
+                    continue # We have already processed this node exhaustively
+                candidateG = G[current] + (BARRIER_COST if neighbour in barriers else 1)
+
+                if neighbour not in openVertices:
+                    openVertices.add(neighbour) # Discovered a new vertex
+                elif candidateG >= G[neighbour]:
+                    continue # This G score is worse than previously found
+    
+                #Adopt this G score
+                cameFrom[neighbour] = current
+                G[neighbour] = candidateG
+                H = self.astar_map.heuristic(neighbour, end)
+                F[neighbour] = G[neighbour] + H
+    
+        raise RuntimeError("A* failed to find a solution")
+
+    def find_valid_cell(self, item_coords: List[Tuple[int,int]]) -> Tuple[int,int]:
+        """
+        Items can only be accessible from Up-Down-Left-Right of item cell.
+        Get all cells agent can step on to access item.
+
+        Returns
+        -------
+        all_valid_cells: Dict[str,List[Tuple[int,int]]]
+        """
+        all_valid_cells = defaultdict(list)
+        # item_instance is Tuple[int,int]
+        # removing agent.location from valid_cells screws this check up
+
+        agent_locs = self.world_state['agent_table'].cells()
+        for item_instance in item_coords:
+            # Edge Case: Convert elif to if statements to consider item pick-up points with 2 valid end_coords
+            if (item_instance[0], item_instance[1]+1) in self.world_state['valid_cells']:
+                all_valid_cells[item_instance].append((item_instance[0], item_instance[1]+1))
+            if (item_instance[0], item_instance[1]-1) in self.world_state['valid_cells']:
+                all_valid_cells[item_instance].append((item_instance[0], item_instance[1]-1))
+            if (item_instance[0]-1, item_instance[1]) in self.world_state['valid_cells']:
+                all_valid_cells[item_instance].append((item_instance[0]-1, item_instance[1]))
+            if (item_instance[0]+1, item_instance[1]) in self.world_state['valid_cells']:
+                all_valid_cells[item_instance].append((item_instance[0]+1, item_instance[1]))
+
+            if (item_instance[0], item_instance[1]+1) not in self.world_state['valid_cells'] \
+                and (item_instance[0], item_instance[1]+1) in agent_locs:
+                    all_valid_cells[item_instance].append((item_instance[0], item_instance[1]+1))
+            if (item_instance[0], item_instance[1]-1) not in self.world_state['valid_cells'] \
+                and (item_instance[0], item_instance[1]-1) in agent_locs:
+                    all_valid_cells[item_instance].append((item_instance[0], item_instance[1]-1))
+            if (item_instance[0]-1, item_instance[1]) not in self.world_state['valid_cells'] \
+                and (item_instance[0]-1, item_instance[1]) in agent_locs:
+                    all_valid_cells[item_instance].append((item_instance[0]-1, item_instance[1]))
+            if (item_instance[0]+1, item_instance[1]) not in self.world_state['valid_cells'] \
+                and (item_instance[0]+1, item_instance[1]) in agent_locs:
+                    all_valid_cells[item_instance].append((item_instance[0]+1, item_instance[1]))
+
+        return all_valid_cells
+
+    def map_path_actions(self, path: List[Tuple[int,int]]) -> List[Action]:
+        path_actions_mapping = []
+        for step in range(len(path)-1):
+            cur_pos = path[step]
+            next_pos = path[step+1]
+            difference = tuple(np.subtract(next_pos, cur_pos))
+            if difference == (0, -1):
+                path_actions_mapping.append(MOVES[0])
+            elif difference == (0, 1):
+                path_actions_mapping.append(MOVES[1])
+            elif difference == (-1, 0):
+                path_actions_mapping.append(MOVES[2])
+            elif difference == (1, 0):
+                path_actions_mapping.append(MOVES[3])
+            elif difference == (-1, -1):
+                path_actions_mapping.append(MOVES[4])
+            elif difference == (-1, 1):
+                path_actions_mapping.append(MOVES[5])
+            elif difference == (1, -1):
+                path_actions_mapping.append(MOVES[6])
+            elif difference == (1, 1):
+                path_actions_mapping.append(MOVES[7])
+        return path_actions_mapping
+
+    @profiling.profiled('find_best_goal')
+    def find_best_goal(self, observer_filtered_goals=[]):
+        agent_goal_costs = defaultdict(dict)
+        goal_space = self.world_state['goal_space']
+
+        final_goal_list = [goal for goal in goal_space if goal not in observer_filtered_goals]
+        final_goal_list = [goal for goal in final_goal_list if goal_space.counts[goal] > 0]
+
+        # For all goals in final_goal_list, can access info through first element
+        for goal in final_goal_list:
+            handler = GOAL_HANDLERS.get(goal)
+            if handler is None:
+                continue
+            task_info = goal_space.peek(goal)
+            if tracing.enabled:
+                log.debug('@agent - Entered %s logic: %s', handler.kind, task_info)
+            plan = handler.plan(self, goal, task_info)
+            if plan is None:
+                continue
+            # A goal may be planned as the goal before it (eg. SERVE as SCOOP)
+            goal, path_actions = plan
+
+            total_rewards = 0
+            for action in path_actions:
+                if action.is_move:
+                    total_rewards += self.rewards[self.actions[action.opcode]]
+                else:
+                    # Missing penalty for taking same task (steps to take after pursueing something another agent is doing)
+                    total_rewards += action_handler(action).reward(action, self.rewards)
+            if self.contains_invalid(path_actions):
+                pass
+            else:
+                agent_goal_costs[goal] = {
+                    'steps': path_actions,
+                    'rewards': total_rewards
+                }
+        return agent_goal_costs
+
+    # GOAL HANDLERS: plan(goal, task_info) -> (goal, path_actions), or None to skip the goal
+    @goal_handler('PICK')
+    def plan_pick(self, goal: int, task_info: GoalEntry):
+        # Case: Holding object and has to be dropped first
+        if self.holding:
+            return goal, self._plan_drop('PICK')
+
+        # Case: Not holding ingredient and it does not exist in map
+        station = 'ingredient_' + task_info.ingredient
+        path_actions = []
+        path_cost = self.calc_travel_cost([station], [self.world_state[station]])
+        task_coord = self.world_state[station][0]
+        end_coord = self.location # no need to move anymore
+        if path_cost:
+            end_coord = path_cost[station][0][-1]
+            path_actions += self.map_path_actions(path_cost[station][0])
+
+        path_actions.append(Action.task(
+            'PICK', task_coord=task_coord, end_coord=end_coord, is_last=True,
+            is_new=True, pick_type='ingredient', for_task='PICK'
+        ))
+        return goal, path_actions
+
+    @goal_handler('CHOP')
+    def plan_chop(self, goal: int, task_info: GoalEntry):
+        if not self.holding:
+            # Case: Not holding ingredient but it exist in map
+            wanted_ingredient = self._ingredient_cells(task_info)
+            if not wanted_ingredient:
+                # Should we make default behaviour to pick up new ingredient from crate?
+                return None
+            return goal, self._plan_pick_up('ingredient_'+task_info.ingredient, wanted_ingredient, 'ingredient', 'CHOP')
+
+        if not self._holds_ingredient(task_info):
+            return goal, self._plan_drop('CHOP')
+
+        path_actions = []
+        try:
+            chopping_board_cells = [
+                board.location for board in self.world_state['item_registry'].in_state('chopping_board', ItemState.EMPTY)
+            ]
+            chopping_path_cost = self.calc_travel_cost(['chopping_board'], [chopping_board_cells])
+            task_coord = chopping_board_cells[0]
+            end_coord = self.location # no need to move anymore
+
+            if chopping_path_cost:
+                task_coord = chopping_path_cost['chopping_board'][2]
+                end_coord = chopping_path_cost['chopping_board'][0][-1]
+                chopping_path_actions = self.map_path_actions(chopping_path_cost['chopping_board'][0])
+                path_actions += chopping_path_actions
+            path_actions.append(Action.task('CHOP', task_coord=task_coord, end_coord=end_coord, is_last=True))
+        except IndexError:
+            # No empty chopping board
+            return None
+        return goal, path_actions
+
+    @goal_handler('COOK')
+    def plan_cook(self, goal: int, task_info: GoalEntry):
+        """ CONDITION TO FULFIL: Holding chopped onion """
+        if not self.holding:
+            # Case: Not holding ingredient but it exist in map
+            wanted_ingredient = self._ingredient_cells(task_info)
+            if not wanted_ingredient:
+                # Should we make default behaviour to pick up new ingredient from crate?
+                log.debug('SHOULD WE DEFAULT BEHAVIOUR?')
+                return None
+            return goal, self._plan_pick_up('ingredient_'+task_info.ingredient, wanted_ingredient, 'ingredient', 'COOK')
+
+        if isinstance(self.holding, Plate):
+            return goal, self._plan_drop('PLATE')
+        if not self._holds_ingredient(task_info):
+            return goal, self._plan_drop('COOK')
+
+        recipe_ingredient_count = self.get_recipe_ingredient_count(task_info.recipe, task_info.ingredient)
+        recipe_total_ingredients_count = self.get_recipe_total_ingredient_count(task_info.recipe)
+        # Fill pot with ingredient before considering empty pots
+        pot_cells = []
+        for pot in self.world_state['pot']:
+            # complex recipe
+            curr_pot_ingredient_count = sum(pot.ingredient_count.values())
+            if curr_pot_ingredient_count > 1:
+                if (pot.ingredient_count[task_info.ingredient] < recipe_ingredient_count) and (pot.ingredient_count[task_info.ingredient] == 0) and (recipe_total_ingredients_count > 0):
+                    pot_cells.append(pot.location)
+                elif (pot.ingredient_count[task_info.ingredient] < recipe_ingredient_count) and (pot.ingredient_count[task_info.ingredient] == 0) and (recipe_total_ingredients_count == 0):
+                    pot_cells.append(pot.location)
+                elif (pot.ingredient_count[task_info.ingredient] < recipe_ingredient_count) and (curr_pot_ingredient_count > 0):
+                    pot_cells.append(pot.location)
+            else:
+                # > 0 to prioritize filling up pot already with ingredients
+                if (pot.ingredient_count[task_info.ingredient] < recipe_ingredient_count) and (curr_pot_ingredient_count > 0):
+                    pot_cells.append(pot.location)
+        if not pot_cells:
+            pot_cells = [pot.location for pot in self.world_state['pot'] if pot.is_empty]
+        if not pot_cells:
+            # If still no available pots
+            # TO-FIX: Causes inference agent to pick and drop continuously because no pot to cook at
+            log.debug('agent@cook - Trying to cook but no available pot')
+            return None
+
+        path_actions = []
+        cooking_path_cost = self.calc_travel_cost(['pot'], [pot_cells])
+
+        # TO-FIX (if > 1, randomly choose 1)
+        task_coord = cooking_path_cost['pot'][2]
+        end_coord = self.location # no need to move anymore
+
+        if cooking_path_cost:
+            end_coord = cooking_path_cost['pot'][0][-1]
+            cooking_path_actions = self.map_path_actions(cooking_path_cost['pot'][0])
+            path_actions += cooking_path_actions
+        path_actions.append(Action.task('COOK', task_coord=task_coord, end_coord=end_coord, is_last=True))
+        return goal, path_actions
+
+    @goal_handler('SCOOP')
+    def plan_scoop(self, goal: int, task_info: GoalEntry):
+        """ CONDITION TO FULFIL: Holding empty plate """
+        if not self.holding:
+            try:
+                # If plate exists in the map
+                plate_board_cells = [plate.location for plate in self.world_state['plate']]
+                return goal, self._plan_pick_up('plate', plate_board_cells, 'plate', 'SCOOP')
+            except IndexError:
+                log.debug('@base_agent - scoop IndexError')
+                return None
+
+        if not isinstance(self.holding, Plate) or self.holding.state != task_info.state:
+            return goal, self._plan_drop('SCOOP')
+
+        try:
+            return goal, self._plan_collect(self.get_recipe_name(goal))
+        # If pot with dish does not exists
+        except IndexError:
+            return None
+
+    @goal_handler('SERVE')
+    def plan_serve(self, goal: int, task_info: GoalEntry):
+        """ CONDITION TO FULFIL: Holding plated plate """
+        if not self.holding:
+            log.debug('@base_agent - Entered serve logic')
+            # If plate exists in the map and there is dish to serve
+            if sum(self.world_state['cooked_dish_count'].values()) > 0:
+                plate_board_cells = [plate.location for plate in self.world_state['plate']]
+                return goal, self._plan_pick_up('plate', plate_board_cells, 'plate', 'SERVE')
+            return None
+
+        if not isinstance(self.holding, Plate):
+            return goal, self._plan_drop('SERVE')
+
+        if self.holding.state != task_info.state:
+            try:
+                path_actions = self._plan_collect(self.get_recipe_name(goal))
+            # If pot with dish does not exists
+            except IndexError:
+                return None
+            return goal - 1, path_actions # assume SCOOP is always before SERVE
+
+        log.debug('@base_agent - Entered serve logic')
+        path_actions, task_coord, end_coord = self._plan_travel('service_counter', self.world_state['service_counter'])
+        path_actions.append(Action.task('SERVE', task_coord=task_coord, end_coord=end_coord, is_last=True))
+        return goal, path_actions
+
+    def _plan_travel(self, key: str, cells: List[Tuple[int,int]]):
+        """
+        Path to the closest of `cells`
+
+        Returns
+        -------
+        (path_actions, task_coord, end_coord); IndexError if none of the cells can be reached
+        """
+        path_cost = self.calc_travel_cost([key], [cells])
+        task_coord = path_cost[key][2]
+        end_coord = path_cost[key][0][-1]
+        return self.map_path_actions(path_cost[key][0]), task_coord, end_coord
+
+    def _plan_drop(self, for_task: str):
+        """Drop what is in hand on the closest free table-top"""
+        path_actions, _, _ = self._plan_travel('valid_item_cells', self.world_state['valid_item_cells'])
+        path_actions.append(Action.task('DROP', for_task=for_task))
+        return path_actions
+
+    def _plan_pick_up(self, key: str, cells: List[Tuple[int,int]], pick_type: str, for_task: str):
+        """Pick up the closest item (an ingredient or plate lying in the map) for a task"""
+        path_actions, task_coord, end_coord = self._plan_travel(key, cells)
+        path_actions.append(Action.task(
+            'PICK', task_coord=task_coord, end_coord=end_coord, pick_type=pick_type, for_task=for_task
+        ))
+        return path_actions
+
+    def _plan_collect(self, dish: str):
+        """Scoop a cooked dish from its pot onto the plate in hand; IndexError if no pot holds it"""
+        pot_cells = [pot.location for pot in self.world_state['pot'] if pot.dish == dish]
+        path_actions, task_coord, end_coord = self._plan_travel('pot', pot_cells)
+        path_actions.append(Action.task('SCOOP', task_coord=task_coord, end_coord=end_coord, is_last=True))
+        return path_actions
+
+    def _ingredient_cells(self, task_info: GoalEntry) -> List[Tuple[int,int]]:
+        """Cells of the ingredients lying in the map that a task is for"""
+        return [
+            ingredient.location for ingredient in self.world_state['item_registry'].in_state('ingredients', task_info.state)
+            if ingredient.name == task_info.ingredient
+        ]
+
+    def _holds_ingredient(self, task_info: GoalEntry) -> bool:
+        return isinstance(self.holding, Ingredient) and self.holding.name == task_info.ingredient \
+            and self.holding.state == task_info.state
+
+    def contains_invalid(self, check_list):
+        check_list_coords = []
+        for ele in check_list:
+            if ele.is_move:
+                new_cell_movemet = MAP_ACTIONS[ele.name]
+                if not check_list_coords:
+                    new_coords = tuple([sum(x) for x in zip(list(self.location), new_cell_movemet)])
+                else:
+                    new_coords = tuple([sum(x) for x in zip(list(check_list_coords[-1]), new_cell_movemet)])
+                check_list_coords.append(new_coords)
+
+        invalid_flag = False
+        for coords in check_list_coords:
+            if coords in self.world_state['invalid_movement_cells']:
+                invalid_flag = True
+                break
+        return invalid_flag
+
+    def get_recipe_ingredient_count(self, recipe, ingredient):
+        recipe_ingredient_count = RECIPES_INFO[recipe][ingredient]
+        
+        return recipe_ingredient_count
+
+    def get_recipe_dish(self, ingredient):
+        recipe_dish = None
+        for recipe in RECIPES_INFO:
+            if RECIPES_INFO[recipe]['ingredient'] == ingredient:
+                recipe_dish = recipe
+        
+        return recipe_dish
+    
+    def get_recipe_total_ingredient_count(self, recipe):
+        return sum(RECIPES_INFO[recipe].values())
+
+    def get_ingredient_name(self, task_id):
+        ingredient_name = None
+        for ingredient in INGREDIENT_ACTION_NAME:
+            if task_id in INGREDIENT_ACTION_NAME[ingredient]:
+                ingredient_name = ingredient
+        return ingredient_name
+    
+    def get_recipe_name(self, task_id):
+        recipe_name = None
+        for recipe in RECIPE_ACTION_NAME:
+            if task_id in RECIPE_ACTION_NAME[recipe]:
+                recipe_name = recipe
+        return recipe_name
+
+    def complete_cooking_check(self, recipe, ingredient_counts):
+        return RECIPES_INFO[recipe] == ingredient_counts
+    
+    def get_general_goal_id(self, recipe, action):
+        return RECIPES_ACTION_MAPPING[recipe]['general'][action]
@@ -0,0 +1,172 @@
+"""
+Profiling
+---------
+Opt-in per-phase timers for the simulation loop.
+
+Phases (observer_inference, find_agents_possible_goals, astar, env_step, render, ...)
+are timed with `phase(name)` blocks or the `profiled(name)` decorator. Timings are
+inclusive, so nested phases (eg. astar inside calc_travel_cost) are also counted
+in their parent. Counters such as A* node expansions are accumulated with `count`
+and closed off once per timestep with `end_step`.
+
+When profiling is off, `phase` returns a shared no-op context and `profiled`
+wrappers fall straight through to the wrapped function.
+"""
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+import functools
+import json
+import os
+import time
+
+import numpy as np
+
+PERCENTILES = [50, 90, 99]
+
+enabled = False
+
+_NULL_PHASE = nullcontext()
+_samples = defaultdict(list)
+_step_counts = defaultdict(int)
+_counts_per_step = defaultdict(list)
+
+def enable(on: bool=True) -> None:
+    global enabled
+    enabled = on
+
+def reset() -> None:
+    _samples.clear()
+    _step_counts.clear()
+    _counts_per_step.clear()
+
+@contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _samples[name].append(time.perf_counter() - start)
+
+def phase(name: str):
+    """Time the enclosed block under `name` (no-op unless profiling is enabled)"""
+    if not enabled:
+        return _NULL_PHASE
+    return _timed(name)
+
+def profiled(name: str) -> Callable:
+    """Decorator version of `phase`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _samples[name].append(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def count(name: str, value: int=1) -> None:
+    """Add to a per-timestep counter (eg. A* node expansions)"""
+    _step_counts[name] += value
+
+def end_step() -> None:
+    """Close off the current timestep's counters"""
+    names = set(_step_counts) | set(_counts_per_step)
+    for name in names:
+        _counts_per_step[name].append(_step_counts.get(name, 0))
+    _step_counts.clear()
+
+def summary() -> Dict[str, Any]:
+    """
+    Returns
+    -------
+    {
+        'phases': {name: {'count', 'total_ms', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}},
+        'counters': {name: {'steps', 'total', 'mean_per_step', 'p50', 'p90', 'p99', 'max'}},
+        'caches': {name: {'hits', 'misses', 'hit_rate'}}
+    }
+
+    Caches are the `<name>_hits`/`<name>_misses` counter pairs (eg. goal_cache).
+    """
+    phases = {}
+    for name, samples in _samples.items():
+        samples_ms = np.asarray(samples) * 1000
+        stats = {
+            'count': int(samples_ms.size),
+            'total_ms': float(samples_ms.sum()),
+            'mean_ms': float(samples_ms.mean()),
+        }
+        for percentile, value in zip(PERCENTILES, np.percentile(samples_ms, PERCENTILES)):
+            stats[f'p{percentile}_ms'] = float(value)
+        stats['max_ms'] = float(samples_ms.max())
+        phases[name] = stats
+
+    counters = {}
+    for name, per_step in _counts_per_step.items():
+        per_step = np.asarray(per_step)
+        stats = {
+            'steps': int(per_step.size),
+            'total': int(per_step.sum()),
+            'mean_per_step': float(per_step.mean()),
+        }
+        for percentile, value in zip(PERCENTILES, np.percentile(per_step, PERCENTILES)):
+            stats[f'p{percentile}'] = float(value)
+        stats['max'] = int(per_step.max())
+        counters[name] = stats
+
+    caches = {}
+    for name in counters:
+        if name.endswith('_hits'):
+            cache = name[:-len('_hits')]
+            hits = counters[name]['total']
+            misses = counters.get(cache + '_misses', {}).get('total', 0)
+            caches[cache] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+            }
+    return {'phases': phases, 'counters': counters, 'caches': caches}
+
+def format_table(report: Dict[str, Any]=None) -> str:
+    report = report or summary()
+    columns = ['count', 'total_ms', 'mean_ms'] + [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']
+    lines = [f'{"phase":<28}' + ''.join(f'{column:>12}' for column in columns)]
+    phases = sorted(report['phases'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+    for name, stats in phases:
+        lines.append(
+            f'{name:<28}{stats["count"]:>12}' + ''.join(f'{stats[column]:>12.3f}' for column in columns[1:])
+        )
+
+    if report['counters']:
+        columns = ['steps', 'total', 'mean_per_step'] + [f'p{p}' for p in PERCENTILES] + ['max']
+        lines.append('')
+        lines.append(f'{"counter (per step)":<28}' + ''.join(f'{column:>14}' for column in columns))
+        for name, stats in sorted(report['counters'].items()):
+            lines.append(
+                f'{name:<28}{stats["steps"]:>14}{stats["total"]:>14}'
+                + ''.join(f'{stats[column]:>14.1f}' for column in columns[2:-1])
+                + f'{stats["max"]:>14}'
+            )
+
+    if report.get('caches'):
+        lines.append('')
+        lines.append(f'{"cache":<28}' + ''.join(f'{column:>14}' for column in ['hits', 'misses', 'hit_rate']))
+        for name, stats in sorted(report['caches'].items()):
+            lines.append(f'{name:<28}{stats["hits"]:>14}{stats["misses"]:>14}{stats["hit_rate"]:>14.1%}')
+    return '\n'.join(lines)
+
+def dump_json(path: str, report: Dict[str, Any]=None) -> Dict[str, Any]:
+    report = report or summary()
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+if os.environ.get('OVERCOOKED_PROFILE'):
+    enable()
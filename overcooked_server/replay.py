@@ -0,0 +1,157 @@
+"""
+Replay
+------
+Re-render a recorded run (see trajectory.py) without planning or ToM inference.
+
+The env is rebuilt with the recorded seed and agents, and each recorded step's actions
+are fed straight into MapEnv.step, so states are reconstructed at the cost of the step
+function alone. Frames come from the offscreen FrameRenderer, so any FPS or resolution
+can be encoded without opening a window.
+
+The map is picked from the trajectory's sidecar; settings reads it on import, so a
+replay must run in its own process (also because episodes mutate the shared A* walls).
+
+Usage: `python replay.py videos/map10/ToM_ToM_500ep_map10_0 --fps 10 --resize 1280x960`
+"""
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import click
+import json
+import os
+import numpy as np
+
+import tracing
+
+log = tracing.get_logger('replay')
+
+class Replay:
+    def __init__(self, path: str, verify: bool=True) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Trajectory path without extension
+        verify: bool
+            Check every replayed step against the recorded agent positions and score
+        """
+        from settings import MAP, QUEUE_EPISODES
+        from overcooked_env import OvercookedEnv
+        from trajectory import Trajectory
+
+        self.trajectory = Trajectory(path)
+        if self.trajectory.meta['map'] != MAP:
+            raise ValueError(
+                f"Trajectory was recorded on {self.trajectory.meta['map']} but {MAP} is loaded; "
+                f"set OVERCOOKED_MAP={self.trajectory.meta['map_module']}"
+            )
+        human_agents, ai_agents = self.trajectory.agent_configs()
+        self.env = OvercookedEnv(
+            human_agents=human_agents,
+            ai_agents=ai_agents,
+            queue_episodes=QUEUE_EPISODES,
+            seed=self.trajectory.meta['seed']
+        )
+        self.verify = verify
+
+    def __len__(self) -> int:
+        return len(self.trajectory)
+
+    def steps(self, start: int=0, stop: Optional[int]=None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Replay the recorded steps in order, yielding (step, env.world_state) after each
+        MapEnv.step; steps before `start` are replayed but not yielded.
+        """
+        stop = len(self.trajectory) if stop is None else min(stop, len(self.trajectory))
+        agents = self.env.world_state['agents']
+        for step in range(stop):
+            action_mapping = {}
+            for idx, agent in enumerate(agents):
+                action = self.trajectory.action(step, idx)
+                if action is not None:
+                    action_mapping[agent] = action
+            # Rewards only feed the returned reward dict, which a replay does not need
+            self.env.step(action_mapping, {})
+            if self.verify:
+                self._check_step(step)
+            if step >= start:
+                yield step, self.env.world_state
+            self.env.update_episode()
+
+    def _check_step(self, step: int) -> None:
+        record = self.trajectory[step]
+        locations = np.array([agent.location for agent in self.env.world_state['agents']])
+        if not np.array_equal(locations, record['agent_location']) \
+                or self.env.world_state['total_score'] != record['total_score']:
+            raise RuntimeError(
+                f'Replay diverged from the recording at step {step}: agents at {locations.tolist()}, '
+                f"recorded {record['agent_location'].tolist()}"
+            )
+
+def render_video(
+    path: str,
+    output: Optional[str]=None,
+    fps: int=1,
+    resize: Optional[Tuple[int,int]]=(640, 480),
+    start: int=0,
+    stop: Optional[int]=None,
+    verify: bool=True
+) -> str:
+    """
+    Replay a trajectory and encode it to an .mp4.
+
+    Parameters
+    ----------
+    path: str
+        Trajectory path without extension
+    output: str
+        Video path; defaults to <path>_replay.mp4
+    fps: int
+        Frames per second of the video (one frame per step)
+    resize: Tuple[int,int]
+        (width, height) of the video; None keeps the rendered size
+    start, stop: int
+        Range of steps to encode
+
+    Returns
+    -------
+    Path of the video
+    """
+    from settings import TERMINATING_EPISODE
+    from frame_renderer import FrameRenderer
+    from video_recorder import AsyncVideoRecorder
+
+    output = output or path + '_replay.mp4'
+    replay = Replay(path, verify=verify)
+    renderer = FrameRenderer()
+    vid_path, video_name = os.path.split(os.path.splitext(output)[0])
+    with AsyncVideoRecorder(vid_path or '.', video_name, fps=fps, resize=resize) as recorder:
+        for step, world_state in replay.steps(start, stop):
+            # Same counters as Game.draw shows after the step
+            frame = renderer.render(world_state, TERMINATING_EPISODE - replay.env.episode)
+            recorder.write(np.ascontiguousarray(frame[:, :, ::-1]))
+    return output
+
+@click.command()
+@click.argument('path')
+@click.option('--output', default=None, help='Video path (default: <path>_replay.mp4)')
+@click.option('--fps', default=1, help='Frames per second')
+@click.option('--resize', default='640x480', help="Video size as WIDTHxHEIGHT, or 'none' for the rendered size")
+@click.option('--start', default=0, help='First step to encode')
+@click.option('--stop', default=None, type=int, help='Step to stop at (exclusive)')
+@click.option('--no_verify', is_flag=True, default=False, help='Skip checking replayed states against the recording')
+@click.option('--log_level', default='INFO', help='Console log level (TRACE, DEBUG, INFO, WARNING)')
+def main(path, output, fps, resize, start, stop, no_verify, log_level):
+    # Load the recorded map before settings is imported
+    with open(path + '.json') as f:
+        os.environ.setdefault('OVERCOOKED_MAP', json.load(f)['map_module'])
+    tracing.configure(log_level.upper())
+    size = None if resize.lower() == 'none' else tuple(int(value) for value in resize.lower().split('x'))
+    video_path = render_video(path, output, fps, size, start, stop, verify=not no_verify)
+    log.info('Replay saved to %s', video_path)
+
+if __name__ == '__main__':
+    main()
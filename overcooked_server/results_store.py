@@ -0,0 +1,152 @@
+"""
+Results Store
+-------------
+Append-only sink for per-run results (one row per run, eg. total score every 50 timesteps).
+
+Each run writes its row to its own shard file next to the results CSV, so concurrent
+sweep workers never rewrite (and clobber) a shared file and a run costs O(1) however
+many runs came before it:
+
+    results/map_10_ai_ToM.csv             merged rows (optional, written by `merge`)
+    results/map_10_ai_ToM.shards/*.csv    one file per run
+    results/map_10_ai_ToM.merging/*.csv   shards being merged (only while `merge` runs)
+
+Shards are written to a temporary name and renamed into place, so readers only ever
+see complete rows. `read` lazily merges the CSV and the shards into one DataFrame.
+
+`merge` moves the shards aside into the .merging folder, renames the merged CSV into
+place and then deletes the folder. The folder also holds the identity of the CSV the
+merge started from, so if a merge is interrupted, the leftover shards are counted
+again only if the CSV is still that one: rows are never lost or counted twice.
+
+Usage: `python results_store.py results/map_10_ai_ToM.csv` folds the shards into the CSV.
+"""
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import click
+import csv
+import os
+import shutil
+import socket
+import time
+import uuid
+
+class ResultsStore:
+    def __init__(self, path: str, columns: Optional[List[str]]=None) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Merged results CSV, eg. results/map_10_ai_ToM.csv
+        columns: List[str]
+            Column order of the rows; defaults to the order of the first row's keys
+        """
+        self.path = path
+        self.columns = columns
+        self.shard_folder = os.path.splitext(path)[0] + '.shards'
+        self.merging_folder = os.path.splitext(path)[0] + '.merging'
+        self.base_path = os.path.join(self.merging_folder, 'base')
+
+    def append(self, row: Dict[str, Any]) -> str:
+        """
+        Atomically add one row as a new shard.
+
+        Returns
+        -------
+        Path of the shard
+        """
+        columns = self.columns or list(row.keys())
+        os.makedirs(self.shard_folder, exist_ok=True)
+        # Time first, so that shards sort in the order the runs finished
+        name = f'{time.time_ns()}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        shard_path = os.path.join(self.shard_folder, name + '.csv')
+        tmp_path = os.path.join(self.shard_folder, name + '.tmp')
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerow([row[column] for column in columns])
+        os.replace(tmp_path, shard_path)
+        return shard_path
+
+    def shards(self) -> List[str]:
+        return _csv_files(self.shard_folder)
+
+    def merging(self) -> List[str]:
+        """Shards of an interrupted merge that are not in the results CSV yet"""
+        if os.path.exists(self.base_path):
+            with open(self.base_path) as f:
+                if f.read() != self._csv_identity():
+                    # The merged CSV was renamed into place; only deleting the folder was interrupted
+                    return []
+        return _csv_files(self.merging_folder)
+
+    def _csv_identity(self) -> str:
+        # os.replace gives the merged CSV a new inode, so it differs from the one a merge started from
+        if not os.path.exists(self.path):
+            return 'missing'
+        stat = os.stat(self.path)
+        return f'{stat.st_ino} {stat.st_size} {stat.st_mtime_ns}'
+
+    def iter_frames(self, shard_paths: Optional[List[str]]=None) -> Iterator[Any]:
+        """Yield the merged CSV and then every shard as DataFrames, reading one file at a time"""
+        import pandas as pd
+        if os.path.exists(self.path):
+            yield pd.read_csv(self.path)
+        if shard_paths is None:
+            shard_paths = self.merging() + self.shards()
+        for shard_path in shard_paths:
+            yield pd.read_csv(shard_path)
+
+    def read(self, shard_paths: Optional[List[str]]=None):
+        """All rows (merged CSV first, then the shards in run order) as one DataFrame"""
+        import pandas as pd
+        frames = list(self.iter_frames(shard_paths))
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        results_df = pd.concat(frames, axis=0, ignore_index=True)
+        if self.columns is not None:
+            results_df = results_df[self.columns]
+        return results_df
+
+    def merge(self):
+        """
+        Fold the current shards (and those of an interrupted merge) into the results CSV
+        and delete them.
+        Run once, after the workers of a sweep are done; shards written meanwhile are kept.
+        """
+        if not self.merging():
+            # No merge to resume (a leftover folder holds shards the CSV already has)
+            shutil.rmtree(self.merging_folder, ignore_errors=True)
+            os.makedirs(self.merging_folder)
+        if not os.path.exists(self.base_path):
+            tmp_path = self.base_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(self._csv_identity())
+            os.replace(tmp_path, self.base_path)
+        for shard_path in self.shards():
+            os.replace(shard_path, os.path.join(self.merging_folder, os.path.basename(shard_path)))
+
+        results_df = self.read(_csv_files(self.merging_folder))
+        tmp_path = self.path + '.tmp'
+        results_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(self.merging_folder)
+        return results_df
+
+def _csv_files(folder: str) -> List[str]:
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith('.csv')]
+
+@click.command()
+@click.argument('path')
+def main(path):
+    results_df = ResultsStore(path).merge()
+    print(f'{path}: {len(results_df)} rows')
+
+if __name__ == '__main__':
+    main()
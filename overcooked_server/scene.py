@@ -0,0 +1,197 @@
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from collections import defaultdict
+import pygame as pg
+
+from settings import TABLE_TOPS, INGREDIENTS_STATION, SERVING_STATION, SCOREBOARD_SCORE, \
+    SCOREBOARD_ORDERS, SCOREBOARD_TIMER, SCOREBOARD, GRID_ROWS, GRID_COLS, WIDTH, HEIGHT, TILESIZE, \
+    BGCOLOR, LIGHTGREY, GREEN, SCOREBOARD_BG
+from overcooked_item_classes import ItemState
+from sprites import Player, TableTop, Ingredients, ChoppingBoardStation, PlateStation, \
+    PotStation, IngredientStation, ServingStation, ReturnStation, Score, Orders, Timer, ScoreBoard
+
+# Sprite groups a Game draws from (see sprites.py)
+GROUPS = [
+    'all_sprites', 'table_tops', 'ingredients', 'chopping_boards', 'plates', 'pot_stations',
+    'ingredient_stations', 'serving_stations', 'return_station', 'score', 'orders', 'timer', 'scoreboard'
+]
+# Scoreboard tile each counter is drawn next to
+COUNTERS = [('score', SCOREBOARD_SCORE), ('orders', SCOREBOARD_ORDERS), ('timer', SCOREBOARD_TIMER)]
+
+class SpriteScene:
+    def __init__(
+        self,
+        game,
+        world_state: Dict
+    ) -> None:
+        """
+        Sprites for a Game, kept for its whole lifetime.
+
+        Table tops, stations and the scoreboard never change: they are rendered once
+        into `background` together with the grid. Items are rebuilt only for the cells
+        an env step touched, players are moved/re-skinned in place, and `draw` only
+        repaints (and reports) the parts of the screen that changed.
+
+        Parameters
+        ----------
+        game: Game
+            Owner of the sprite groups (sprites add themselves to game.<group>)
+        world_state: Dict
+            Env world_state the scene mirrors
+        """
+        self.game = game
+        self.world_state = world_state
+        for group in GROUPS:
+            setattr(game, group, pg.sprite.Group())
+        # (row, col) -> sprites drawn at that cell, rebuilt on sync
+        self.cell_sprites = defaultdict(list)
+        self.players = {}
+        # Screen areas to repaint on the next draw; None repaints everything
+        self.dirty_rects = None
+        self.font = pg.font.Font('freesansbold.ttf', 20)
+        self._text_cache = {}
+        # counter -> (value, rect) as last drawn
+        self._counters = {}
+        # player id -> (rect, image) as last drawn
+        self._drawn_players = {}
+
+        for agent in world_state['agents']:
+            player = Player(game, agent.id, agent.location[1], agent.location[0], agent.holding)
+            self.players[agent.id] = player
+            setattr(game, 'player_'+agent.id, player)
+
+        self.sync()
+
+        static_sprites = [TableTop(game, coord[1], coord[0]) for coord in TABLE_TOPS]
+        for ingredient, coords in INGREDIENTS_STATION.items():
+            for coord in coords:
+                static_sprites.append(IngredientStation(game, ingredient, coord[1], coord[0]))
+        for coord in SERVING_STATION:
+            static_sprites.append(ServingStation(game, coord[1], coord[0]))
+        static_sprites.append(Score(game, SCOREBOARD_SCORE[1], SCOREBOARD_SCORE[0]))
+        static_sprites.append(Orders(game, SCOREBOARD_ORDERS[1], SCOREBOARD_ORDERS[0]))
+        static_sprites.append(Timer(game, SCOREBOARD_TIMER[1], SCOREBOARD_TIMER[0]))
+        for coord in SCOREBOARD:
+            static_sprites.append(ScoreBoard(game, coord[1], coord[0]))
+        self.background = self._render_background(static_sprites)
+        # all_sprites keeps only what can change between frames
+        game.all_sprites.remove(static_sprites)
+
+    def sync(self, touched_cells: Optional[Iterable[Tuple[int,int]]]=None) -> None:
+        """
+        Bring the sprites in line with the world_state.
+
+        Parameters
+        ----------
+        touched_cells: Iterable[Tuple[int,int]]
+            Cells changed by the last env step (MapEnv.touched_cells); None rebuilds every cell
+        """
+        for agent in self.world_state['agents']:
+            self.players[agent.id].set_state(agent.location[1], agent.location[0], agent.holding)
+
+        if touched_cells is None:
+            cells = {(row, col) for row in range(GRID_ROWS) for col in range(GRID_COLS)}
+        else:
+            cells = {tuple(cell) for cell in touched_cells}
+        for cell in cells:
+            self._rebuild_cell(cell)
+            if self.dirty_rects is not None:
+                self.dirty_rects.append(pg.Rect(cell[1]*TILESIZE, cell[0]*TILESIZE, TILESIZE, TILESIZE))
+
+    def draw(self, surface, score: int, orders: int, episodes_left: int) -> List[pg.Rect]:
+        """
+        Repaint what changed since the last draw.
+
+        Parameters
+        ----------
+        surface: pg.Surface
+            Screen the scene was last drawn on (its unchanged pixels are reused)
+        score, orders, episodes_left: int
+            Scoreboard counters
+
+        Returns
+        -------
+        Rects of `surface` that were repainted, for pg.display.update
+        """
+        if self.dirty_rects is None:
+            surface.blit(self.background, (0, 0))
+            dirty_rects = [surface.get_rect()]
+        else:
+            dirty_rects = self.dirty_rects
+            for player_id, player in self.players.items():
+                drawn_rect, drawn_image = self._drawn_players[player_id]
+                if player.rect != drawn_rect or player.image is not drawn_image:
+                    dirty_rects.extend([drawn_rect, player.rect.copy()])
+            for rect in dirty_rects:
+                surface.blit(self.background, rect, rect)
+
+        if dirty_rects:
+            for sprite in self.game.all_sprites:
+                if sprite.rect.collidelist(dirty_rects) != -1:
+                    surface.blit(sprite.image, sprite.rect)
+        self._drawn_players = {
+            player_id: (player.rect.copy(), player.image) for player_id, player in self.players.items()
+        }
+
+        # Counters are drawn on top of the scoreboard tiles
+        for (name, tile), value in zip(COUNTERS, [score, orders, episodes_left]):
+            text = self._render_text(value)
+            rect = text.get_rect()
+            rect.center = ((tile[1]+1)*TILESIZE+TILESIZE//2, HEIGHT-TILESIZE//2)
+            drawn = self._counters.get(name)
+            if drawn is None or drawn[0] != value or rect.collidelist(dirty_rects) != -1:
+                if drawn is not None:
+                    surface.blit(self.background, drawn[1], drawn[1])
+                    dirty_rects.append(drawn[1])
+                surface.blit(text, rect)
+                dirty_rects.append(rect)
+                self._counters[name] = (value, rect)
+
+        self.dirty_rects = []
+        return dirty_rects
+
+    def _render_text(self, value: int) -> pg.Surface:
+        text = self._text_cache.get(value)
+        if text is None:
+            text = self.font.render(str(value), True, GREEN, SCOREBOARD_BG)
+            self._text_cache[value] = text
+        return text
+
+    def _render_background(self, static_sprites: List[pg.sprite.Sprite]) -> pg.Surface:
+        background = pg.Surface((WIDTH, HEIGHT)).convert()
+        background.fill(BGCOLOR)
+        for x in range(0, WIDTH, TILESIZE):
+            pg.draw.line(background, LIGHTGREY, (x, 0), (x, HEIGHT))
+        for y in range(0, HEIGHT, TILESIZE):
+            pg.draw.line(background, LIGHTGREY, (0, y), (WIDTH, y))
+        for sprite in static_sprites:
+            background.blit(sprite.image, sprite.rect)
+        return background
+
+    def _rebuild_cell(self, cell: Tuple[int,int]) -> None:
+        for sprite in self.cell_sprites.pop(cell, []):
+            sprite.kill()
+
+        game = self.game
+        row, col = cell
+        registry = self.world_state['item_registry']
+        sprites = []
+        # Items are opaque tiles, so the table top in the background never shows through them
+        for ingredient in registry.at(cell, 'ingredients'):
+            sprites.append(Ingredients(game, ingredient.name, ingredient.state, col, row))
+        for chopping_board in registry.at(cell, 'chopping_board'):
+            if chopping_board.state != ItemState.TAKEN:
+                sprites.append(ChoppingBoardStation(game, col, row))
+        for plate in registry.at(cell, 'plate'):
+            sprites.append(PlateStation(game, plate.state, col, row))
+        for pot in registry.at(cell, 'pot'):
+            sprites.append(PotStation(game, pot.ingredient_count or defaultdict(int), col, row))
+        if cell == tuple(self.world_state['return_counter']):
+            state = 'filled' if registry.at(cell, 'plate') else 'empty'
+            sprites.append(ReturnStation(game, state, col, row))
+        if sprites:
+            self.cell_sprites[cell] = sprites
@@ -1,5 +1,10 @@
-# Choose the map
-import maps.map_10 as selected_map
+# Choose the map (OVERCOOKED_MAP=map_<n> overrides, eg. for benchmarks)
+import importlib
+import os
+
+from barriers import Barriers
+
+selected_map = importlib.import_module('maps.' + os.environ.get('OVERCOOKED_MAP', 'map_10'))
 
 # ==================== Colour definition ====================
 WHITE = (255, 255, 255)
@@ -14,22 +19,25 @@ BROWN = (160, 82, 4)
 SCOREBOARD_BG = (143, 186, 200)
 
 # ======================= Game Settings =======================
-WIDTH = 832 # 13x32  # 16 * 64 (832) or 32 * 32 or 64 * 16
-HEIGHT = 640 # 9x32 # 16 * 48 (640) or 32 * 24 or 64 * 12
+TILESIZE = 64
+
+# Kitchen grid (excludes the scoreboard row); generated maps set their own size
+GRID_ROWS = getattr(selected_map, 'GRID_ROWS', 9)
+GRID_COLS = getattr(selected_map, 'GRID_COLS', 13)
+
+WIDTH = GRID_COLS * TILESIZE # 13x64 (832) for the hand-written maps
+HEIGHT = (GRID_ROWS+1) * TILESIZE # 10x64 (640), incl. the scoreboard row
 FPS = 60
 TITLE = "Overcooked Simulation"
 BGCOLOR = BACKGROUND_BLUE
 
-TILESIZE = 64
 GRIDWIDTH = WIDTH / TILESIZE
 GRIDHEIGHT = HEIGHT / TILESIZE
 
-SCOREBOARD_SCORE = (9,0)
-SCOREBOARD_ORDERS = (9,4)
-SCOREBOARD_TIMER = (9,8)
-SCOREBOARD = [
-    (9,1), (9,2), (9,3), (9,5), (9,6), (9,7), (9,8), (9,9), (9,10), (9,11), (9,12)
-]
+SCOREBOARD_SCORE = (GRID_ROWS,0)
+SCOREBOARD_ORDERS = (GRID_ROWS,4)
+SCOREBOARD_TIMER = (GRID_ROWS,8)
+SCOREBOARD = [(GRID_ROWS,col) for col in range(1, GRID_COLS) if col != 4]
 
 TERMINATING_EPISODE = 500
 
@@ -64,7 +72,8 @@ ITEMS_INITIALIZATION = selected_map.ITEMS_INITIALIZATION
 INGREDIENTS_INITIALIZATION = selected_map.INGREDIENTS_INITIALIZATION
 INGREDIENTS_STATION = selected_map.INGREDIENTS_STATION
 SERVING_STATION = selected_map.SERVING_STATION
-WALLS = selected_map.WALLS
+# Shared with the A* barriers, which also track the agents' cells (see barriers.py)
+WALLS = Barriers(selected_map.WALLS)
 WORLD_STATE = selected_map.WORLD_STATE
 # SCOREBOARD_SCORE = selected_map.SCOREBOARD_SCORE
 # SCOREBOARD_ORDERS = selected_map.SCOREBOARD_ORDERS
@@ -3,11 +3,53 @@ import pygame as pg
 
 from settings import *
 from overcooked_item_classes import *
+from frame_renderer import chef_sprite, paint_hat
 
 # Set up Assets
 game_folder = os.path.dirname(__file__)
 assets_folder = os.path.join(game_folder, 'assets')
 
+# Decoded, display-converted surfaces shared by every sprite instance
+_image_cache = {}
+_tile_cache = {}
+
+def preload_assets() -> None:
+    """
+    Decode every image in the assets folder once.
+    Must be called after pg.display.set_mode (convert() needs a display surface).
+    """
+    for file in sorted(os.listdir(assets_folder)):
+        if file.endswith('.png'):
+            get_image(file)
+
+def get_image(file: str) -> pg.Surface:
+    """Shared surface for an asset file; loaded on first use if it was not preloaded"""
+    image = _image_cache.get(file)
+    if image is None:
+        image = pg.image.load(os.path.join(assets_folder, file)).convert()
+        _image_cache[file] = image
+    return image
+
+def get_chef_image(file: str, colour=None) -> pg.Surface:
+    """Shared surface of a chef asset, with its hat painted in `colour` if given (see frame_renderer.chef_sprite)"""
+    if colour is None:
+        return get_image(file)
+    image = _image_cache.get((file, colour))
+    if image is None:
+        painted = paint_hat(pg.surfarray.array3d(get_image(file)), colour)
+        image = pg.surfarray.make_surface(painted).convert()
+        _image_cache[(file, colour)] = image
+    return image
+
+def get_tile(colour) -> pg.Surface:
+    """Shared single-colour TILESIZE surface"""
+    tile = _tile_cache.get(colour)
+    if tile is None:
+        tile = pg.Surface((TILESIZE, TILESIZE))
+        tile.fill(colour)
+        _tile_cache[colour] = tile
+    return tile
+
 # Pure Player Class
 # class Player(pg.sprite.Sprite):
 #     def __init__(self, game, player_id, x, y, holding=None):
@@ -33,18 +75,16 @@ class Player(pg.sprite.Sprite):
         self.groups = game.all_sprites
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
+        self.player_id = player_id
+        self.set_state(x, y, holding)
+        self.rect = self.image.get_rect()
+
+    def set_state(self, x, y, holding=None):
+        # Reuses the sprite when the agent moves or its holding changes
         self.x = x
         self.y = y
-
-        if holding:
-            if isinstance(holding, Ingredient):
-                self.image = pg.image.load(os.path.join(assets_folder, f'chef_{str(player_id)}_holding_{holding.name}_{holding.state}.png')).convert()
-            elif isinstance(holding, Plate):
-                self.image = pg.image.load(os.path.join(assets_folder, f'chef_{str(player_id)}_holding_plate_{holding.state}.png')).convert()
-        else:
-            self.image = pg.image.load(os.path.join(assets_folder, f'chef_{player_id}.png')).convert()
+        self.image = get_chef_image(*chef_sprite(self.player_id, holding))
         self.image.set_colorkey(BACKGROUND_BLUE) # set background of image to transparent
-        self.rect = self.image.get_rect()
 
     def move(self, dx=0, dy=0):
         self.x += dx
@@ -59,8 +99,7 @@ class TableTop(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.table_tops
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.Surface((TILESIZE, TILESIZE))
-        self.image.fill(BROWN)
+        self.image = get_tile(BROWN)
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -77,9 +116,9 @@ class Ingredients(pg.sprite.Sprite):
 
         chopping_board_coords = [CHOPPING_BOARDS[chopping_board]['coords'] for chopping_board in CHOPPING_BOARDS]
         if (y, x) in chopping_board_coords:
-            self.image = pg.image.load(os.path.join(assets_folder, f'chopping_board_{ingredient_name}_{ingredient_state}.png')).convert()
+            self.image = get_image(f'chopping_board_{ingredient_name}_{ingredient_state}.png')
         else:
-            self.image = pg.image.load(os.path.join(assets_folder, f'table_top_{ingredient_name}_{ingredient_state}.png')).convert()
+            self.image = get_image(f'table_top_{ingredient_name}_{ingredient_state}.png')
         self.rect = self.image.get_rect()
         self.rect.x = x * TILESIZE
         self.rect.y = y * TILESIZE
@@ -89,7 +128,7 @@ class ChoppingBoardStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.chopping_boards
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'chopping_board_empty.png')).convert()
+        self.image = get_image(f'chopping_board_empty.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -101,7 +140,7 @@ class PlateStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.plates
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'plate_{state}.png')).convert()
+        self.image = get_image(f'plate_{state}.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -125,10 +164,10 @@ class PotStation(pg.sprite.Sprite):
                 pot_ingredient_info += ingredient + str(pot_ingredients[ingredient]) + '_'
 
         if pot_ingredient_count != 0:
-            self.image = pg.image.load(os.path.join(assets_folder, f'pot_station_{pot_ingredient_info}.png')).convert()
+            self.image = get_image(f'pot_station_{pot_ingredient_info}.png')
             # self.image = pg.image.load(os.path.join(assets_folder, f'pot_station_{pot_ingredient}_{pot_ingredient_count}.png')).convert()
         else:
-            self.image = pg.image.load(os.path.join(assets_folder, f'pot_station_empty.png')).convert()
+            self.image = get_image(f'pot_station_empty.png')
         self.rect = self.image.get_rect()
         self.rect.x = x * TILESIZE
         self.rect.y = y * TILESIZE
@@ -138,7 +177,7 @@ class IngredientStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.ingredient_stations
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'ingredient_station_{ingredient}.png')).convert()
+        self.image = get_image(f'ingredient_station_{ingredient}.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -150,7 +189,7 @@ class ServingStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.serving_stations
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'serving_station.png')).convert()
+        self.image = get_image(f'serving_station.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -162,7 +201,7 @@ class ReturnStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.return_station
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'return_station_{state}.png')).convert()
+        self.image = get_image(f'return_station_{state}.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -174,7 +213,7 @@ class ExtinguisherStation(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.extinguisher
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'extinguisher.png')).convert()
+        self.image = get_image(f'extinguisher.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -186,7 +225,7 @@ class TrashBin(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.trash_bin
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'trash_bin.png')).convert()
+        self.image = get_image(f'trash_bin.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -199,8 +238,7 @@ class ScoreBoard(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.scoreboard
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.Surface((TILESIZE, TILESIZE))
-        self.image.fill(SCOREBOARD_BG)
+        self.image = get_tile(SCOREBOARD_BG)
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -212,7 +250,7 @@ class Score(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.score
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'scoreboard_score.png')).convert()
+        self.image = get_image(f'scoreboard_score.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -224,7 +262,7 @@ class Orders(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.orders
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'scoreboard_orders.png')).convert()
+        self.image = get_image(f'scoreboard_orders.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
@@ -236,7 +274,7 @@ class Timer(pg.sprite.Sprite):
         self.groups = game.all_sprites, game.orders
         pg.sprite.Sprite.__init__(self, self.groups)
         self.game = game
-        self.image = pg.image.load(os.path.join(assets_folder, f'scoreboard_timer.png')).convert()
+        self.image = get_image(f'scoreboard_timer.png')
         self.rect = self.image.get_rect()
         self.x = x
         self.y = y
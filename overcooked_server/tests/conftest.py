@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The server modules import one another as top-level modules, as when run from overcooked_server
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OVERCOOKED_LOG_LEVEL', 'WARNING')
+
+from settings import WALLS, WORLD_STATE
+
+@pytest.fixture(autouse=True)
+def map_state():
+    """
+    Restore the map's lists after every test. Envs mutate them in place (WALLS also
+    holds the agents' cells, WORLD_STATE['valid_movement_cells'] the free ones), which
+    is why the benchmarks run every case in a fresh interpreter; without this, an env
+    would start on the cells the previous test's agents were left on.
+    """
+    walls = list(WALLS)
+    world_state = {key: list(value) for key, value in WORLD_STATE.items() if isinstance(value, list)}
+    yield
+    for cell in list(WALLS):
+        WALLS.remove(cell)
+    WALLS.extend(walls)
+    for key, cells in world_state.items():
+        WORLD_STATE[key][:] = cells
@@ -0,0 +1,47 @@
+import copy
+import pickle
+
+import pytest
+
+from barriers import Barriers
+
+def test_key_follows_the_set_of_cells():
+    barriers = Barriers([(0, 0), (0, 1)])
+    walls_key = barriers.key
+    barriers.append((3, 4))
+    assert barriers.key != walls_key
+    # An agent moving away and back gives the key it had
+    barriers.remove((3, 4))
+    barriers.append((3, 5))
+    barriers.remove((3, 5))
+    barriers.append((3, 4))
+    assert barriers.key == Barriers([(0, 1), (3, 4), (0, 0)]).key
+    barriers.remove((3, 4))
+    assert barriers.key == walls_key
+
+def test_duplicate_cells_count_once():
+    barriers = Barriers([(0, 0), (2, 2)])
+    barriers.append((2, 2))
+    assert barriers.key == Barriers([(0, 0), (2, 2)]).key
+    barriers.remove((2, 2))
+    assert barriers.key == Barriers([(0, 0), (2, 2)]).key
+    barriers.remove((2, 2))
+    assert barriers.key == Barriers([(0, 0)]).key
+
+@pytest.mark.parametrize('copier', [copy.deepcopy, lambda barriers: pickle.loads(pickle.dumps(barriers))])
+def test_copies_keep_the_key(copier):
+    barriers = Barriers([(0, 0), (1, 2), (1, 2)])
+    copied = copier(barriers)
+    assert type(copied) is Barriers
+    assert copied == barriers and copied.key == barriers.key
+    copied.remove((1, 2))
+    copied.remove((1, 2))
+    assert copied.key == Barriers([(0, 0)]).key
+    assert barriers.key == Barriers([(0, 0), (1, 2)]).key
+
+def test_other_changes_are_refused():
+    barriers = Barriers([(0, 0)])
+    with pytest.raises(TypeError):
+        barriers.pop()
+    with pytest.raises(TypeError):
+        barriers[0] = (1, 1)
@@ -0,0 +1,29 @@
+"""
+ObservationEncoder.update, fed MapEnv.touched_cells after every step, must keep the
+dynamic channels equal to a fresh encode of the world_state. Wall cells hold agents'
+cells too (WALLS is the A* barrier list), so the static channels are only encoded on reset.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.simulation import headless_step, make_env
+from observation_encoder import CHANNELS, STATIC_CHANNELS, ObservationEncoder
+
+STEPS = 150
+
+@pytest.mark.parametrize('kind', ['dummy', 'tom'])
+def test_update_matches_fresh_encode(kind):
+    env = make_env(2, kind, 0)
+    encoder = ObservationEncoder(env.world_state)
+    dynamic = slice(len(STATIC_CHANNELS), len(CHANNELS))
+    changed_steps = 0
+    for step in range(STEPS):
+        before = encoder.obs[dynamic].copy()
+        headless_step(env)
+        encoder.update(env.world_state, env.touched_cells)
+        fresh = ObservationEncoder(env.world_state).obs
+        mismatches = np.argwhere(encoder.obs[dynamic] != fresh[dynamic])
+        assert not len(mismatches), (step, [(CHANNELS[len(STATIC_CHANNELS)+idx], row, col) for idx, row, col in mismatches])
+        changed_steps += not np.array_equal(before, encoder.obs[dynamic])
+    # The agents moved and worked, so the incremental path was exercised
+    assert changed_steps > STEPS // 4
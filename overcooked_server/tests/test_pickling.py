@@ -0,0 +1,111 @@
+"""
+Pickling and deepcopy of a mid-game world_state: the slotted items and agents
+(deepcopy_slots), ItemState members, the item registry, agent table and goal table
+must come back with the same values and the same sharing between them.
+"""
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from benchmarks.simulation import headless_step
+from overcooked_env import OvercookedEnv
+from overcooked_item_classes import ItemState
+from settings import AI_AGENTS, HUMAN_AGENTS, QUEUE_EPISODES
+
+CATEGORIES = ['ingredients', 'chopping_board', 'plate', 'pot']
+
+@pytest.fixture
+def world_state():
+    env = OvercookedEnv(
+        human_agents={'1': HUMAN_AGENTS['1']},
+        ai_agents={'1': dict(AI_AGENTS['1'], ToM=True), '2': dict(AI_AGENTS['2'], ToM=False)},
+        queue_episodes=QUEUE_EPISODES,
+        seed=1
+    )
+    for _ in range(40):
+        headless_step(env)
+    return env.world_state
+
+def slot_names(obj):
+    return [name for klass in type(obj).__mro__ for name in getattr(klass, '__slots__', ())]
+
+def snapshot(value, seen=None):
+    """
+    Plain, comparable structure of a value: slotted objects by slot, other objects by
+    __dict__, and an object met again as a reference to its first visit, so that
+    shared references (eg. the registry's lists being the world_state's) are compared too
+    """
+    if seen is None:
+        seen = {}
+    if isinstance(value, ItemState):
+        return ('ItemState', value.name)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if id(value) in seen:
+        return ('ref', seen[id(value)])
+    seen[id(value)] = len(seen)
+
+    if isinstance(value, np.ndarray):
+        return ('array', str(value.dtype), value.tolist())
+    if isinstance(value, np.random.Generator):
+        return ('Generator', repr(value.bit_generator.state))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, [snapshot(item, seen) for item in value])
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, sorted(repr(snapshot(item, seen)) for item in value))
+    if isinstance(value, dict):
+        return (type(value).__name__, [(snapshot(key, seen), snapshot(item, seen)) for key, item in value.items()])
+    if hasattr(value, '__dict__'):
+        fields = vars(value)
+    else:
+        fields = {name: getattr(value, name) for name in slot_names(value) if hasattr(value, name)}
+    return (type(value).__name__, [(name, snapshot(field, seen)) for name, field in fields.items()])
+
+def items(world_state):
+    return [item for category in CATEGORIES for item in world_state[category]]
+
+def test_game_is_under_way(world_state):
+    assert items(world_state)
+    assert any(agent.holding is not None for agent in world_state['agents']) or world_state['ingredients']
+    assert {type(agent).__name__ for agent in world_state['agents']} == {'HumanAgent', 'OvercookedAgent'}
+
+@pytest.mark.parametrize('copier', [
+    lambda world_state: pickle.loads(pickle.dumps(world_state)),
+    copy.deepcopy
+], ids=['pickle', 'deepcopy'])
+def test_world_state_round_trips(world_state, copier):
+    restored = copier(world_state)
+    assert snapshot(restored) == snapshot(world_state)
+
+    # Slotted items and agents are copies, with the same slot values
+    for original, copied in zip(items(world_state) + world_state['agents'], items(restored) + restored['agents']):
+        assert copied is not original
+        assert type(copied) is type(original)
+        assert not hasattr(copied, '__dict__')
+        for name in slot_names(original):
+            if name in ('world_state', 'astar_map', 'rng'):
+                continue
+            assert snapshot(getattr(copied, name, None)) == snapshot(getattr(original, name, None)), name
+
+    # States are the enum members themselves, not ints
+    for item in items(restored):
+        if hasattr(item, 'state'):
+            assert ItemState(item.state) is item.state
+
+    # Agents point at the copied world_state, and the tables index the copied objects
+    for agent in restored['agents']:
+        assert agent.world_state is restored
+        assert restored['agent_table'].at(agent.location) is agent
+    assert restored['agent_table'].agents is restored['agents']
+    registry = restored['item_registry']
+    assert all(registry.items[category] is restored[category] for category in CATEGORIES)
+    assert all(item in registry for item in items(restored))
+    for category in ['ingredients', 'chopping_board', 'plate']:
+        for state in ItemState:
+            assert registry.in_state(category, state) == [item for item in restored[category] if item.state == state]
+    assert repr(restored['goal_space']) == repr(world_state['goal_space'])
+    assert restored['goal_space'].counts is not world_state['goal_space'].counts
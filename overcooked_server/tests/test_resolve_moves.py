@@ -0,0 +1,280 @@
+"""
+MapEnv._resolve_moves against the conflict resolution it replaced.
+
+`ReferenceMapEnv.update_moves` is the movement part of MapEnv.update_moves before
+cell claims, verbatim but for logging. With targets from return_valid_pos (free
+cells only, as the env produces them) both must give the same positions and leave
+move_rng in the same state. On occupied targets the resolver differs on purpose:
+agents walking through one another stay (the old code crashed or swapped them), and
+longer cycles rotate (the old code crashed).
+"""
+import numpy as np
+import pytest
+
+from action_handlers import MOVES, OPCODES
+from agent_actions import AgentActions
+from agent_table import AgentTable
+from map_env import MapEnv
+from settings import MAP_ACTIONS
+
+class Agent(AgentActions):
+    def __init__(self, world_state, location, agent_id):
+        self.world_state = world_state
+        self.location = location
+        self.id = agent_id
+
+    def __repr__(self):
+        return f'Agent({self.id}, {self.location})'
+
+class ReferenceMapEnv:
+    def __init__(self, world_state, move_rng):
+        self.world_state = world_state
+        self.move_rng = move_rng
+
+    def update_moves(self, actions):
+        for agent in actions:
+            agent.location = tuple(agent.location)
+
+        agent_actions = {}
+        for agent, task_action in actions.items():
+            action = task_action[1]
+            if action.is_move:
+                agent_action = agent.action_map(action.opcode)
+                agent_actions[agent] = agent_action
+            else:
+                agent_action = agent.action_map(8)
+                agent_actions[agent] = agent_action
+
+        reserved_slots = []
+        agent_moves = {}
+        for agent, action in agent_actions.items():
+            selected_action = MAP_ACTIONS[action]
+
+            new_pos = tuple([x + y for x, y in zip(list(agent.location), selected_action)])
+            new_pos = agent.return_valid_pos(new_pos)
+            agent_moves[agent] = new_pos
+            reserved_slots.append((new_pos, agent))
+
+        agent_by_pos = {tuple(agent.location): agent for agent in self.world_state['agents']}
+
+        # list of moves and their corresponding agents
+        move_slots = [slot[0] for slot in reserved_slots]
+        agent_to_slot = [slot[1] for slot in reserved_slots]
+
+        # cut short computation if there are no moves (to be used if we consider rotation)
+        if len(agent_to_slot) > 0:
+            # shuffle so that a random agent has slot priority
+            shuffle_list = list(zip(agent_to_slot, move_slots))
+            self.move_rng.shuffle(shuffle_list)
+            agent_to_slot, move_slots = zip(*shuffle_list)
+            # unique_move is the position the agents want to move to
+            # return_count is the number of times the unique_move is wanted
+            unique_move, indices, return_count = np.unique(move_slots, return_index=True,
+                                                           return_counts=True, axis=0)
+            search_list = np.array(move_slots)
+
+            # Resolve all conflicts over a space
+            if np.any(return_count > 1):
+                for move, index, count in zip(unique_move, indices, return_count):
+                    if count > 1:
+                        conflict_indices = np.where((search_list == move).all(axis=1))[0]
+                        all_agents = [agent_to_slot[i] for i in conflict_indices]
+                        conflict_cell_free = True
+                        for agent in all_agents:
+                            moves_copy = agent_moves.copy()
+                            locs = [list(agent.location) for agent in self.world_state['agents']]
+                            if move.tolist() in locs:
+                                conflicting_agent = agent_by_pos[tuple(move)]
+                                curr_pos = list(agent.location)
+                                curr_conflict_pos = list(conflicting_agent.location)
+                                conflict_move = agent_moves.get(
+                                    conflicting_agent,
+                                    curr_conflict_pos)
+
+                                # Condition (1):
+                                # a STAY command has been issued
+                                if agent == conflicting_agent:
+                                    conflict_cell_free = False
+                                # Condition (2)
+                                # its command is to stay
+                                # or you are trying to move into an agent that hasn't
+                                # received a command
+                                elif conflicting_agent not in moves_copy.keys() or \
+                                        curr_conflict_pos == conflict_move:
+                                    conflict_cell_free = False
+
+                                # Condition (3)
+                                # It is trying to move into you and you are moving into it
+                                elif conflicting_agent in moves_copy.keys():
+                                    if conflicting_agent.location == curr_pos and \
+                                            move.tolist() == conflicting_agent.location.tolist():
+                                        conflict_cell_free = False
+
+                        # if the conflict cell is open, let one of the conflicting agents
+                        # move into it
+                        if conflict_cell_free:
+                            agent_idx = [idx for idx, agent_obj in enumerate(self.world_state['agents']) if id(agent_obj) == id(agent_to_slot[index])][0]
+                            self.world_state['agents'][agent_idx].update_agent_pos(move)
+                            agent_by_pos = {tuple(agent.location):
+                                            agent for agent in self.world_state['agents']}
+                        # remove all the other moves that would have conflicted
+                        remove_indices = np.where((search_list == move).all(axis=1))[0]
+                        all_agents = [agent_to_slot[i] for i in remove_indices]
+                        for agent in all_agents:
+                            agent_moves[agent] = agent.location
+
+            # make the remaining un-conflicted moves
+            while len(agent_moves.items()) > 0:
+                agent_by_pos = {tuple(agent.location): agent for agent in self.world_state['agents']}
+                num_moves = len(agent_moves.items())
+                moves_copy = agent_moves.copy()
+                del_keys = []
+                for agent, move in moves_copy.items():
+                    if agent in del_keys:
+                        continue
+                    if list(move) in [list(agent.location) for agent in self.world_state['agents']]:
+                        conflicting_agent = agent_by_pos[tuple(move)]
+                        curr_pos = list(agent.location)
+                        curr_conflict_pos = list(conflicting_agent.location)
+                        conflict_move = agent_moves.get(conflicting_agent, curr_conflict_pos)
+                        # Condition (1):
+                        # a STAY command has been issued
+                        if agent == conflicting_agent:
+                            del agent_moves[agent]
+                            del_keys.append(agent)
+                        # Condition (2)
+                        # its command is to stay
+                        # or you are trying to move into an agent that hasn't received a command
+                        elif conflicting_agent not in moves_copy.keys() or \
+                                curr_conflict_pos == conflict_move:
+                            del agent_moves[agent]
+                            del_keys.append(agent)
+                        # Condition (3)
+                        # It is trying to move into you and you are moving into it
+                        elif conflicting_agent in moves_copy.keys():
+                            if agent_moves[conflicting_agent] == curr_pos and \
+                                    move == conflicting_agent.location.tolist():
+                                del agent_moves[conflicting_agent]
+                                del agent_moves[agent]
+                                del_keys.append(agent)
+                                del_keys.append(conflicting_agent)
+                    # this move is unconflicted so go ahead and move
+                    else:
+                        agent_idx = [idx for idx, agent_obj in enumerate(self.world_state['agents']) if id(agent_obj) == id(agent)][0]
+                        self.world_state['agents'][agent_idx].update_agent_pos(move)
+                        del agent_moves[agent]
+                        del_keys.append(agent)
+
+                # no agent is able to move freely, so just move them all
+                if len(agent_moves) == num_moves:
+                    for agent, move in agent_moves.items():
+                        self.world_state['agents'][agent].update_agent_pos(move)
+                    break
+
+def make_world(locations, valid_cells):
+    world_state = {'agents': [], 'valid_cells': valid_cells}
+    for idx, location in enumerate(locations):
+        world_state['agents'].append(Agent(world_state, tuple(location), str(idx+1)))
+    world_state['agent_table'] = AgentTable(world_state['agents'])
+    return world_state
+
+def make_env(world_state, move_seed):
+    env = MapEnv.__new__(MapEnv)
+    env.world_state = world_state
+    env.move_rng = np.random.default_rng(move_seed)
+    return env
+
+def random_kitchen(seed):
+    """Free cells, agent cells and an action per agent of a random kitchen with 2-50 agents"""
+    rng = np.random.default_rng(seed)
+    num_agents, size = [(2, 4), (3, 5), (4, 6), (8, 8), (16, 10), (32, 12), (50, 14)][seed % 7]
+    cells = [(row, col) for row in range(size) for col in range(size)]
+    walls = {cells[idx] for idx in rng.choice(len(cells), len(cells) // 6, replace=False)}
+    free = [cell for cell in cells if cell not in walls]
+    locations = [free[idx] for idx in rng.choice(len(free), num_agents, replace=False)]
+    opcodes = [int(opcode) for opcode in rng.integers(0, len(MOVES), num_agents)]
+    return free, locations, opcodes
+
+def step(locations, moves, valid_cells, move_seed=0):
+    """Final agent cells after MapEnv.update_moves, moves being action names by agent"""
+    world_state = make_world(locations, valid_cells)
+    env = make_env(world_state, move_seed)
+    env.update_moves({
+        agent: (None, MOVES[OPCODES[move]]) for agent, move in zip(world_state['agents'], moves)
+    })
+    return [agent.location for agent in world_state['agents']]
+
+@pytest.mark.parametrize('seed', range(0, 3000, 3))
+def test_matches_reference_on_valid_targets(seed):
+    free, locations, opcodes = random_kitchen(seed)
+    # return_valid_pos only lets agents onto cells no agent is on
+    valid_cells = [cell for cell in free if cell not in locations]
+
+    world_state = make_world(locations, valid_cells)
+    env = make_env(world_state, seed)
+    env.update_moves({agent: (None, MOVES[opcode]) for agent, opcode in zip(world_state['agents'], opcodes)})
+
+    reference_state = make_world(locations, valid_cells)
+    reference = ReferenceMapEnv(reference_state, np.random.default_rng(seed))
+    reference.update_moves({agent: (None, MOVES[opcode]) for agent, opcode in zip(reference_state['agents'], opcodes)})
+
+    assert [agent.location for agent in world_state['agents']] == \
+        [tuple(int(x) for x in agent.location) for agent in reference_state['agents']]
+    assert env.move_rng.bit_generator.state == reference.move_rng.bit_generator.state
+    assert world_state['agent_table'].cells() == {agent.location for agent in world_state['agents']}
+    assert world_state['agent_table'].locations.tolist() == [list(agent.location) for agent in world_state['agents']]
+
+@pytest.mark.parametrize('seed', range(0, 3000, 3))
+def test_agents_never_share_a_cell(seed):
+    free, locations, opcodes = random_kitchen(seed)
+    # Any free cell, occupied or not, may be targeted
+    world_state = make_world(locations, free)
+    env = make_env(world_state, seed)
+    env.update_moves({agent: (None, MOVES[opcode]) for agent, opcode in zip(world_state['agents'], opcodes)})
+    final = [agent.location for agent in world_state['agents']]
+    assert len(set(final)) == len(final)
+
+GRID = [(row, col) for row in range(6) for col in range(6)]
+
+@pytest.mark.parametrize('move_seed', range(8))
+def test_swap_stays(move_seed):
+    assert step([(1, 1), (1, 2)], ['MOVE_RIGHT', 'MOVE_LEFT'], GRID, move_seed) == [(1, 1), (1, 2)]
+    assert step([(1, 1), (2, 2)], ['MOVE_DIAGONAL_RIGHT_DOWN', 'MOVE_DIAGONAL_LEFT_UP'], GRID, move_seed) == \
+        [(1, 1), (2, 2)]
+
+@pytest.mark.parametrize('move_seed', range(8))
+def test_cycles_rotate(move_seed):
+    triangle = [(1, 1), (1, 2), (2, 2)]
+    assert step(triangle, ['MOVE_RIGHT', 'MOVE_DOWN', 'MOVE_DIAGONAL_LEFT_UP'], GRID, move_seed) == \
+        [(1, 2), (2, 2), (1, 1)]
+    square = [(1, 1), (1, 2), (2, 2), (2, 1)]
+    assert step(square, ['MOVE_RIGHT', 'MOVE_DOWN', 'MOVE_LEFT', 'MOVE_UP'], GRID, move_seed) == \
+        [(1, 2), (2, 2), (2, 1), (1, 1)]
+
+@pytest.mark.parametrize('move_seed', range(8))
+def test_chains_follow_their_head(move_seed):
+    chain = [(1, 1), (1, 2), (1, 3)]
+    # Head onto a free cell: the chain moves up
+    assert step(chain, ['MOVE_RIGHT', 'MOVE_RIGHT', 'MOVE_RIGHT'], GRID, move_seed) == [(1, 2), (1, 3), (1, 4)]
+    # Head onto an agent that stays: nobody moves
+    assert step(chain + [(1, 4)], ['MOVE_RIGHT', 'MOVE_RIGHT', 'MOVE_RIGHT', 'STAY'], GRID, move_seed) == \
+        chain + [(1, 4)]
+    # Head into a swap: the chain stays with it
+    assert step(chain + [(1, 4)], ['MOVE_RIGHT', 'MOVE_RIGHT', 'MOVE_RIGHT', 'MOVE_LEFT'], GRID, move_seed) == \
+        chain + [(1, 4)]
+
+def test_tail_into_a_cycle_follows_the_cycle():
+    """
+    A tail contesting a cell of a 3-cycle: if the cycle member gets it, the cycle
+    rotates and the tail stays; if the tail gets it, the cycle is broken into a chain
+    whose head lost its cell, so nobody moves. Both happen, depending on move_rng.
+    """
+    locations = [(1, 1), (1, 2), (2, 2), (1, 0)]
+    moves = ['MOVE_RIGHT', 'MOVE_DOWN', 'MOVE_DIAGONAL_LEFT_UP', 'MOVE_RIGHT']
+    rotated = [(1, 2), (2, 2), (1, 1), (1, 0)]
+    outcomes = set()
+    for move_seed in range(32):
+        final = step(locations, moves, GRID, move_seed)
+        assert final in (rotated, locations)
+        outcomes.add(tuple(final))
+    assert outcomes == {tuple(rotated), tuple(locations)}
@@ -0,0 +1,71 @@
+"""
+ResultsStore.merge interrupted before or after the merged CSV is renamed into place
+must neither lose rows nor count them twice, in `read` or in the next `merge`.
+"""
+import os
+import shutil
+
+import pytest
+
+import results_store
+from results_store import ResultsStore
+
+COLUMNS = ['0', '50']
+
+class Crash(Exception):
+    pass
+
+def add_runs(store, start, count):
+    for run in range(start, start+count):
+        store.append({'0': run, '50': run * 10})
+
+def runs(store):
+    return store.read()['0'].tolist()
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / 'map_10_ai_ToM.csv'), COLUMNS)
+    add_runs(store, 0, 3)
+    store.merge()
+    add_runs(store, 3, 2)
+    return store
+
+def test_merge(store):
+    assert runs(store) == [0, 1, 2, 3, 4]
+    assert store.merge()['0'].tolist() == [0, 1, 2, 3, 4]
+    assert not store.shards() and not os.path.exists(store.merging_folder)
+    assert runs(store) == [0, 1, 2, 3, 4]
+
+def test_crash_before_the_csv_is_replaced(store, monkeypatch):
+    replace = os.replace
+    def crash_on_csv(src, dst):
+        if dst == store.path:
+            raise Crash
+        replace(src, dst)
+    monkeypatch.setattr(results_store.os, 'replace', crash_on_csv)
+    with pytest.raises(Crash):
+        store.merge()
+    monkeypatch.undo()
+
+    assert store.merging() and not store.shards()
+    assert runs(store) == [0, 1, 2, 3, 4]
+    add_runs(store, 5, 1)
+    assert store.merge()['0'].tolist() == [0, 1, 2, 3, 4, 5]
+    assert not os.path.exists(store.merging_folder)
+
+def test_crash_before_the_shards_are_deleted(store, monkeypatch):
+    rmtree = shutil.rmtree
+    def crash_on_cleanup(path, ignore_errors=False):
+        if not ignore_errors:
+            raise Crash
+        rmtree(path, ignore_errors=ignore_errors)
+    monkeypatch.setattr(results_store.shutil, 'rmtree', crash_on_cleanup)
+    with pytest.raises(Crash):
+        store.merge()
+    monkeypatch.undo()
+
+    assert os.path.exists(store.merging_folder) and not store.merging()
+    assert runs(store) == [0, 1, 2, 3, 4]
+    add_runs(store, 5, 1)
+    assert store.merge()['0'].tolist() == [0, 1, 2, 3, 4, 5]
+    assert not os.path.exists(store.merging_folder)
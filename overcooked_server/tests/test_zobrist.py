@@ -0,0 +1,37 @@
+"""
+The Zobrist hash of a world_state kept up to date from MapEnv.touched_cells must
+equal a full hash of it, and of a deep copy of it (the historical world_state the
+ToM agents infer on is one), including once cooked dishes sit in pots and on plates.
+"""
+import copy
+
+import pytest
+
+from benchmarks.simulation import headless_step, make_env
+import zobrist
+from zobrist import ZobristHash
+
+STEPS = 150
+
+@pytest.fixture
+def goal_cache():
+    zobrist.enable_cache(64)
+    yield
+    zobrist.enable_cache(0)
+
+def has_dish(world_state):
+    return any(item.dish for item in world_state['pot'] + world_state['plate']) or \
+        any(getattr(agent.holding, 'dish', None) for agent in world_state['agents'])
+
+def test_incremental_hash_matches_full_and_copied_hash(goal_cache):
+    env = make_env(2, 'tom', 3)
+    world_state = env.world_state
+    dish_steps = 0
+    for step in range(STEPS):
+        headless_step(env)
+        value = world_state['zobrist'].value
+        assert ZobristHash(world_state).value == value, step
+        assert ZobristHash(copy.deepcopy(world_state)).value == value, step
+        dish_steps += has_dish(world_state)
+    # The agents cooked, so dishes were hashed
+    assert dish_steps
@@ -0,0 +1,88 @@
+"""
+Tracing
+-------
+Leveled, per-subsystem loggers for the env, planner, inference and game loop.
+
+Subsystem loggers are children of the 'overcooked' logger (eg. 'overcooked.env').
+Hot paths guard their calls with `if tracing.enabled:` so that, when debug output
+is off, the dicts and object reprs in the message arguments are never built and
+the only cost left is one flag check.
+"""
+from typing import Dict
+from typing import Optional
+
+import logging
+import os
+import sys
+
+# Below DEBUG; used for full per-step world state dumps
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+ROOT_LOGGER = 'overcooked'
+_root = logging.getLogger(ROOT_LOGGER)
+
+# True when any subsystem logs at DEBUG or below
+enabled = False
+
+def get_logger(subsystem: str) -> logging.Logger:
+    return _root.getChild(subsystem)
+
+def configure(
+    level: str='INFO',
+    trace_file: Optional[str]=None,
+    subsystem_levels: Optional[Dict[str,str]]=None
+) -> None:
+    """
+    Parameters
+    ----------
+    level: str
+        Console level for all subsystems (eg. 'INFO', 'DEBUG', 'TRACE')
+    trace_file: str
+        If given, every record down to TRACE (incl. per-step world state dumps) is written here
+    subsystem_levels: Dict[str,str]
+        Per-subsystem overrides, eg. {'inference': 'DEBUG'}
+    """
+    global enabled
+    for handler in list(_root.handlers):
+        _root.removeHandler(handler)
+        handler.close()
+    _root.propagate = False
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    _root.addHandler(console)
+    _root.setLevel(level)
+
+    if trace_file:
+        file_handler = logging.FileHandler(trace_file, mode='w')
+        file_handler.setFormatter(logging.Formatter('%(relativeCreated)d %(name)s %(levelname)s %(message)s'))
+        _root.addHandler(file_handler)
+        # Console keeps the requested level; the file gets everything
+        console.setLevel(level)
+        _root.setLevel(TRACE)
+
+    subsystem_levels = subsystem_levels or {}
+    for subsystem in _root.manager.loggerDict:
+        if subsystem.startswith(ROOT_LOGGER + '.'):
+            logging.getLogger(subsystem).setLevel(logging.NOTSET)
+    for subsystem, subsystem_level in subsystem_levels.items():
+        get_logger(subsystem).setLevel(subsystem_level)
+
+    enabled = _root.isEnabledFor(logging.DEBUG) or any(
+        get_logger(subsystem).isEnabledFor(logging.DEBUG) for subsystem in subsystem_levels
+    )
+
+def _levels_from_env(value: str) -> Dict[str,str]:
+    # OVERCOOKED_LOG_SUBSYSTEMS="inference=DEBUG,env=TRACE"
+    levels = {}
+    for pair in filter(None, value.split(',')):
+        subsystem, subsystem_level = pair.split('=')
+        levels[subsystem.strip()] = subsystem_level.strip().upper()
+    return levels
+
+configure(
+    os.environ.get('OVERCOOKED_LOG_LEVEL', 'INFO').upper(),
+    os.environ.get('OVERCOOKED_TRACE_FILE'),
+    _levels_from_env(os.environ.get('OVERCOOKED_LOG_SUBSYSTEMS', ''))
+)
@@ -0,0 +1,339 @@
+"""
+Trajectory
+----------
+Compact on-disk record of a run: one fixed-width NumPy structured record per timestep.
+
+    <name>.npy   structured array (agent positions, actions, holdings, chopping board,
+                 pot and item states, score), np.memmap-able
+    <name>.json  sidecar: map, seed, agents, label table and number of recorded steps
+
+Every record holds the state right after MapEnv.step, plus the actions that led to it,
+so any step can be read (or rendered, see `Trajectory.frame_state`) without touching
+the steps before it, and the actions can be fed back through MapEnv.step (see replay.py).
+
+Strings (item kinds, 'for_task' of an action) are stored as indexes into the sidecar's
+`labels`; coordinates are (row, col), with -1 where there is nothing to record.
+"""
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from collections import defaultdict
+from types import SimpleNamespace
+import json
+import os
+import numpy as np
+
+from action_handlers import MOVES, Action, as_action
+from settings import MAP, TABLE_TOPS, CHOPPING_BOARDS, INGREDIENTS_INITIALIZATION, selected_map
+from overcooked_item_classes import ChoppingBoard, Ingredient, ItemState, Plate, Pot
+
+FORMAT_VERSION = 1
+# Task actions; stored in action_op after the 9 movement actions (0-8)
+OPS = ['PICK', 'CHOP', 'COOK', 'SCOOP', 'SERVE', 'DROP']
+NUM_MOVES = 9
+NO_ACTION = -1
+# action_flags bits
+IS_NEW = 1
+IS_LAST = 2
+PICK_PLATE = 4
+
+def record_dtype(num_agents: int, num_chopping_boards: int, num_pots: int, num_ingredients: int, max_items: int) -> np.dtype:
+    return np.dtype([
+        ('episode', np.int32),
+        ('total_score', np.int32),
+        ('order_count', np.int16),
+        ('agent_location', np.int16, (num_agents, 2)),
+        ('agent_holding', np.int16, (num_agents,)),
+        ('action_op', np.int8, (num_agents,)),
+        ('action_goal', np.int16, (num_agents,)),
+        ('action_flags', np.uint8, (num_agents,)),
+        ('action_for_task', np.int16, (num_agents,)),
+        ('action_task_coord', np.int16, (num_agents, 2)),
+        ('action_end_coord', np.int16, (num_agents, 2)),
+        ('drop_coord', np.int16, (num_agents, 2)),
+        ('chopping_board_taken', np.bool_, (num_chopping_boards,)),
+        ('pot_ingredients', np.int8, (num_pots, num_ingredients)),
+        ('item_code', np.int16, (max_items,)),
+        ('item_location', np.int16, (max_items, 2)),
+    ])
+
+class TrajectoryWriter:
+    def __init__(self, path: str, env, capacity: int=512) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Output path without extension (<path>.npy and <path>.json are written)
+        env: OvercookedEnv
+            Env being recorded; its seed and agents go into the sidecar
+        capacity: int
+            Records preallocated on disk; the file grows (doubles) when it is full
+        """
+        self.path = path
+        world_state = env.world_state
+        self.agent_ids = [agent.id for agent in world_state['agents']]
+        self.ingredient_names = sorted(INGREDIENTS_INITIALIZATION.keys())
+        self.labels = []
+        self._label_codes = {}
+        self.meta = {
+            'format_version': FORMAT_VERSION,
+            'map': MAP,
+            # OVERCOOKED_MAP value that selects the same map (eg. map_10)
+            'map_module': selected_map.__name__.split('.')[-1],
+            'seed': int(env.seed_sequence.entropy),
+            'agents': self.agent_ids,
+            # Constructor arguments of the recorded env (see Trajectory.agent_configs)
+            'human_agents': env.human_agents,
+            'ai_agents': env.ai_agents,
+            'ingredients': self.ingredient_names,
+            'ops': OPS,
+            'labels': self.labels,
+            'steps': 0,
+        }
+        # Items (ingredients and plates) lying in the kitchen sit on counters or chopping boards
+        max_items = len(TABLE_TOPS) + len(CHOPPING_BOARDS)
+        self.dtype = record_dtype(
+            len(self.agent_ids), len(world_state['chopping_board']), len(world_state['pot']),
+            len(self.ingredient_names), max_items
+        )
+        self.records = np.lib.format.open_memmap(self.path + '.npy', mode='w+', dtype=self.dtype, shape=(capacity,))
+        self.steps = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def label(self, text: Optional[str]) -> int:
+        if text is None:
+            return NO_ACTION
+        code = self._label_codes.get(text)
+        if code is None:
+            code = len(self.labels)
+            self.labels.append(text)
+            self._label_codes[text] = code
+        return code
+
+    def record(self, env, action_mapping: Dict[Any, Tuple[int, Any]]) -> None:
+        """
+        Record the step env.step(action_mapping) just made.
+
+        Parameters
+        ----------
+        env: OvercookedEnv
+        action_mapping: Dict[Agent, Tuple[int, Any]]
+            agent -> (goal id, plan step), as passed to env.step
+        """
+        if self.steps == len(self.records):
+            self._grow()
+        record = self.records[self.steps]
+        world_state = env.world_state
+        record['episode'] = env.episode
+        record['total_score'] = world_state['total_score']
+        record['order_count'] = world_state['order_count']
+
+        actions = {agent.id: action for agent, action in action_mapping.items()}
+        for idx, agent in enumerate(world_state['agents']):
+            record['agent_location'][idx] = agent.location
+            record['agent_holding'][idx] = self.label(item_label(agent.holding))
+            self._record_action(record, idx, actions.get(agent.id))
+            record['drop_coord'][idx] = env.drop_cells.get(agent.id, (-1, -1))
+
+        record['chopping_board_taken'] = [board.state == ItemState.TAKEN for board in world_state['chopping_board']]
+        for idx, pot in enumerate(world_state['pot']):
+            record['pot_ingredients'][idx] = [pot.ingredient_count.get(name, 0) for name in self.ingredient_names]
+
+        items = world_state['ingredients'] + world_state['plate']
+        if len(items) > len(record['item_code']):
+            raise ValueError(f'{len(items)} items in the kitchen, the trajectory holds {len(record["item_code"])}')
+        record['item_code'] = NO_ACTION
+        record['item_location'] = -1
+        for idx, item in enumerate(items):
+            record['item_code'][idx] = self.label(item_label(item))
+            record['item_location'][idx] = item.location
+        self.steps += 1
+
+    def _record_action(self, record, idx: int, action: Optional[Tuple[int, Any]]) -> None:
+        record['action_op'][idx] = NO_ACTION
+        record['action_goal'][idx] = NO_ACTION
+        record['action_flags'][idx] = 0
+        record['action_for_task'][idx] = NO_ACTION
+        record['action_task_coord'][idx] = -1
+        record['action_end_coord'][idx] = -1
+        if action is None:
+            return
+        goal, step = action
+        step = as_action(step)
+        record['action_goal'][idx] = NO_ACTION if goal is None else goal
+        if step.is_move:
+            record['action_op'][idx] = step.opcode
+            return
+
+        record['action_op'][idx] = NUM_MOVES + OPS.index(step.name)
+        flags = 0
+        if step.is_new:
+            flags |= IS_NEW
+        if step.is_last:
+            flags |= IS_LAST
+        if step.pick_type == 'plate':
+            flags |= PICK_PLATE
+        record['action_flags'][idx] = flags
+        record['action_for_task'][idx] = self.label(step.for_task)
+        if step.task_coord is not None:
+            record['action_task_coord'][idx] = step.task_coord
+        if step.end_coord is not None:
+            record['action_end_coord'][idx] = step.end_coord
+
+    def _grow(self) -> None:
+        self.records.flush()
+        old_records = self.records
+        tmp_path = self.path + '.tmp.npy'
+        records = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype, shape=(2 * len(old_records),))
+        records[:len(old_records)] = old_records
+        records.flush()
+        del old_records
+        self.records = None
+        os.replace(tmp_path, self.path + '.npy')
+        self.records = records
+
+    def flush(self) -> None:
+        """Write the recorded steps and the sidecar to disk"""
+        self.records.flush()
+        self.meta['steps'] = self.steps
+        with open(self.path + '.json', 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    def close(self) -> None:
+        if self.records is not None:
+            self.flush()
+            self.records = None
+
+class Trajectory:
+    def __init__(self, path: str, mmap_mode: Optional[str]='r') -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Trajectory path without extension
+        mmap_mode: str
+            np.load mmap_mode; None reads the whole file into memory
+        """
+        with open(path + '.json') as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.labels = self.meta['labels']
+        self.ingredient_names = self.meta['ingredients']
+        self.agent_ids = self.meta['agents']
+        self.records = np.load(path + '.npy', mmap_mode=mmap_mode)[:self.meta['steps']]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, step):
+        return self.records[step]
+
+    def agent_configs(self) -> Tuple[Optional[Dict[str, Dict]], Optional[Dict[str, Dict]]]:
+        """(human_agents, ai_agents) arguments that rebuild the recorded OvercookedEnv"""
+        configs = []
+        for agents in [self.meta['human_agents'], self.meta['ai_agents']]:
+            if agents is None:
+                configs.append(None)
+                continue
+            # JSON turned the coordinate tuples into lists
+            configs.append({
+                agent_id: dict(config, coords=tuple(config['coords'])) for agent_id, config in agents.items()
+            })
+        return configs[0], configs[1]
+
+    def action(self, step: int, agent_idx: int) -> Optional[Tuple[int, Any]]:
+        """(goal id, Action) that agent `agent_idx` took at `step`, as passed to env.step"""
+        record = self.records[step]
+        op = int(record['action_op'][agent_idx])
+        if op == NO_ACTION:
+            return None
+        goal = int(record['action_goal'][agent_idx])
+        goal = None if goal == NO_ACTION else goal
+        if op < NUM_MOVES:
+            return goal, MOVES[op]
+
+        name = OPS[op - NUM_MOVES]
+        flags = int(record['action_flags'][agent_idx])
+        for_task = int(record['action_for_task'][agent_idx])
+        return goal, Action.task(
+            name,
+            task_coord=_coord(record['action_task_coord'][agent_idx]),
+            end_coord=_coord(record['action_end_coord'][agent_idx]),
+            is_last=bool(flags & IS_LAST),
+            is_new=bool(flags & IS_NEW),
+            pick_type=('plate' if flags & PICK_PLATE else 'ingredient') if name == 'PICK' else None,
+            for_task=None if for_task == NO_ACTION else self.labels[for_task],
+            drop_coord=_coord(record['drop_coord'][agent_idx]) if name == 'DROP' else None
+        )
+
+    def frame_state(self, step: int) -> Dict[str, Any]:
+        """
+        World state of `step` with just what frame_renderer.FrameRenderer draws
+        (agents, items, chopping boards, pots, return counter and score counters).
+        """
+        from settings import ITEMS_INITIALIZATION, WORLD_STATE
+        record = self.records[step]
+        agents = []
+        for idx, agent_id in enumerate(self.agent_ids):
+            holding = self._make_item(int(record['agent_holding'][idx]), _coord(record['agent_location'][idx]))
+            agents.append(SimpleNamespace(id=agent_id, location=_coord(record['agent_location'][idx]), holding=holding))
+
+        ingredients, plates = [], []
+        for code, location in zip(record['item_code'], record['item_location']):
+            if code == NO_ACTION:
+                break
+            item = self._make_item(int(code), _coord(location))
+            (plates if isinstance(item, Plate) else ingredients).append(item)
+
+        chopping_boards = [
+            ChoppingBoard('utensils', location, ItemState.TAKEN if taken else ItemState.EMPTY)
+            for location, taken in zip(ITEMS_INITIALIZATION['chopping_board'], record['chopping_board_taken'])
+        ]
+        pots = []
+        for idx, (location, counts) in enumerate(zip(ITEMS_INITIALIZATION['pot'], record['pot_ingredients'])):
+            ingredient_count = defaultdict(int, {
+                name: int(count) for name, count in zip(self.ingredient_names, counts) if count
+            })
+            pots.append(Pot(pot_id=idx+1, category='utensils', location=location, ingredient_count=ingredient_count))
+
+        return {
+            'agents': agents,
+            'ingredients': ingredients,
+            'plate': plates,
+            'chopping_board': chopping_boards,
+            'pot': pots,
+            'return_counter': WORLD_STATE['return_counter'][0],
+            'total_score': int(record['total_score']),
+            'order_count': int(record['order_count']),
+        }
+
+    def _make_item(self, code: int, location: Tuple[int,int]):
+        if code == NO_ACTION:
+            return None
+        kind, *details = self.labels[code].split(':')
+        if kind == 'plate':
+            item = Plate(None, 'utensils', location, ItemState[details[0].upper()])
+        else:
+            item = Ingredient(details[0], ItemState[details[1].upper()], 'ingredient', False, is_new=False)
+        item.location = location
+        return item
+
+def item_label(item) -> Optional[str]:
+    """Label of a held/placed item, eg. 'ingredient:onion:chopped' or 'plate:plated'"""
+    if item is None:
+        return None
+    if isinstance(item, Plate):
+        return f'plate:{item.state}'
+    return f'ingredient:{item.name}:{item.state}'
+
+def _coord(coord) -> Optional[Tuple[int,int]]:
+    if coord[0] < 0:
+        return None
+    return (int(coord[0]), int(coord[1]))
@@ -0,0 +1,165 @@
+from typing import Optional
+from typing import Tuple
+
+import os
+import queue
+import threading
+import numpy as np
+
+BACKPRESSURE = ['block', 'drop']
+# Queued after the last frame to stop the encoder thread
+_STOP = object()
+
+class VideoRecorder:
+    def __init__(
+        self,
+        vid_path: str,
+        video_name: str='trajectory',
+        fps: int=1,
+        format: str='mp4v',
+        resize: Optional[Tuple[int,int]]=(640, 480)
+    ) -> None:
+        """
+        Streams frames straight into an open cv2.VideoWriter as they are captured,
+        so no frame list or per-step image files are kept around.
+        Same output as helpers.make_video_from_rgb_imgs.
+
+        Parameters
+        ----------
+        vid_path: str
+            Folder the video is written to
+        video_name: str
+            File name, without the .mp4 extension
+        fps: int
+            Frames per second of the output video
+        format: str
+            FourCC codec code
+        resize: Tuple[int,int]
+            (width, height) of the output video; None keeps the frame size
+        """
+        self.video_path = os.path.join(vid_path, video_name + '.mp4')
+        self.fps = fps
+        self.format = format
+        self.resize = resize
+        self.video = None
+        self.frame_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def capture(self, surface) -> None:
+        """Encode the current contents of a pygame surface (eg. Game.screen)"""
+        self.write(surface_to_frame(surface))
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Parameters
+        ----------
+        frame: np.ndarray
+            (height, width, 3) uint8 frame in BGR order
+        """
+        import cv2
+        if self.video is None:
+            self._open(frame)
+        if self.resize is not None and (frame.shape[1], frame.shape[0]) != self.resize:
+            frame = cv2.resize(frame, self.resize, interpolation=cv2.INTER_NEAREST)
+        self.video.write(frame)
+        self.frame_count += 1
+
+    def close(self) -> None:
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+    def _open(self, frame: np.ndarray) -> None:
+        import cv2
+        if self.resize is not None:
+            width, height = self.resize
+        else:
+            height, width = frame.shape[:2]
+        fourcc = cv2.VideoWriter_fourcc(*self.format)
+        self.video = cv2.VideoWriter(self.video_path, fourcc, float(self.fps), (width, height))
+
+class AsyncVideoRecorder(VideoRecorder):
+    def __init__(
+        self,
+        vid_path: str,
+        video_name: str='trajectory',
+        fps: int=1,
+        format: str='mp4v',
+        resize: Optional[Tuple[int,int]]=(640, 480),
+        max_queue: int=64,
+        backpressure: str='block'
+    ) -> None:
+        """
+        VideoRecorder that resizes and encodes on a background thread.
+
+        The simulation thread only copies the surface into a frame and queues it.
+
+        Parameters
+        ----------
+        max_queue: int
+            Frames that can be waiting for the encoder
+        backpressure: str
+            What `write` does when the queue is full:
+            'block' waits for the encoder (no frame is lost),
+            'drop' discards the frame and counts it in dropped_frames
+        """
+        if backpressure not in BACKPRESSURE:
+            raise ValueError(f'backpressure must be one of {BACKPRESSURE}, got {backpressure!r}')
+        super().__init__(vid_path, video_name, fps, format, resize)
+        self.backpressure = backpressure
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.dropped_frames = 0
+        self._closed = False
+        self._error = None
+        self._worker = threading.Thread(target=self._encode_frames, name='video-encoder', daemon=True)
+        self._worker.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        if self._closed:
+            raise ValueError('Cannot write to a closed recorder')
+        if self.backpressure == 'drop':
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.dropped_frames += 1
+        else:
+            self.frames.put(frame)
+
+    def close(self) -> None:
+        """Flush the queued frames, stop the encoder thread and release the video"""
+        if self._closed:
+            return
+        self._closed = True
+        self.frames.put(_STOP)
+        self._worker.join()
+        super().close()
+        if self._error is not None:
+            raise self._error
+
+    def _encode_frames(self) -> None:
+        while True:
+            frame = self.frames.get()
+            if frame is _STOP:
+                return
+            if self._error is not None:
+                # Keep draining so that a blocked writer is never stuck
+                continue
+            try:
+                VideoRecorder.write(self, frame)
+            except Exception as error:
+                self._error = error
+
+def surface_to_frame(surface) -> np.ndarray:
+    """Copy a pygame surface into a (height, width, 3) BGR frame for OpenCV"""
+    import pygame as pg
+    pixels = pg.surfarray.pixels3d(surface)
+    # surfarray is (width, height, RGB); one copy does the transpose and RGB -> BGR
+    frame = np.ascontiguousarray(pixels.transpose(1, 0, 2)[:, :, ::-1])
+    # Release the view, which keeps the surface locked
+    del pixels
+    return frame
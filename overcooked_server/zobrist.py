@@ -0,0 +1,186 @@
+"""
+Zobrist
+-------
+Incremental 64-bit hash of the decision-relevant world state, and a bounded cache of
+planning results keyed by it.
+
+Every (feature, cell) pair, eg. agent 0 holding a chopped onion on (4, 7), or a pot
+with 2 tomatoes on (1, 6), gets a random 64-bit key, and the hash of the map is the
+XOR of the keys of what is on every cell. After a step only MapEnv.touched_cells are
+re-hashed (XOR the cell's old key out, its new one in). The goal counts and fronts of
+the goal queues, which `update_episode` also changes, are folded in when a key is
+taken, as is the cooked dish count.
+
+Timesteps often revisit the same configuration (agent cells, holdings, pot counts,
+goal counts), and `find_best_goal` then returns the same plans. With the cache
+enabled (`enable_cache(size)`, `OVERCOOKED_GOAL_CACHE=size` or `--goal_cache size`),
+those plans are looked up per agent instead of re-planned; hits and misses are
+reported as the goal_cache_hits/goal_cache_misses profiling counters.
+
+The cache is off by default: a hit reuses the tie-breaks drawn when the plans were
+first made and skips the agent's rng draws, so a seeded run with the cache enabled
+takes a different (equally valid) trajectory than one without it.
+"""
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+from collections import OrderedDict, defaultdict
+import copy
+import os
+
+import numpy as np
+
+from barriers import Barriers
+from overcooked_item_classes import Dish
+from overcooked_item_classes import Pot
+import profiling
+
+KEY_SEED = 20200909
+
+cache_size = 0
+
+_keys = {}
+_key_rng = np.random.default_rng(KEY_SEED)
+_caches = defaultdict(OrderedDict)
+
+def feature_key(feature: Hashable) -> int:
+    """Random 64-bit key of a feature, drawn the first time it is seen"""
+    key = _keys.get(feature)
+    if key is None:
+        key = _keys[feature] = int(_key_rng.integers(2**64, dtype=np.uint64))
+    return key
+
+def _dish_label(item) -> Hashable:
+    # Plates hold a Dish, which has no value equality (a copied dish would hash apart), so it
+    # is labelled by name; pots hold the dish name itself
+    dish = getattr(item, 'dish', None)
+    return dish.name if isinstance(dish, Dish) else dish
+
+def _item_label(item) -> Hashable:
+    if item is None:
+        return None
+    if isinstance(item, Pot):
+        ingredient_count = tuple(sorted((name, count) for name, count in item.ingredient_count.items() if count))
+        return ('Pot', item.ingredient, ingredient_count, item.is_empty, _dish_label(item))
+    return (
+        type(item).__name__,
+        getattr(item, 'name', None),
+        getattr(item, 'state', None),
+        getattr(item, 'is_new', None),
+        _dish_label(item),
+        getattr(item, 'ready_to_serve', None)
+    )
+
+def _cell_key(world_state: Dict, cell: Tuple[int,int]) -> int:
+    key = 0
+    agent_table = world_state['agent_table']
+    agent = agent_table.at(cell)
+    if agent is not None:
+        key ^= feature_key(('agent', agent_table.row(agent), cell, _item_label(agent.holding)))
+    # Items are hashed with their position on the cell, so that stacked duplicates do not cancel out
+    for position, item in enumerate(world_state['item_registry'].at(cell)):
+        key ^= feature_key(('item', cell, position, _item_label(item)))
+    if cell in world_state['valid_item_cells']:
+        key ^= feature_key(('valid_item_cell', cell))
+    return key
+
+class ZobristHash:
+    def __init__(self, world_state: Dict) -> None:
+        """
+        Hash of the agents, items and free table-tops of a world_state.
+
+        It is stored in the world_state itself (as world_state['zobrist']), so that
+        copies of the world_state (eg. the historical one used for inference) carry
+        a hash of their own state.
+
+        Parameters
+        ----------
+        world_state: Dict
+            OvercookedEnv.world_state; every non-empty cell of it is hashed
+        """
+        self.value = 0
+        self._cell_keys = {}
+        cells = world_state['agent_table'].cells()
+        for items in world_state['item_registry'].items.values():
+            cells.update(tuple(item.location) for item in items)
+        cells.update(tuple(cell) for cell in world_state['valid_item_cells'])
+        self.update(world_state, cells)
+
+    def update(self, world_state: Dict, cells: Iterable[Tuple[int,int]]) -> None:
+        """Re-hash the cells whose contents changed (eg. MapEnv.touched_cells)"""
+        for cell in cells:
+            old_key = self._cell_keys.pop(cell, 0)
+            new_key = _cell_key(world_state, cell)
+            if new_key:
+                self._cell_keys[cell] = new_key
+            self.value ^= old_key ^ new_key
+
+    def key(self, world_state: Dict) -> int:
+        """Hash of the map plus the goal counts, goal queue fronts and cooked dish counts"""
+        key = self.value
+        goal_space = world_state['goal_space']
+        for goal in goal_space:
+            count = goal_space.count(goal)
+            if count:
+                key ^= feature_key(('goal', goal, count))
+            if goal_space.queue_length(goal):
+                key ^= feature_key(('goal_front', goal, goal_space.peek(goal)))
+        for recipe, count in world_state['cooked_dish_count'].items():
+            if count:
+                key ^= feature_key(('cooked_dish', recipe, count))
+        return key
+
+def enable_cache(size: int) -> None:
+    """Cache up to `size` find_best_goal results per agent; 0 disables (and empties) the cache"""
+    global cache_size
+    cache_size = size
+    _caches.clear()
+
+def barrier_key(barriers: List[Tuple[int,int]]) -> int:
+    """Key of a set of barrier cells; kept up to date by Barriers, hashed in full for a plain list"""
+    if isinstance(barriers, Barriers):
+        return barriers.key
+    return hash(frozenset(barriers))
+
+def find_best_goal(agent, observer_filtered_goals=[]):
+    """
+    agent.find_best_goal, looked up in the agent's cache when it is enabled.
+
+    The key is the world_state's Zobrist key, the key of the A* barriers the agent plans
+    around (the shared WALLS list, which tracks the agents' cells) and the goals filtered
+    out by the observer.
+    """
+    if not cache_size:
+        return agent.find_best_goal(observer_filtered_goals)
+
+    world_state = agent.world_state
+    state_hash = world_state.get('zobrist')
+    if state_hash is None:
+        state_hash = world_state['zobrist'] = ZobristHash(world_state)
+    key = (
+        state_hash.key(world_state),
+        barrier_key(agent.astar_map.barriers[0]),
+        frozenset(observer_filtered_goals)
+    )
+    cache = _caches[agent.id]
+    agent_goal_costs = cache.get(key)
+    if agent_goal_costs is not None:
+        cache.move_to_end(key)
+        if profiling.enabled:
+            profiling.count('goal_cache_hits')
+        # Callers may extend the returned paths
+        return copy.deepcopy(agent_goal_costs)
+
+    if profiling.enabled:
+        profiling.count('goal_cache_misses')
+    agent_goal_costs = agent.find_best_goal(observer_filtered_goals)
+    cache[key] = copy.deepcopy(agent_goal_costs)
+    if len(cache) > cache_size:
+        cache.popitem(last=False)
+    return agent_goal_costs
+
+if os.environ.get('OVERCOOKED_GOAL_CACHE'):
+    enable_cache(int(os.environ['OVERCOOKED_GOAL_CACHE']))